@@ -0,0 +1,110 @@
+import hashlib
+import json
+import math
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from loguru import logger
+from pydantic import ValidationError
+
+from listing_parser import ITEMS_PER_PAGE
+from models import Item, ItemsResponse
+from page_state import validate_items
+
+API_HEADERS = {
+    "accept": "application/json, text/plain, */*",
+    "x-requested-with": "XMLHttpRequest",
+    "sec-fetch-dest": "empty",
+    "sec-fetch-mode": "cors",
+    "sec-fetch-site": "same-origin",
+}
+
+
+def recording_key(url: str) -> str:
+    """Имя файла записи ответа: хэш пути и параметров запроса (без хоста)."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return hashlib.sha1(f"{parts.path}?{query}".encode("utf-8")).hexdigest()
+
+
+class AvitoApiClient:
+    """JSON-эндпоинты Авито вместо HTML-страниц: поиск и карточка объявления.
+
+    Клиент только строит URL и разбирает ответы; сами запросы идут через
+    fetch_data/fetch_data_async парсера, поэтому прокси, cookies, лимитер и
+    обновление идентичности работают так же, как для HTML. base_url можно
+    направить на api_stub_server.py, который отдает записанные ответы.
+    """
+
+    SEARCH_PATH = "/web/1/js/items"
+    ITEM_PATH = "/web/2/items/{item_id}"
+
+    def __init__(self, base_url: str = "https://www.avito.ru", record_dir: str | None = None):
+        self.base_url = base_url.rstrip("/")
+        self.record_dir = Path(record_dir) if record_dir else None
+        if self.record_dir is not None:
+            self.record_dir.mkdir(parents=True, exist_ok=True)
+
+    def owns(self, url: str) -> bool:
+        return url.startswith(self.base_url)
+
+    def search_url(self, listing_url: str) -> str:
+        """JSON-поиск для страницы выдачи: параметры выдачи (включая p) и ее путь."""
+        parts = urlsplit(listing_url)
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        query.append(("pageUrl", parts.path))
+        return f"{self.base_url}{self.SEARCH_PATH}?{urlencode(query)}"
+
+    def item_url(self, item_id: int) -> str:
+        return f"{self.base_url}{self.ITEM_PATH.format(item_id=item_id)}"
+
+    def record(self, url: str, text: str) -> None:
+        """Сохраняет ответ для api_stub_server.py, если задан record_dir.
+
+        Записываются только разобранные ответы: страница блокировки или ответ с ошибкой
+        под кодом 200 не должны попасть в воспроизведение.
+        """
+        if self.record_dir is None:
+            return
+        (self.record_dir / f"{recording_key(url)}.json").write_text(text, encoding="utf-8")
+
+    @staticmethod
+    def _load(text: str) -> dict:
+        try:
+            data = json.loads(text)
+        except ValueError:
+            logger.warning("Ответ API не является JSON")
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    @staticmethod
+    def _catalog(data: dict) -> dict:
+        """Блок выдачи ответа поиска: catalog или сам ответ; пустой, если формат неожиданный."""
+        catalog = data.get("catalog")
+        if isinstance(catalog, dict):
+            return catalog
+        return {} if catalog is not None else data
+
+    def parse_search(self, text: str) -> ItemsResponse:
+        items = self._catalog(self._load(text)).get("items")
+        return ItemsResponse(items=validate_items(items if isinstance(items, list) else []))
+
+    def total_pages(self, text: str) -> int:
+        data = self._load(text)
+        catalog = self._catalog(data)
+        total = data.get("totalCount") or catalog.get("totalCount") or catalog.get("mainCount") or 0
+        try:
+            return max(1, math.ceil(int(total) / ITEMS_PER_PAGE))
+        except (TypeError, ValueError):
+            return 1
+
+    def parse_item(self, text: str) -> Item | None:
+        data = self._load(text)
+        raw = data.get("item") or data
+        if not isinstance(raw, dict) or not raw.get("id"):
+            return None
+        try:
+            return Item.model_validate(raw)
+        except ValidationError as exc:
+            logger.debug(f"Ответ API по объявлению не прошел валидацию: {exc.error_count()} ошибок")
+            return None
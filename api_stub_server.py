@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Local stub of Avito's JSON endpoints that replays recorded responses.
+
+Record responses by running the parser with transport = "api" and
+api_record_dir set, then point api_base_url at this server:
+
+    python api_stub_server.py --dir api_recordings --port 8765
+    # config.toml: api_base_url = "http://127.0.0.1:8765"
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from loguru import logger
+
+from api_client import recording_key
+
+
+def make_handler(record_dir: Path):
+    class ReplayHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = record_dir / f"{recording_key(self.path)}.json"
+            if not path.exists():
+                self.send_error(404, "No recording for this request")
+                return
+            body = path.read_bytes()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"stub: {format % args}")
+
+    return ReplayHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded Avito JSON API responses')
+    parser.add_argument('--dir', default='api_recordings', help='Directory with recorded responses')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    record_dir = Path(args.dir)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(record_dir))
+    logger.info(f"Replaying {len(list(record_dir.glob('*.json')))} recordings on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import sqlite3
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter
+from datetime import datetime, timedelta
+
+WINDOW_STEPS = {"day": timedelta(days=1), "hour": timedelta(hours=1)}
+
+
+def backfill_windows(start_date: str, end_date: str, granularity: str = "day") -> list[tuple[int, int]]:
+    """Окна [начало, конец) в секундах от эпохи, покрывающие start_date..end_date включительно."""
+    step = WINDOW_STEPS.get(granularity)
+    if step is None:
+        raise ValueError(f"Неизвестный шаг окна: {granularity} (ожидается day или hour)")
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+    windows = []
+    while start < end:
+        window_end = min(start + step, end)
+        windows.append((int(start.timestamp()), int(window_end.timestamp())))
+        start = window_end
+    return windows
+
+
+class WindowWalk:
+    """Раскладка объявлений по окнам при одном проходе выдачи, отсортированной по дате.
+
+    Страницы идут от новых объявлений к старым, поэтому окна закрываются от позднего
+    к раннему: окно пройдено, когда на странице встретились объявления старше его начала.
+    Окна — [начало, конец) в секундах, метки объявлений — sortTimeStamp в миллисекундах.
+    """
+
+    def __init__(self, windows: list[tuple[int, int]]):
+        self.windows = sorted(windows)
+        self._starts = [start * 1000 for start, _ in self.windows]
+        self._open = len(self.windows)  # окна windows[:_open] еще не пройдены
+
+    @property
+    def newest_end(self) -> int:
+        """Конец самого позднего окна (мс): страницы новее него окнам не нужны."""
+        return self.windows[-1][1] * 1000
+
+    def window_of(self, stamp: int) -> tuple[int, int] | None:
+        """Непройденное окно, в которое попадает объявление с меткой stamp."""
+        index = bisect_right(self._starts, stamp, 0, self._open) - 1
+        if index < 0 or stamp >= self.windows[index][1] * 1000:
+            return None
+        return self.windows[index]
+
+    def reached(self, oldest: int) -> list[tuple[int, int]]:
+        """Обход дошел до объявлений с меткой oldest: окна, начало которых позже, пройдены."""
+        closed = self._open
+        while self._open and self._starts[self._open - 1] > oldest:
+            self._open -= 1
+        return self.windows[self._open:closed]
+
+    def remaining(self) -> list[tuple[int, int]]:
+        """Окна, до начала которых обход еще не дошел."""
+        return self.windows[:self._open]
+
+
+class BackfillStore:
+    """Завершенные окна догрузки по поисковым выдачам (sqlite), чтобы после перезапуска
+    повторять только незавершенные."""
+
+    def __init__(self, db_name: str = "backfill.db"):
+        self.db_name = db_name
+        self._lock = threading.Lock()
+        self._create_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_name, timeout=30)
+
+    def _create_table(self):
+        """Создает таблицу backfill_windows, если она не существует."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS backfill_windows (
+                    search_url TEXT NOT NULL,
+                    window_start INTEGER NOT NULL,
+                    window_end INTEGER NOT NULL,
+                    finished_at REAL NOT NULL,
+                    PRIMARY KEY (search_url, window_start, window_end)
+                )
+                """
+            )
+            conn.commit()
+
+    def finished(self, search_url: str) -> set[tuple[int, int]]:
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT window_start, window_end FROM backfill_windows WHERE search_url = ?",
+                (search_url,),
+            )
+            return {(start, end) for start, end in cursor.fetchall()}
+
+    def mark_finished(self, windows) -> None:
+        """Отмечает окна (search_url, начало, конец) завершенными."""
+        rows = [(url, start, end, time.time()) for url, start, end in windows]
+        if not rows:
+            return
+        with self._lock, self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT OR IGNORE INTO backfill_windows (search_url, window_start, window_end, finished_at) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            conn.commit()
+
+
+class BackfillTracker:
+    """Учет окон догрузки в пределах прохода.
+
+    Окно считается завершенным, когда его страницы выдачи пройдены и все найденные
+    в нем карточки обработаны. Отмечать завершенным его нужно только после
+    сохранения пачки с этими карточками: take_ready() отдает такие окна один раз.
+    """
+
+    def __init__(self, store: BackfillStore, windows: list[tuple[int, int]]):
+        self.store = store
+        self.windows = windows
+        self._pending: Counter = Counter()
+        self._window_of: dict[str, tuple] = {}
+        self._walked: set[tuple] = set()
+        self._incomplete: set[tuple] = set()
+        self._taken: set[tuple] = set()
+        self._lock = threading.Lock()
+
+    def found(self, key: tuple, url: str) -> None:
+        """Карточка url найдена в окне key (search_url, начало, конец)."""
+        with self._lock:
+            self._pending[key] += 1
+            self._window_of[url] = key
+
+    def walked(self, key: tuple) -> None:
+        """Все страницы выдачи окна пройдены."""
+        with self._lock:
+            self._walked.add(key)
+
+    def settle(self, url: str, ok: bool) -> None:
+        """Карточка обработана; ok=False — не получена, окно придется повторить."""
+        with self._lock:
+            key = self._window_of.pop(url, None)
+            if key is None:
+                return
+            self._pending[key] -= 1
+            if not ok:
+                self._incomplete.add(key)
+
+    def take_ready(self) -> list[tuple]:
+        with self._lock:
+            ready = [
+                key for key in self._walked - self._incomplete - self._taken
+                if self._pending[key] <= 0
+            ]
+            self._taken.update(ready)
+        return ready
+
+    def summary(self) -> str:
+        with self._lock:
+            return (
+                f"Догрузка: окон пройдено {len(self._walked)}, завершено {len(self._taken)}, "
+                f"с незагруженными карточками {len(self._incomplete)}"
+            )
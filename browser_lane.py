@@ -0,0 +1,109 @@
+import queue
+import threading
+
+from loguru import logger
+
+
+class BrowserLane:
+    """Медленная полоса: URL, которые не удалось получить по HTTP, открываются в браузере.
+
+    У каждого потока полосы свой WebDriver, поэтому долгие прокрутки не держат
+    _selenium_lock парсера и не останавливают HTTP-обход. Очередь ограничена: если
+    она заполнена, URL не ставится и остается необработанным до следующего прохода.
+    Готовые записи забираются основным циклом через drain() и попадают в общую пачку
+    вместе с итогами URL: (url, True) — обработан, (url, False) — браузер не справился.
+    """
+
+    def __init__(self, parser, workers: int = 1, max_queue: int = 50):
+        self.parser = parser
+        self._queue: queue.Queue[str | None] = queue.Queue(maxsize=max(1, max_queue))
+        self._results: list[dict] = []
+        self._settled: list[tuple[str, bool]] = []
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+        self.failed = 0
+        self._threads = [
+            threading.Thread(target=self._worker, daemon=True, name=f"browser-{i}")
+            for i in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, url: str) -> bool:
+        """Ставит URL в очередь браузера; False, если очередь заполнена."""
+        try:
+            self._queue.put_nowait(url)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def drain(self) -> tuple[list[dict], list[tuple[str, bool]]]:
+        """Забирает записи, готовые к сохранению, и итоги URL, обработанных с прошлого вызова."""
+        with self._lock:
+            results, self._results = self._results, []
+            settled, self._settled = self._settled, []
+        return results, settled
+
+    def pending(self) -> int:
+        return self._queue.unfinished_tasks
+
+    def _worker(self) -> None:
+        driver = None
+        try:
+            while True:
+                url = self._queue.get()
+                try:
+                    if url is None:
+                        return
+                    if self.parser._should_stop():
+                        self.parser._release_url(url)
+                        continue
+                    if driver is None:
+                        driver = self.parser._create_selenium_driver()
+                    result = (
+                        self.parser._browse_and_parse(driver, url, self.parser.cookies)
+                        if driver else None
+                    )
+                    if isinstance(result, dict):
+                        logger.info(f"Браузер получил {url}")
+                        with self._lock:
+                            self._results.append(result)
+                            self._settled.append((url, True))
+                    elif result:
+                        logger.debug(f"Браузер: {url} — {result.value}")
+                        self.parser._settle(url, result)
+                        with self._lock:
+                            self._settled.append((url, True))
+                    else:
+                        self.parser._release_url(url)
+                        with self._lock:
+                            self.failed += 1
+                            self._settled.append((url, False))
+                finally:
+                    self._queue.task_done()
+        finally:
+            if driver is not None:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+
+    def close(self) -> tuple[list[dict], list[tuple[str, bool]]]:
+        """Дожидается очереди (при остановке — только текущих URL) и возвращает остаток drain()."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        return self.drain()
+
+    def summary(self) -> str:
+        with self._lock:
+            return (
+                f"Браузерная полоса: поставлено {self.submitted}, не поместилось {self.rejected}, "
+                f"неудачных {self.failed}"
+            )
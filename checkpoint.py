@@ -0,0 +1,187 @@
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+
+
+class CheckpointStore:
+    """Контрольные точки прохода по urls_file (sqlite).
+
+    Для каждого файла хранится смещение (в байтах), до которого все URL обработаны,
+    и URL за этим смещением, обработанные раньше соседей, а также неудачные URL.
+    """
+
+    def __init__(self, db_name: str = "checkpoint.db"):
+        self.db_name = db_name
+        self._lock = threading.Lock()
+        self._create_tables()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_name, timeout=30)
+
+    def _create_tables(self):
+        """Создает таблицы checkpoint_state и checkpoint_urls, если они не существуют."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS checkpoint_state (
+                    source TEXT PRIMARY KEY,
+                    offset INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS checkpoint_urls (
+                    source TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    line_end INTEGER NOT NULL,
+                    PRIMARY KEY (source, url)
+                )
+                """
+            )
+            conn.commit()
+
+    def load(self, source: str) -> tuple[int, set[str], list[str]]:
+        """(смещение, уже обработанные URL за смещением, неудачные URL)."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT offset FROM checkpoint_state WHERE source = ?", (source,))
+            row = cursor.fetchone()
+            cursor.execute("SELECT url, status FROM checkpoint_urls WHERE source = ?", (source,))
+            rows = cursor.fetchall()
+        done = {url for url, status in rows if status == "done"}
+        failed = [url for url, status in rows if status == "failed"]
+        return (row[0] if row else 0), done, failed
+
+    def reset(self, source: str) -> None:
+        with self._lock, self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM checkpoint_state WHERE source = ?", (source,))
+            cursor.execute("DELETE FROM checkpoint_urls WHERE source = ?", (source,))
+            conn.commit()
+
+    def commit(self, source: str, offset: int, rows: list[tuple[str, str, int]]) -> None:
+        """Одной транзакцией записывает смещение и итоги URL (url, статус, конец строки).
+
+        Обработанные URL до смещения больше не нужны и удаляются; неудачные остаются
+        для повтора при возобновлении.
+        """
+        with self._lock, self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT OR REPLACE INTO checkpoint_urls (source, url, status, line_end) VALUES (?, ?, ?, ?)",
+                [(source, url, status, line_end) for url, status, line_end in rows],
+            )
+            cursor.execute(
+                """
+                INSERT INTO checkpoint_state (source, offset, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(source) DO UPDATE SET offset = excluded.offset, updated_at = excluded.updated_at
+                """,
+                (source, offset, time.time()),
+            )
+            cursor.execute(
+                "DELETE FROM checkpoint_urls WHERE source = ? AND status = 'done' AND line_end <= ?",
+                (source, offset),
+            )
+            conn.commit()
+
+
+class RunCheckpoint:
+    """Контрольная точка одного прохода по urls_file.
+
+    URL регистрируются в порядке файла вместе со смещением конца своей строки.
+    Смещение сдвигается только за непрерывный префикс URL, чьи итоги уже надежно
+    записаны: запись сохранена в пачке, либо сохранять нечего (отсеяна, снята), либо
+    URL не удалось обработать (он попадет в повтор). Поэтому после падения
+    возобновление не теряет ни одного URL и не скачивает обработанные заново.
+
+    Выдача из файла обработана, когда ее обход закончен (walked) и все найденные в
+    ней карточки получили итог; если какую-то карточку получить не удалось, выдача
+    целиком уходит в повтор.
+    """
+
+    def __init__(self, source: str, store: CheckpointStore, resume: bool = False):
+        self.source = source
+        self.store = store
+        self._lock = threading.Lock()
+        self._order: deque[str] = deque()
+        self._line_end: dict[str, int] = {}
+        self._settled: set[str] = set()
+        self._unwritten: dict[str, str] = {}
+        self._cards: Counter = Counter()  # выдача -> карточки без итога
+        self._listing_of: dict[str, str] = {}
+        self._walked: set[str] = set()
+        self._failed_listings: set[str] = set()
+        if resume:
+            self.offset, self.done, self.retry = store.load(source)
+        else:
+            store.reset(source)
+            self.offset, self.done, self.retry = 0, set(), []
+
+    def track(self, url: str, line_end: int) -> None:
+        """URL отдан в работу; line_end — смещение конца его строки в файле."""
+        with self._lock:
+            if url not in self._line_end:
+                self._order.append(url)
+                self._line_end[url] = line_end
+
+    def found(self, listing: str, url: str) -> None:
+        """Карточка url найдена обходом выдачи listing из файла."""
+        with self._lock:
+            if listing in self._line_end and url not in self._listing_of:
+                self._cards[listing] += 1
+                self._listing_of[url] = listing
+
+    def walked(self, listing: str, ok: bool) -> None:
+        """Обход выдачи закончен; ok=False — часть страниц не получена."""
+        with self._lock:
+            if not ok:
+                self._failed_listings.add(listing)
+            self._walked.add(listing)
+            self._settle_listing(listing)
+
+    def _settle_listing(self, listing: str) -> None:
+        if listing in self._walked and self._cards[listing] <= 0:
+            self._walked.discard(listing)
+            del self._cards[listing]
+            failed = listing in self._failed_listings
+            self._failed_listings.discard(listing)
+            self._mark(listing, "failed" if failed else "done")
+
+    def _mark(self, url: str, status: str) -> None:
+        if url in self._line_end:
+            self._settled.add(url)
+            self._unwritten[url] = status
+
+    def _settle(self, url: str, status: str) -> None:
+        with self._lock:
+            listing = self._listing_of.pop(url, None)
+            if listing is not None:
+                self._cards[listing] -= 1
+                if status == "failed":
+                    self._failed_listings.add(listing)
+                self._settle_listing(listing)
+            self._mark(url, status)
+
+    def finished(self, url: str) -> None:
+        """URL обработан, и сохранять по нему больше нечего (или его запись уже сохранена)."""
+        self._settle(url, "done")
+
+    def failed(self, url: str) -> None:
+        self._settle(url, "failed")
+
+    def commit(self) -> None:
+        """Сдвигает смещение и записывает итоги URL с прошлой контрольной точки."""
+        with self._lock:
+            rows = [(url, status, self._line_end[url]) for url, status in self._unwritten.items()]
+            self._unwritten.clear()
+            while self._order and self._order[0] in self._settled:
+                url = self._order.popleft()
+                self._settled.discard(url)
+                self.offset = max(self.offset, self._line_end.pop(url))
+            offset = self.offset
+        self.store.commit(self.source, offset, rows)
@@ -10,6 +10,19 @@ from pathlib import Path
 from loguru import logger
 from load_config import load_avito_config
 from parser_cls import AvitoParse
+from sharded_crawler import ShardedCrawler
+from worker_pool import IdentityWorkerPool
+
+
+def build_parser(config):
+    """Создает парсер в режиме, выбранном в конфигурации."""
+    if config.backfill:
+        return AvitoParse(config)
+    if config.processes > 1:
+        return ShardedCrawler(config, config.processes)
+    if config.worker_pool_mode:
+        return IdentityWorkerPool(config)
+    return AvitoParse(config)
 
 
 def main():
@@ -20,6 +33,18 @@ def main():
                        help='Run once and exit (don\'t loop)')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Enable verbose logging')
+    parser.add_argument('--async', dest='async_mode', action='store_true',
+                       help='Keep several requests in flight (curl_cffi AsyncSession)')
+    parser.add_argument('--workers', action='store_true',
+                       help='One worker thread per proxy_pool entry sharing one URL queue')
+    parser.add_argument('--processes', '-p', type=int, default=None,
+                       help='Split URLs into N shards, one worker process each')
+    parser.add_argument('--resume', action='store_true',
+                       help='Continue urls_file from the last checkpoint instead of starting over')
+    parser.add_argument('--backfill', action='store_true',
+                       help='Crawl start_date..end_date in day/hour windows, resuming unfinished ones')
+    parser.add_argument('--upgrade-details', metavar='FILE', default=None,
+                       help='Fetch item pages for URLs in FILE (items saved from listings only) and exit')
     
     args = parser.parse_args()
     
@@ -34,6 +59,16 @@ def main():
     try:
         config = load_avito_config(str(config_path))
         logger.info(f"Loaded configuration from: {config_path}")
+        if args.async_mode:
+            config.async_mode = True
+        if args.workers:
+            config.worker_pool_mode = True
+        if args.processes:
+            config.processes = args.processes
+        if args.backfill:
+            config.backfill = True
+        if args.resume:
+            config.resume = True
     except Exception as err:
         logger.error(f"Error loading config: {err}")
         exit(1)
@@ -49,10 +84,16 @@ def main():
     logger.info("  ✓ Configurable proxy/local IP switching")
     logger.info("=" * 40)
     
+    if args.upgrade_details:
+        logger.info(f"Fetching item pages for URLs from {args.upgrade_details}")
+        parser_instance = AvitoParse(config)
+        parser_instance.upgrade_to_detail(url for url, _ in parser_instance.iter_urls_file(args.upgrade_details))
+        return
+
     if args.once:
         logger.info("Running once and exiting...")
         try:
-            parser_instance = AvitoParse(config)
+            parser_instance = build_parser(config)
             parser_instance.parse()
             logger.info("Parsing completed successfully")
         except Exception as err:
@@ -62,7 +103,7 @@ def main():
         logger.info("Running in continuous mode. Press Ctrl+C to stop.")
         while True:
             try:
-                parser_instance = AvitoParse(config)
+                parser_instance = build_parser(config)
                 parser_instance.parse()
                 logger.info(f"Parsing completed. Sleeping for {config.pause_general} seconds")
                 time.sleep(config.pause_general)
@@ -1,3 +1,4 @@
+import json
 import sqlite3
 try:
     import psycopg2
@@ -11,6 +12,7 @@ from models import Item
 class SQLiteDBHandler:
     """Работа с БД sqlite"""
     _instance = None
+    MAX_QUERY_PARAMS = 900
 
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
@@ -24,7 +26,7 @@ class SQLiteDBHandler:
             self._initialized = True
 
     def _create_table(self):
-        """Создает таблицу viewed, если она не существует."""
+        """Создает таблицы viewed и records, если они не существуют."""
         with sqlite3.connect(self.db_name) as conn:
             cursor = conn.cursor()
             cursor.execute(
@@ -34,6 +36,40 @@ class SQLiteDBHandler:
                 )
                 """
             )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS records (
+                    id INTEGER PRIMARY KEY,
+                    is_detailed INTEGER NOT NULL,
+                    data TEXT NOT NULL
+                )
+                """
+            )
+            conn.commit()
+
+    def upsert_records(self, records: list[tuple[int, dict]]):
+        """Сохраняет записи вакансий (id, запись).
+
+        Запись только из выдачи (is_detailed_parsed = False) заменяется записью с карточки,
+        но сама запись с карточки записью из выдачи не затирается.
+        """
+        with sqlite3.connect(self.db_name) as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                """
+                INSERT INTO records (id, is_detailed, data) VALUES (?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET is_detailed = excluded.is_detailed, data = excluded.data
+                WHERE records.is_detailed = 0 OR excluded.is_detailed = 1
+                """,
+                [
+                    (
+                        record_id,
+                        int(bool(record.get('is_detailed_parsed'))),
+                        json.dumps(record, ensure_ascii=False, default=str),
+                    )
+                    for record_id, record in records
+                ],
+            )
             conn.commit()
 
     def add_record(self, ad: Item):
@@ -72,6 +108,45 @@ class SQLiteDBHandler:
             )
             return cursor.fetchone() is not None
 
+    def add_ids(self, ids: list[int]):
+        """Добавляет несколько id в таблицу viewed."""
+        with sqlite3.connect(self.db_name) as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT OR IGNORE INTO viewed (id) VALUES (?)",
+                [(record_id,) for record_id in ids],
+            )
+            conn.commit()
+
+    def existing_ids(self, ids: list[int]) -> set[int]:
+        """Возвращает те id из списка, что уже есть в viewed (одно соединение на всю пачку)."""
+        found: set[int] = set()
+        if not ids:
+            return found
+        with sqlite3.connect(self.db_name) as conn:
+            cursor = conn.cursor()
+            # sqlite ограничивает число параметров в запросе
+            for start in range(0, len(ids), self.MAX_QUERY_PARAMS):
+                chunk = ids[start:start + self.MAX_QUERY_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(
+                    f"SELECT id FROM viewed WHERE id IN ({placeholders})",
+                    chunk,
+                )
+                found.update(row[0] for row in cursor.fetchall())
+        return found
+
+    def iter_ids(self, batch_size: int = 10_000):
+        """Постранично отдает все id из viewed, не загружая таблицу в память целиком."""
+        with sqlite3.connect(self.db_name) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM viewed")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [row[0] for row in rows]
+
 
 class PostgreSQLDBHandler:
     """Работа с БД PostgreSQL"""
@@ -91,7 +166,7 @@ class PostgreSQLDBHandler:
             self._initialized = True
 
     def _create_table(self):
-        """Создает таблицу viewed, если она не существует."""
+        """Создает таблицы viewed и records, если они не существуют."""
         with psycopg2.connect(self.connection_string) as conn:
             cursor = conn.cursor()
             cursor.execute(
@@ -101,6 +176,36 @@ class PostgreSQLDBHandler:
                 )
                 """
             )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS records (
+                    id BIGINT PRIMARY KEY,
+                    is_detailed BOOLEAN NOT NULL,
+                    data JSONB NOT NULL
+                )
+                """
+            )
+            conn.commit()
+
+    def upsert_records(self, records: list[tuple[int, dict]]):
+        """Сохраняет записи вакансий (id, запись); запись с карточки не затирается записью из выдачи."""
+        with psycopg2.connect(self.connection_string) as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                """
+                INSERT INTO records (id, is_detailed, data) VALUES (%s, %s, %s)
+                ON CONFLICT (id) DO UPDATE SET is_detailed = EXCLUDED.is_detailed, data = EXCLUDED.data
+                WHERE records.is_detailed = FALSE OR EXCLUDED.is_detailed
+                """,
+                [
+                    (
+                        record_id,
+                        bool(record.get('is_detailed_parsed')),
+                        json.dumps(record, ensure_ascii=False, default=str),
+                    )
+                    for record_id, record in records
+                ],
+            )
             conn.commit()
 
     def add_record(self, ad: Item):
@@ -136,3 +241,101 @@ class PostgreSQLDBHandler:
                 (record_id,),
             )
             return cursor.fetchone() is not None
+
+    def add_ids(self, ids: list[int]):
+        """Добавляет несколько id в таблицу viewed."""
+        with psycopg2.connect(self.connection_string) as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT INTO viewed (id) VALUES (%s) ON CONFLICT (id) DO NOTHING",
+                [(record_id,) for record_id in ids],
+            )
+            conn.commit()
+
+    def existing_ids(self, ids: list[int]) -> set[int]:
+        """Возвращает те id из списка, что уже есть в viewed (один запрос на всю пачку)."""
+        if not ids:
+            return set()
+        with psycopg2.connect(self.connection_string) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id FROM viewed WHERE id = ANY(%s)",
+                (list(ids),),
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    def iter_ids(self, batch_size: int = 10_000):
+        """Постранично отдает все id из viewed через серверный курсор."""
+        with psycopg2.connect(self.connection_string) as conn:
+            cursor = conn.cursor(name="viewed_ids")
+            cursor.itersize = batch_size
+            cursor.execute("SELECT id FROM viewed")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [row[0] for row in rows]
+
+
+class SeenIdStore:
+    """Общее для нескольких процессов хранилище id вакансий, взятых в работу (sqlite).
+
+    Отметки действуют в пределах одного запуска (run_id): отметка прошлого запуска,
+    не снятая из-за падения процесса, не мешает взять id в работу снова.
+    """
+
+    def __init__(self, db_name="seen_ids.db", run_id: str = ""):
+        self.db_name = db_name
+        self.run_id = run_id
+        self._create_table()
+
+    def _connect(self):
+        # ждем блокировку записи, пока ее держит соседний процесс
+        return sqlite3.connect(self.db_name, timeout=30)
+
+    def _create_table(self):
+        """Создает таблицу claims, если она не существует."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS claims (
+                    id INTEGER PRIMARY KEY,
+                    run_id TEXT NOT NULL
+                )
+                """
+            )
+            conn.commit()
+
+    def claim(self, record_id) -> bool:
+        """Атомарно отмечает id; True, если в этом запуске его еще не взял ни один процесс."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO claims (id, run_id) VALUES (?, ?)
+                ON CONFLICT(id) DO UPDATE SET run_id = excluded.run_id
+                WHERE claims.run_id != excluded.run_id
+                """,
+                (record_id, self.run_id),
+            )
+            conn.commit()
+            return cursor.rowcount == 1
+
+    def release(self, record_id):
+        """Снимает отметку, чтобы id можно было взять в работу повторно."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM claims WHERE id = ? AND run_id = ?",
+                (record_id, self.run_id),
+            )
+            conn.commit()
+
+    def prune(self):
+        """Удаляет отметки прошлых запусков."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM claims WHERE run_id != ?", (self.run_id,))
+            conn.commit()
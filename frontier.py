@@ -0,0 +1,350 @@
+import os
+import socket
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from itertools import islice
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+from dto import AvitoConfig
+
+
+def default_node_id() -> str:
+    """Имя узла по умолчанию: хост и pid процесса."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class FrontierBackend(ABC):
+    """Общая очередь URL (frontier) для нескольких узлов.
+
+    URL выдается узлу в аренду (lease) на lease_seconds. Узел подтверждает его (ack)
+    после сохранения результата или возвращает (nack). Если узел умер и не подтвердил
+    аренду, по истечении срока URL снова выдается другим узлам.
+
+    Повторы отсеиваются только среди ожидающих и арендованных URL: подтвержденный
+    или неудачный URL при следующем push снова встает в очередь (повторный обход
+    выдачи, перепроверка вакансии).
+    """
+
+    # push принимает ленивый поток URL и пишет его порциями: блокировка хранилища
+    # держится одну короткую операцию на порцию, а не все время чтения источника
+    PUSH_CHUNK = 1000
+
+    @abstractmethod
+    def push(self, urls) -> int:
+        """Ставит в очередь URL, которых нет среди ожидающих и арендованных; возвращает их число."""
+
+    def _chunks(self, urls):
+        urls = iter(urls)
+        while chunk := list(islice(urls, self.PUSH_CHUNK)):
+            yield chunk
+
+    @abstractmethod
+    def lease(self, count: int, lease_seconds: int) -> list[str]:
+        """Выдает до count URL в аренду текущему узлу."""
+
+    @abstractmethod
+    def ack(self, urls: list[str]) -> None:
+        """Подтверждает, что URL обработаны."""
+
+    @abstractmethod
+    def nack(self, url: str, max_attempts: int) -> None:
+        """Возвращает URL в очередь; после max_attempts выдач помечает его неудачным."""
+
+    @abstractmethod
+    def release(self, urls: list[str]) -> None:
+        """Возвращает неначатые URL в очередь без учета попытки (например, при остановке)."""
+
+    @abstractmethod
+    def pending_count(self) -> int:
+        """Сколько URL еще ждут обработки или находятся в аренде."""
+
+
+class SQLiteFrontier(FrontierBackend):
+    """Очередь URL в sqlite-файле: для нескольких процессов на одной машине."""
+
+    def __init__(self, db_name: str = "frontier.db", node_id: str | None = None):
+        self.db_name = db_name
+        self.node_id = node_id or default_node_id()
+        self._create_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_name, timeout=30, isolation_level=None)
+
+    def _create_table(self):
+        """Создает таблицу frontier, если она не существует."""
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS frontier (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT UNIQUE NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    node TEXT,
+                    lease_until REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS frontier_status ON frontier (status, seq)")
+        finally:
+            conn.close()
+
+    def push(self, urls) -> int:
+        conn = self._connect()
+        try:
+            before = conn.total_changes
+            for chunk in self._chunks(urls):
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    """
+                    INSERT INTO frontier (url) VALUES (?)
+                    ON CONFLICT(url) DO UPDATE SET status = 'pending', node = NULL, lease_until = NULL, attempts = 0
+                    WHERE frontier.status IN ('done', 'failed')
+                    """,
+                    ((url,) for url in chunk),
+                )
+                conn.execute("COMMIT")
+            return conn.total_changes - before
+        finally:
+            conn.close()
+
+    def lease(self, count: int, lease_seconds: int) -> list[str]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE сразу берет блокировку записи: два узла не получат один URL
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE frontier SET status = 'pending', node = NULL "
+                "WHERE status = 'leased' AND lease_until < ?",
+                (now,),
+            )
+            rows = conn.execute(
+                "SELECT seq, url FROM frontier WHERE status = 'pending' ORDER BY seq LIMIT ?",
+                (count,),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE frontier SET status = 'leased', node = ?, lease_until = ?, "
+                "attempts = attempts + 1 WHERE seq = ?",
+                ((self.node_id, now + lease_seconds, seq) for seq, _ in rows),
+            )
+            conn.execute("COMMIT")
+            return [url for _, url in rows]
+        finally:
+            conn.close()
+
+    def ack(self, urls: list[str]) -> None:
+        if not urls:
+            return
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "UPDATE frontier SET status = 'done', lease_until = NULL WHERE url = ?",
+                ((url,) for url in urls),
+            )
+        finally:
+            conn.close()
+
+    def nack(self, url: str, max_attempts: int) -> None:
+        conn = self._connect()
+        try:
+            # аренда могла истечь и перейти к другому узлу: чужую аренду не трогаем
+            conn.execute(
+                "UPDATE frontier SET node = NULL, lease_until = NULL, "
+                "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END "
+                "WHERE url = ? AND status = 'leased' AND node = ?",
+                (max_attempts, url, self.node_id),
+            )
+        finally:
+            conn.close()
+
+    def release(self, urls: list[str]) -> None:
+        if not urls:
+            return
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "UPDATE frontier SET status = 'pending', node = NULL, lease_until = NULL, "
+                "attempts = MAX(attempts - 1, 0) WHERE url = ? AND status = 'leased' AND node = ?",
+                ((url, self.node_id) for url in urls),
+            )
+        finally:
+            conn.close()
+
+    def pending_count(self) -> int:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM frontier WHERE status IN ('pending', 'leased')"
+            ).fetchone()
+            return row[0]
+        finally:
+            conn.close()
+
+
+class RedisFrontier(FrontierBackend):
+    """Очередь URL поверх протокола Redis: для нескольких машин.
+
+    Работает с любым сервером, понимающим протокол Redis (включая EVAL), либо с
+    переданным готовым клиентом — например, локальной заглушкой для отладки.
+    Владелец каждой аренды хранится в owners: nack и release возвращают в очередь
+    только URL, которые все еще арендованы этим узлом.
+    """
+
+    # выдача в аренду и возврат просроченных аренд выполняются атомарно на сервере
+    LEASE_SCRIPT = """
+    local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+    for _, url in ipairs(expired) do
+        redis.call('ZREM', KEYS[2], url)
+        redis.call('HDEL', KEYS[4], url)
+        redis.call('RPUSH', KEYS[1], url)
+    end
+    local leased = {}
+    for i = 1, tonumber(ARGV[3]) do
+        local url = redis.call('LPOP', KEYS[1])
+        if not url then break end
+        redis.call('ZADD', KEYS[2], ARGV[2], url)
+        redis.call('HINCRBY', KEYS[3], url, 1)
+        redis.call('HSET', KEYS[4], url, ARGV[4])
+        table.insert(leased, url)
+    end
+    return leased
+    """
+    # queued — множество ожидающих и арендованных URL: по нему отсеиваются повторы
+    PUSH_SCRIPT = """
+    local added = 0
+    for _, url in ipairs(ARGV) do
+        if redis.call('SADD', KEYS[2], url) == 1 then
+            redis.call('RPUSH', KEYS[1], url)
+            added = added + 1
+        end
+    end
+    return added
+    """
+    # возврат URL в очередь или перевод в неудачные по числу выдач — одной операцией,
+    # чтобы параллельный lease не увидел промежуточное состояние; URL, чья аренда уже
+    # истекла и вернулась в очередь или перешла к другому узлу, не трогается
+    NACK_SCRIPT = """
+    if redis.call('HGET', KEYS[6], ARGV[1]) ~= ARGV[3] then
+        return 0
+    end
+    if redis.call('ZREM', KEYS[2], ARGV[1]) == 0 then
+        return 0
+    end
+    redis.call('HDEL', KEYS[6], ARGV[1])
+    local attempts = tonumber(redis.call('HGET', KEYS[3], ARGV[1]) or '0')
+    if attempts >= tonumber(ARGV[2]) then
+        redis.call('HDEL', KEYS[3], ARGV[1])
+        redis.call('SREM', KEYS[4], ARGV[1])
+        redis.call('SADD', KEYS[5], ARGV[1])
+    else
+        redis.call('RPUSH', KEYS[1], ARGV[1])
+    end
+    return 1
+    """
+    # возврат неначатых URL в начало очереди без учета попытки — с той же проверкой аренды
+    RELEASE_SCRIPT = """
+    local released = 0
+    for i = 2, #ARGV do
+        local url = ARGV[i]
+        if redis.call('HGET', KEYS[4], url) == ARGV[1] and redis.call('ZREM', KEYS[2], url) == 1 then
+            redis.call('HDEL', KEYS[4], url)
+            redis.call('LPUSH', KEYS[1], url)
+            redis.call('HINCRBY', KEYS[3], url, -1)
+            released = released + 1
+        end
+    end
+    return released
+    """
+
+    def __init__(
+        self, url: str | None = None, prefix: str = "avito:frontier", client=None, node_id: str | None = None
+    ):
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise ImportError("redis не установлен. Установите его: pip install redis")
+            client = redis.Redis.from_url(url or "redis://localhost:6379/0", decode_responses=True)
+        self.client = client
+        self.node_id = node_id or default_node_id()
+        self.pending_key = f"{prefix}:pending"
+        self.leased_key = f"{prefix}:leased"
+        self.attempts_key = f"{prefix}:attempts"
+        self.queued_key = f"{prefix}:queued"
+        self.failed_key = f"{prefix}:failed"
+        self.owners_key = f"{prefix}:owners"
+        self._lease_script = self.client.register_script(self.LEASE_SCRIPT)
+        self._push_script = self.client.register_script(self.PUSH_SCRIPT)
+        self._nack_script = self.client.register_script(self.NACK_SCRIPT)
+        self._release_script = self.client.register_script(self.RELEASE_SCRIPT)
+
+    @staticmethod
+    def _decode(value) -> str:
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def push(self, urls) -> int:
+        return sum(
+            int(self._push_script(keys=[self.pending_key, self.queued_key], args=chunk))
+            for chunk in self._chunks(urls)
+        )
+
+    def lease(self, count: int, lease_seconds: int) -> list[str]:
+        now = time.time()
+        leased = self._lease_script(
+            keys=[self.pending_key, self.leased_key, self.attempts_key, self.owners_key],
+            args=[now, now + lease_seconds, count, self.node_id],
+        )
+        return [self._decode(url) for url in leased or []]
+
+    def ack(self, urls: list[str]) -> None:
+        if not urls:
+            return
+        pipe = self.client.pipeline()
+        pipe.zrem(self.leased_key, *urls)
+        pipe.hdel(self.attempts_key, *urls)
+        pipe.srem(self.queued_key, *urls)
+        pipe.hdel(self.owners_key, *urls)
+        pipe.execute()
+
+    def nack(self, url: str, max_attempts: int) -> None:
+        self._nack_script(
+            keys=[
+                self.pending_key, self.leased_key, self.attempts_key,
+                self.queued_key, self.failed_key, self.owners_key,
+            ],
+            args=[url, max_attempts, self.node_id],
+        )
+
+    def release(self, urls: list[str]) -> None:
+        if not urls:
+            return
+        self._release_script(
+            keys=[self.pending_key, self.leased_key, self.attempts_key, self.owners_key],
+            args=[self.node_id, *urls],
+        )
+
+    def pending_count(self) -> int:
+        pipe = self.client.pipeline()
+        pipe.llen(self.pending_key)
+        pipe.zcard(self.leased_key)
+        pending, leased = pipe.execute()
+        return int(pending) + int(leased)
+
+
+def create_frontier(config: AvitoConfig) -> FrontierBackend | None:
+    """Создает backend очереди URL по настройкам конфигурации."""
+    backend = (config.frontier_backend or "").lower()
+    if not backend:
+        return None
+    if backend == "sqlite":
+        return SQLiteFrontier(config.frontier_url or "frontier.db", config.node_id)
+    if backend == "redis":
+        return RedisFrontier(config.frontier_url, node_id=config.node_id)
+    raise ValueError(f"Неизвестный frontier_backend: {config.frontier_backend}")
@@ -0,0 +1,146 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+class HttpCache:
+    """Кэш для условных запросов: ETag, Last-Modified и хэш содержимого по URL (sqlite).
+
+    Тело страницы не хранится — только валидаторы и хэш, чтобы понять, что страница
+    не изменилась (304 или байт-в-байт тот же ответ), и не разбирать ее повторно.
+
+    Валидаторы нового ответа сначала только запоминаются (check) и попадают в кэш
+    через commit, когда результат страницы сохранен. Иначе страница, которую не
+    удалось разобрать или сохранить, в следующем проходе сочлась бы неизменившейся
+    и больше никогда не разбиралась.
+    """
+
+    def __init__(self, db_name: str = "http_cache.db"):
+        self.db_name = db_name
+        self._lock = threading.Lock()
+        self._pending: dict[str, tuple[str | None, str | None, str, int]] = {}
+        self._create_table()
+        self.reset_stats()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_name, timeout=30)
+
+    def _create_table(self):
+        """Создает таблицу http_cache, если она не существует."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_hash TEXT NOT NULL,
+                    content_length INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.commit()
+
+    def reset_stats(self) -> None:
+        """Обнуляет счетчики и незаписанные валидаторы перед новым проходом."""
+        with self._lock:
+            self._pending.clear()
+            self.stats = {
+                "not_modified": 0,
+                "identical": 0,
+                "changed": 0,
+                "bytes_downloaded": 0,
+                "bytes_saved": 0,
+            }
+
+    def _lookup(self, url: str):
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT etag, last_modified, content_hash, content_length FROM http_cache WHERE url = ?",
+                (url,),
+            )
+            return cursor.fetchone()
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        """Заголовки If-None-Match / If-Modified-Since для ранее скачанного URL."""
+        row = self._lookup(url)
+        if not row:
+            return {}
+        etag, last_modified, _, _ = row
+        headers = {}
+        if etag:
+            headers["if-none-match"] = etag
+        if last_modified:
+            headers["if-modified-since"] = last_modified
+        return headers
+
+    def record_not_modified(self, url: str, received_bytes: int = 0) -> None:
+        """Учитывает ответ 304: страница не скачивалась повторно."""
+        row = self._lookup(url)
+        saved = max(0, row[3] - received_bytes) if row else 0
+        with self._lock:
+            self.stats["not_modified"] += 1
+            self.stats["bytes_downloaded"] += received_bytes
+            self.stats["bytes_saved"] += saved
+
+    def check(self, url: str, etag: str | None, last_modified: str | None, content: bytes) -> bool:
+        """Сверяет ответ с кэшем; True, если содержимое не изменилось.
+
+        Валидаторы изменившейся страницы запоминаются до commit или discard.
+        """
+        content_hash = hashlib.sha1(content).hexdigest()
+        row = self._lookup(url)
+        unchanged = bool(row) and row[2] == content_hash
+        with self._lock:
+            if not unchanged:
+                self._pending[url] = (etag, last_modified, content_hash, len(content))
+            self.stats["identical" if unchanged else "changed"] += 1
+            self.stats["bytes_downloaded"] += len(content)
+        return unchanged
+
+    def commit(self, urls) -> None:
+        """Записывает запомненные валидаторы страниц, чьи результаты сохранены (одной транзакцией)."""
+        now = time.time()
+        with self._lock:
+            rows = [(url, *self._pending.pop(url), now) for url in urls if url in self._pending]
+        if not rows:
+            return
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                """
+                INSERT INTO http_cache (url, etag, last_modified, content_hash, content_length, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    content_hash = excluded.content_hash,
+                    content_length = excluded.content_length,
+                    updated_at = excluded.updated_at
+                """,
+                rows,
+            )
+            conn.commit()
+
+    def discard(self, url: str) -> None:
+        """Забывает валидаторы страницы, результат которой не сохранится (ошибка, отсеяна)."""
+        with self._lock:
+            self._pending.pop(url, None)
+
+    def summary(self) -> str:
+        """Строка отчета о попаданиях в кэш за проход."""
+        with self._lock:
+            stats = dict(self.stats)
+        total = stats["not_modified"] + stats["identical"] + stats["changed"]
+        hits = stats["not_modified"] + stats["identical"]
+        hit_rate = hits / total if total else 0.0
+        return (
+            f"HTTP-кэш: попаданий {hits}/{total} ({hit_rate:.0%}), "
+            f"304: {stats['not_modified']}, без изменений: {stats['identical']}, "
+            f"скачано {stats['bytes_downloaded'] / 1024 / 1024:.1f} МБ, "
+            f"сэкономлено {stats['bytes_saved'] / 1024 / 1024:.1f} МБ"
+        )
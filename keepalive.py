@@ -0,0 +1,108 @@
+import random
+import threading
+import time
+from collections import deque
+
+from curl_cffi import requests
+from loguru import logger
+
+
+class KeepaliveScheduler:
+    """Фоновые визиты на общие страницы Авито для одной идентичности.
+
+    Визит делается отдельной сессией в отдельном потоке и только в паузе между
+    рабочими запросами (когда у парсера нет запросов в полёте), поэтому рабочий
+    запрос никогда не ждет окончания визита. Трафик визитов ограничен своим
+    бюджетом в байтах за минуту.
+    """
+
+    TICK = 1.0
+    MAX_INTERVAL = 120  # не реже, чем раз в столько секунд, пока идет обход
+    BUDGET_WINDOW = 60
+
+    def __init__(self, parser, budget_bytes_per_minute: int = 2 * 1024 * 1024):
+        self.parser = parser
+        self.budget = budget_bytes_per_minute
+        self._session: requests.Session | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._requests_since_visit = 0
+        self._last_visit_ts = time.time()
+        self._spent: deque[tuple[float, int]] = deque()  # (время, байт) визитов в окне бюджета
+        self.visits = 0
+        self.skipped_over_budget = 0
+
+    def note_request(self) -> None:
+        """Учитывает рабочий запрос; при первом вызове запускает фоновый поток."""
+        with self._lock:
+            self._requests_since_visit += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, daemon=True, name="keepalive")
+                self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=15)
+        self._thread = None
+        if self._session is not None:
+            try:
+                self._session.close()
+            except Exception:
+                pass
+            self._session = None
+
+    def _due(self) -> bool:
+        with self._lock:
+            return (
+                self._requests_since_visit >= self.parser.KEEPALIVE_INTERVAL
+                or time.time() - self._last_visit_ts > self.MAX_INTERVAL
+            )
+
+    def _idle(self) -> bool:
+        """Пауза между рабочими запросами: ни один не в полёте."""
+        return self.parser._in_flight == 0
+
+    def _within_budget(self) -> bool:
+        now = time.monotonic()
+        while self._spent and now - self._spent[0][0] > self.BUDGET_WINDOW:
+            self._spent.popleft()
+        return sum(size for _, size in self._spent) < self.budget
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.TICK):
+            if self.parser._should_stop():
+                return
+            if not self._due() or not self._idle():
+                continue
+            with self._lock:
+                self._requests_since_visit = 0
+                self._last_visit_ts = time.time()
+            if not self._within_budget():
+                self.skipped_over_budget += 1
+                continue
+            self._visit()
+
+    def _visit(self) -> None:
+        parser = self.parser
+        if self._session is None:
+            self._session = requests.Session()
+        keep_url = random.choice(parser.REFERER_POOL)
+        try:
+            response = self._session.get(
+                url=parser._decorate_url(keep_url),
+                headers=dict(parser.headers),
+                proxies=parser._build_proxies(),
+                cookies=parser.cookies,
+                impersonate="chrome",
+                timeout=10,
+                verify=False,
+                http_version=parser._proxy_http_version,
+                allow_redirects=True,
+            )
+            self._spent.append((time.monotonic(), len(response.content or b"")))
+            self.visits += 1
+        except Exception as exc:
+            logger.debug(f"Фоновый визит на {keep_url} не удался: {exc}")
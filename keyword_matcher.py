@@ -0,0 +1,82 @@
+from collections import deque
+from functools import lru_cache
+
+
+def normalize_text(text: str) -> str:
+    """Приводит текст к виду для сравнения: casefold и «ё» как «е»."""
+    return text.casefold().replace("ё", "е")
+
+
+class KeywordMatcher:
+    """Автомат Ахо — Корасик по списку ключевых слов.
+
+    Все слова ищутся за один проход по тексту, независимо от их числа. Сравнение
+    без учета регистра (casefold работает и для кириллицы), «ё» и «е» не различаются.
+    """
+
+    def __init__(self, keywords):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # для каждого состояния — исходное слово, которое в нем заканчивается (самое длинное)
+        self._output: list[str | None] = [None]
+        self.keywords: list[str] = []
+        for keyword in keywords:
+            self._add(keyword)
+        self._build_links()
+
+    def _add(self, keyword: str) -> None:
+        pattern = normalize_text(keyword.strip())
+        if not pattern:
+            return
+        self.keywords.append(keyword)
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+            state = next_state
+        if self._output[state] is None:
+            self._output[state] = keyword
+
+    def _build_links(self) -> None:
+        """Суффиксные ссылки обходом в ширину; выход состояния наследует выход по ссылке."""
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, child in self._goto[state].items():
+                pending.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                link = self._goto[fallback].get(char, 0)
+                self._fail[child] = link if link != child else 0
+                if self._output[child] is None:
+                    self._output[child] = self._output[self._fail[child]]
+
+    def __bool__(self) -> bool:
+        return bool(self.keywords)
+
+    def find(self, *texts: str | None) -> str | None:
+        """Первое ключевое слово, встретившееся в любом из текстов, или None."""
+        goto, fail, output = self._goto, self._fail, self._output
+        for text in texts:
+            if not text:
+                continue
+            state = 0
+            for char in normalize_text(text):
+                while state and char not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(char, 0)
+                if output[state] is not None:
+                    return output[state]
+        return None
+
+
+@lru_cache(maxsize=8)
+def compile_keywords(keywords: tuple[str, ...]) -> KeywordMatcher:
+    """Компилирует список один раз на процесс: парсеры с одним конфигом делят автомат."""
+    return KeywordMatcher(keywords)
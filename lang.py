@@ -10,7 +10,8 @@ KEYWORD_BLACK_INPUT_HELP = "Если в названии или описании
 COUNT_PAGE_HELP = "Сколько страниц обрабатывать для каждой ссылки? Если Вам нужно получать только новые " \
                   "объявления - ставьте 1"
 PAUSE_GENERAL_HELP = "Пауза в секундах между повторной проверкой. Парсер будет ждать только после обработки всех ссылок"
-PAUSE_BETWEEN_LINKS_HELP = "Пауза в секундах между проверкой каждой ссылки"
+PAUSE_BETWEEN_LINKS_HELP = "Максимальная пауза в секундах между запросами. Реальную паузу подбирает " \
+                           "адаптивный лимитер скорости для каждого прокси"
 MAX_AGE_HELP = "Максимально допустимый возраст объявления (в секундах). Всё, что не укладывается в эти секунды " \
                "будет просто проигнорировано. Вполне нормально поставить 600 секунд (это 10 минут если что). " \
                "Если оставить пустое значение или 0 - возраст вообще не будет учитываться"
@@ -0,0 +1,163 @@
+import re
+import threading
+import time
+from collections import Counter
+from typing import Callable
+
+from loguru import logger
+
+from dto import AvitoConfig
+from keyword_matcher import compile_keywords
+from models import Item
+
+_SELLER_SLUG_RE = re.compile(r"/brands/([^/?#]+)")
+
+
+def _seller_keys(item: Item) -> set[str]:
+    """Идентификаторы продавца, по которым сверяется seller_black_list: id и slug страницы."""
+    keys = {item.sellerId} if item.sellerId else set()
+    if item.userLogo and item.userLogo.link:
+        match = _SELLER_SLUG_RE.search(item.userLogo.link)
+        if match:
+            keys.add(match.group(1))
+    return keys
+
+
+def _location_text(item: Item) -> str:
+    parts = [
+        item.location.name if item.location else None,
+        item.addressDetailed.locationName if item.addressDetailed else None,
+        item.geo.formattedAddress if item.geo else None,
+    ]
+    return " ".join(part for part in parts if part).casefold()
+
+
+class ListingFilter:
+    """Фильтры конфига, собранные один раз в список проверок объявления из выдачи.
+
+    Проверки выполняются до постановки карточки в очередь, поэтому каждое отсеянное
+    объявление — это несделанный запрос. Выключенные в конфиге фильтры в список не
+    попадают. Счетчики показывают, сколько объявлений отсеял каждый фильтр.
+
+    Черный список ключевых слов проверяется и по сниппету выдачи, и по записи с
+    карточки. Белый список по сниппету проверяется только без детального парсинга:
+    иначе нужное слово может найтись в полном описании, которого в выдаче нет.
+    """
+
+    def __init__(self, config: AvitoConfig):
+        self._checks: list[tuple[str, Callable[[Item], bool]]] = []
+        self._lock = threading.Lock()
+        self.rejected: Counter[str] = Counter()
+        self.matched_keywords: Counter[str] = Counter()
+        self.passed = 0
+        self._compile(config)
+
+    def _compile(self, config: AvitoConfig) -> None:
+        min_price, max_price = config.min_price, config.max_price
+        if min_price > 0 or max_price < AvitoConfig.max_price:
+            def price_rejects(item: Item) -> bool:
+                price = item.priceDetailed
+                # объявления без цены (зарплата не указана) не отсекаем
+                return bool(price and price.hasValue) and not min_price <= price.value <= max_price
+            self._checks.append(("price", price_rejects))
+
+        if config.geo:
+            geo = config.geo.casefold()
+            self._checks.append(("geo", lambda item: geo not in _location_text(item)))
+
+        if config.max_age > 0:
+            max_age_ms = config.max_age * 1000
+            self._checks.append((
+                "max_age",
+                lambda item: bool(item.sortTimeStamp) and time.time() * 1000 - item.sortTimeStamp > max_age_ms,
+            ))
+
+        if config.seller_black_list:
+            black_list = {str(seller) for seller in config.seller_black_list}
+            self._checks.append(("seller", lambda item: not black_list.isdisjoint(_seller_keys(item))))
+
+        self.white_list = compile_keywords(tuple(config.keys_word_white_list))
+        self.black_list = compile_keywords(tuple(config.keys_word_black_list))
+        if self.black_list:
+            self._checks.append(("black_list", lambda item: bool(self._black_listed(item.title, item.description))))
+        if self.white_list and not config.enable_detailed_parsing:
+            self._checks.append(("white_list", lambda item: not self._white_listed(item.title, item.description)))
+
+        if config.ignore_reserv:
+            self._checks.append(("reserved", lambda item: bool(item.isReserved)))
+
+        if config.ignore_promotion:
+            self._checks.append(("promotion", lambda item: item.isPromotion))
+
+    def __bool__(self) -> bool:
+        return bool(self._checks)
+
+    @property
+    def checks_records(self) -> bool:
+        return bool(self.white_list or self.black_list)
+
+    def reject_reason(self, item: Item) -> str | None:
+        """Имя первого отсеявшего объявление фильтра или None, если оно подходит."""
+        for name, rejects in self._checks:
+            if rejects(item):
+                with self._lock:
+                    self.rejected[name] += 1
+                return name
+        with self._lock:
+            self.passed += 1
+        return None
+
+    def _black_listed(self, *texts: str | None) -> str | None:
+        """Слово из черного списка, найденное в текстах, или None."""
+        keyword = self.black_list.find(*texts)
+        if keyword is not None:
+            with self._lock:
+                self.matched_keywords[keyword] += 1
+            logger.debug(f"Черный список: найдено «{keyword}»")
+        return keyword
+
+    def _white_listed(self, *texts: str | None) -> bool:
+        keyword = self.white_list.find(*texts)
+        if keyword is None:
+            return False
+        with self._lock:
+            self.matched_keywords[keyword] += 1
+        return True
+
+    def record_reject_reason(self, record: dict) -> str | None:
+        """Проверка ключевых слов по записи с карточки (название и полное описание).
+
+        Возвращает причину отсева вместе с найденным словом черного списка или None.
+        """
+        texts = (record.get('vacancy_name'), record.get('description'))
+        keyword = self._black_listed(*texts) if self.black_list else None
+        if keyword is not None:
+            name, reason = "black_list", f"black_list («{keyword}»)"
+        elif self.white_list and not self._white_listed(*texts):
+            name = reason = "white_list"
+        else:
+            return None
+        with self._lock:
+            self.rejected[name] += 1
+        return reason
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.rejected.clear()
+            self.matched_keywords.clear()
+            self.passed = 0
+
+    def summary(self) -> str:
+        """Строка отчета: сколько запросов сэкономил каждый фильтр за проход."""
+        with self._lock:
+            rejected = dict(self.rejected)
+            passed = self.passed
+            keywords = self.matched_keywords.most_common(5)
+        details = ", ".join(f"{name}: {count}" for name, count in sorted(rejected.items(), key=lambda kv: -kv[1]))
+        summary = (
+            f"Фильтры выдачи: прошло {passed}, отсеяно {sum(rejected.values())}"
+            + (f" ({details})" if details else "")
+        )
+        if keywords:
+            summary += "; чаще всего совпадали: " + ", ".join(f"«{word}» {count}" for word, count in keywords)
+        return summary
@@ -0,0 +1,52 @@
+import math
+import re
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from lxml import etree
+
+AVITO_BASE_URL = "https://www.avito.ru/"
+ITEMS_PER_PAGE = 50
+SORT_BY_DATE = "104"  # значение параметра s: сначала новые
+
+_PAGE_MARKER_RE = re.compile(r'data-marker="pagination-button/page\((\d+)\)"')
+_PAGE_HREF_RE = re.compile(r'href="[^"]*[?&](?:amp;)?p=(\d+)')
+_TOTAL_COUNT_RE = re.compile(r'"(?:totalCount|mainCount)"\s*:\s*(\d+)')
+
+
+def page_url(url: str, page: int) -> str:
+    """URL страницы выдачи с номером page (первая страница — без параметра p)."""
+    parts = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != "p"]
+    if page > 1:
+        query.append(("p", str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def date_sorted_url(url: str) -> str:
+    """URL той же выдачи с сортировкой по дате публикации."""
+    parts = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key not in ("s", "p")]
+    query.append(("s", SORT_BY_DATE))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def extract_total_pages(html: str) -> int:
+    """Число страниц выдачи по пагинации или общему числу объявлений в состоянии страницы."""
+    pages = [int(value) for value in _PAGE_MARKER_RE.findall(html)]
+    pages += [int(value) for value in _PAGE_HREF_RE.findall(html)]
+    total_pages = max(pages, default=1)
+    counts = [int(value) for value in _TOTAL_COUNT_RE.findall(html)]
+    if counts:
+        total_pages = max(total_pages, math.ceil(max(counts) / ITEMS_PER_PAGE))
+    return max(1, total_pages)
+
+
+def extract_item_urls(html: str) -> list[str]:
+    """Абсолютные URL карточек объявлений со страницы выдачи (в порядке выдачи)."""
+    tree = etree.HTML(html)
+    if tree is None:
+        return []
+    hrefs = tree.xpath(
+        "//a[@data-marker='item-title']/@href | //div[@data-marker='item']//a[@itemprop='url']/@href"
+    )
+    return list(dict.fromkeys(urljoin(AVITO_BASE_URL, href.split("?", 1)[0]) for href in hrefs))
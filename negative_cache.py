@@ -0,0 +1,81 @@
+import sqlite3
+import threading
+import time
+
+
+NOT_FOUND_REASON = "not_found"
+
+
+class NegativeCache:
+    """Снятые с публикации и удаленные объявления (sqlite).
+
+    URL из кэша не запрашиваются в следующих проходах и никогда не открываются
+    в браузере: ответ на них уже известен. Снятые объявления хранятся бессрочно, а
+    404 может оказаться временным (сбой, модерация), поэтому запись not_found
+    действует not_found_ttl секунд, после чего URL запрашивается снова.
+    """
+
+    QUERY_CHUNK = 500  # ограничение SQLite на число параметров в одном запросе
+
+    def __init__(self, db_name: str = "negative_cache.db", not_found_ttl: float = 7 * 24 * 60 * 60):
+        self.db_name = db_name
+        self.not_found_ttl = not_found_ttl
+        self._lock = threading.Lock()
+        self._create_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_name, timeout=30)
+
+    def _create_table(self):
+        """Создает таблицу negative, если она не существует."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS negative (
+                    url TEXT PRIMARY KEY,
+                    reason TEXT NOT NULL,
+                    recorded_at REAL NOT NULL
+                )
+                """
+            )
+            conn.commit()
+
+    def add(self, url: str, reason: str) -> None:
+        with self._lock, self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR REPLACE INTO negative (url, reason, recorded_at) VALUES (?, ?, ?)",
+                (url, reason, time.time()),
+            )
+            conn.commit()
+
+    def _active_since(self, now: float | None) -> float:
+        """Записи not_found старше этого момента истекли."""
+        return (now or time.time()) - self.not_found_ttl
+
+    def known(self, urls: list[str], now: float | None = None) -> set[str]:
+        """URL из urls, которые есть в кэше и не истекли."""
+        found: set[str] = set()
+        since = self._active_since(now)
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(urls), self.QUERY_CHUNK):
+                chunk = urls[start:start + self.QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(
+                    f"SELECT url FROM negative WHERE url IN ({placeholders}) AND (reason != ? OR recorded_at >= ?)",
+                    [*chunk, NOT_FOUND_REASON, since],
+                )
+                found.update(row[0] for row in cursor.fetchall())
+        return found
+
+    def reason(self, url: str, now: float | None = None) -> str | None:
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT reason FROM negative WHERE url = ? AND (reason != ? OR recorded_at >= ?)",
+                (url, NOT_FOUND_REASON, self._active_since(now)),
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
@@ -0,0 +1,141 @@
+import html
+import json
+import re
+from urllib.parse import unquote, urljoin
+
+from loguru import logger
+from pydantic import ValidationError
+
+from listing_parser import AVITO_BASE_URL
+from models import Item, ItemsResponse
+
+# состояние микрофронтендов: HTML-экранированный JSON в <script type="mime/invalid">
+_MFE_STATE_RE = re.compile(
+    r'<script[^>]*type="mime/invalid"[^>]*data-mfe-state="true"[^>]*>(.*?)</script>',
+    re.S,
+)
+# старый формат: window.__initialData__ = "<url-encoded JSON>"
+_INITIAL_DATA_RE = re.compile(r'window\.__initialData__\s*=\s*"([^"]*)"')
+
+# глубина обхода состояния при поиске списка объявлений или карточки
+MAX_STATE_DEPTH = 8
+
+
+def iter_page_states(html_code: str):
+    """Декодированные JSON-блоки начального состояния страницы (в порядке появления)."""
+    for match in _MFE_STATE_RE.finditer(html_code):
+        try:
+            yield json.loads(html.unescape(match.group(1)))
+        except ValueError:
+            continue
+    for match in _INITIAL_DATA_RE.finditer(html_code):
+        try:
+            yield json.loads(unquote(match.group(1)))
+        except ValueError:
+            continue
+
+
+def _looks_like_item(node) -> bool:
+    return isinstance(node, dict) and bool(node.get("id")) and "urlPath" in node
+
+
+def _find(node, predicate, depth: int = 0):
+    """Первый узел состояния, для которого predicate истинен (обход в глубину)."""
+    if depth > MAX_STATE_DEPTH:
+        return None
+    if predicate(node):
+        return node
+    children = node.values() if isinstance(node, dict) else node if isinstance(node, list) else ()
+    for child in children:
+        found = _find(child, predicate, depth + 1)
+        if found is not None:
+            return found
+    return None
+
+
+def validate_items(raw_items: list) -> list[Item]:
+    """Разбирает объявления по одному: битое объявление не отбрасывает всю страницу."""
+    items = []
+    for raw in raw_items:
+        if not _looks_like_item(raw):
+            continue  # рекламные блоки и виджеты внутри выдачи
+        try:
+            items.append(Item.model_validate(raw))
+        except ValidationError as exc:
+            logger.debug(f"Объявление {raw.get('id')} не прошло валидацию: {exc.error_count()} ошибок")
+    return items
+
+
+def extract_items(html_code: str) -> ItemsResponse | None:
+    """Объявления страницы выдачи из встроенного JSON-состояния; None, если его нет."""
+    for state in iter_page_states(html_code):
+        catalog = _find(
+            state,
+            lambda node: isinstance(node, dict)
+            and isinstance(node.get("items"), list)
+            and any(_looks_like_item(item) for item in node["items"]),
+        )
+        if catalog is not None:
+            return ItemsResponse(items=validate_items(catalog["items"]))
+    return None
+
+
+def extract_item(html_code: str, item_id: int | None = None) -> Item | None:
+    """Объявление со страницы карточки из встроенного JSON-состояния.
+
+    В состоянии карточки лежат и похожие, рекомендованные объявления, поэтому при
+    известном item_id (из URL) берется только объявление с этим id.
+    """
+    def matches(node) -> bool:
+        if not _looks_like_item(node) or "title" not in node:
+            return False
+        return item_id is None or str(node["id"]) == str(item_id)
+
+    for state in iter_page_states(html_code):
+        raw = _find(state, matches)
+        if raw is None:
+            continue
+        try:
+            return Item.model_validate(raw)
+        except ValidationError as exc:
+            logger.debug(f"Состояние карточки не прошло валидацию: {exc.error_count()} ошибок")
+    return None
+
+
+def item_url(item: Item) -> str | None:
+    """Абсолютный URL карточки объявления без параметров запроса."""
+    if not item.urlPath:
+        return None
+    return urljoin(AVITO_BASE_URL, item.urlPath.split("?", 1)[0])
+
+
+def item_to_record(item: Item, url: str | None = None) -> dict:
+    """Запись о вакансии из объявления в том же виде, что и _parse_detailed_job_info."""
+    price = item.priceDetailed
+    salary = str(price.value) if price and price.hasValue else None
+    coords = item.coords or {}
+    return {
+        'external_id': url or item_url(item),
+        'employer': None,
+        'vacancy_name': item.title,
+        'description': item.description,
+        'type_schedule': None,
+        'publish_dt': item.sortTimeStamp / 1000 if item.sortTimeStamp else 0,
+        'vacancy_source': 'avito',
+        'location_source': (
+            item.addressDetailed.locationName if item.addressDetailed
+            else item.geo.formattedAddress if item.geo else None
+        ),
+        'location_region': None,
+        'location_city': item.location.name if item.location else None,
+        'location_coordinates': f"{coords['lat']};{coords['lng']}" if 'lat' in coords and 'lng' in coords else None,
+        'salary_min': salary,
+        'salary_max': salary,
+        'salary_type': None,
+        'schedule': None,
+        'source_id': str(item.id) if isinstance(item.id, int) else None,
+        'vacancy_activity': [],
+        'employer_id': item.sellerId,
+        'driver_license_types': None,
+        'pay_period': price.postfix.replace('\xa0', ' ') if price and price.postfix else None,
+    }
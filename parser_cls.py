@@ -1,5 +1,6 @@
 import asyncio
 import json
+import queue
 import random
 import re
 import signal
@@ -7,8 +8,13 @@ import sys
 import threading
 import time
 import traceback
+import zlib
+from collections import Counter
 from datetime import datetime, timedelta
 from pathlib import Path
+from itertools import chain, islice
+from typing import Callable, Iterable, Iterator
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 from bs4 import BeautifulSoup
 from curl_cffi import requests
@@ -24,8 +30,29 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import TimeoutException, NoSuchWindowException, WebDriverException
 
 from common_date import HEADERS
-from db_service import PostgreSQLDBHandler
-from dto import Proxy, AvitoConfig
+from api_client import API_HEADERS, AvitoApiClient
+from backfill import BackfillStore, BackfillTracker, WindowWalk, backfill_windows
+from browser_lane import BrowserLane
+from checkpoint import CheckpointStore, RunCheckpoint
+from db_service import PostgreSQLDBHandler, SQLiteDBHandler
+from dto import Proxy, AvitoConfig, FetchOutcome
+from models import Item
+from negative_cache import NegativeCache
+from frontier import create_frontier
+from http_cache import HttpCache
+from keepalive import KeepaliveScheduler
+from latency_tracker import LatencyTracker
+from keyword_matcher import compile_keywords
+from listing_filters import ListingFilter
+from listing_parser import date_sorted_url, extract_item_urls, extract_total_pages, page_url
+from page_state import extract_item, extract_items, item_to_record, item_url
+from query_planner import AVITO_REGIONS, drops_unpriced, split_query
+from revisit import RevisitScheduler
+from response_classifier import BLOCK_KINDS, NEGATIVE_KINDS, PageKind, classify_response
+from rate_limiter import AdaptiveRateLimiter, RateLimitStore
+from seen_index import BloomSeenIndex
+from url_set import UrlFingerprintSet
+from watermarks import WatermarkStore, WatermarkTracker
 from get_cookies import USER_AGENTS, get_cookies, humanized_browse, ensure_playwright_alive
 from load_config import load_avito_config
 
@@ -36,6 +63,18 @@ class AvitoParse:
     """Главный класс, отвечающий за парсинг Avito."""
 
     BATCH_SIZE = 5
+    COOKIES_FILE = "cookies.json"
+    FRONTIER_IDLE_SLEEP = 5
+    DEDUP_BATCH_SIZE = 500
+    FEED_CHUNK = 100  # URL, читаемых из источника за один заход в асинхронном режиме
+    FEED_AHEAD = 4  # очередь воркеров не длиннее стольких URL на воркер
+    FEED_POLL = 0.05
+    DECORATION_PARAMS = ("from", "i", "utm_source", "s")
+    INITIAL_REQUEST_RATE = 1.8  # запросов/с до того, как лимитер что-то выучит
+    DEFAULT_REQUEST_TIMEOUT = 20
+    MIN_REQUEST_TIMEOUT = 5
+    TIMEOUT_P99_MULTIPLIER = 2.0
+    HEDGE_PROXY_COOLDOWN = 60
     MAX_CONSECUTIVE_429 = 3
     IDENTITY_BOOT_DELAY = 1
     USER_AGENT_ROTATION_INTERVAL = 150
@@ -55,14 +94,25 @@ class AvitoParse:
         "https://www.avito.ru/irkutsk/nedvizhimost",
     ]
 
-    def __init__(self, config: AvitoConfig, stop_event: threading.Event | None = None):
+    def __init__(
+        self,
+        config: AvitoConfig,
+        stop_event: threading.Event | None = None,
+        cookies_path: str | None = None,
+    ):
         self.config = config
         self.stop_event = stop_event or threading.Event()
         self.running = True
+        self.cookies_path = Path(cookies_path or self.COOKIES_FILE)
+        self._init_identity()
+        self._init_storage()
+        self._initialize_proxy_pool()
 
-        self.proxy_obj = self.get_proxy_obj()
-        self.db_handler = self._get_db_handler()
+        logger.info(f"Запуск с настройками:\n{config}")
 
+    def _init_identity(self) -> None:
+        """Состояние одной идентичности: прокси, сессия, заголовки, cookies, счетчики, keepalive."""
+        self.proxy_obj = self.get_proxy_obj()
         self.session = self._create_session()
         self.headers = HEADERS.copy()
         self._current_user_agent = self._select_user_agent()
@@ -88,17 +138,62 @@ class AvitoParse:
         self._last_identity_refresh = 0.0
         self._request_counter = 0
         self._next_user_agent_rotation = random.randint(40, self.USER_AGENT_ROTATION_INTERVAL)
-        self._last_keepalive_ts = time.time()
+        self.keepalive = KeepaliveScheduler(self, self.config.keepalive_budget_kb * 1024)
         self._last_referer = None
         self._last_playwright_touch = 0.0
         self._last_selenium_route = 0.0
         self._processed_counter = 0
         self._parse_start_ts = time.time()
         self._first_request_ts: float | None = None
-
-        self._initialize_proxy_pool()
-
-        logger.info(f"Запуск с настройками:\n{config}")
+        self._identity_generation = 0
+        self.async_session: requests.AsyncSession | None = None
+        self._proxy_semaphores: dict[str, asyncio.Semaphore] = {}
+        self._concurrency = 1
+        self._in_flight = 0
+        self.browser_lane: BrowserLane | None = None
+        self._bytes_received = 0
+        self._page_kinds: Counter[PageKind] = Counter()
+        self._handled_counter = 0
+        self._latency: dict[str, LatencyTracker] = {}
+        self._proxy_failures: dict[str, float] = {}
+        self._requests_sent = 0
+        self._hedges_sent = 0
+        self._hedges_won = 0
+
+    def _init_storage(self) -> None:
+        """Хранилища и общее состояние прохода, общие для стадий конвейера (LISTING_SHARED_STATE)."""
+        config = self.config
+        self.db_handler = self._get_db_handler()
+        self.seen_index = self._open_seen_index()
+        # режим шардирования: (номер шарда, всего шардов) и общее хранилище id
+        self.shard: tuple[int, int] | None = None
+        self.seen_store = None
+        self.frontier = create_frontier(config)
+        # Item -> bool: какие объявления догружать карточкой при enable_detailed_parsing = false
+        self.detail_selector: Callable[[Item], bool] | None = self._keyword_detail_selector()
+        self.listing_filter = ListingFilter(config)
+        self.watermarks = WatermarkStore() if config.incremental else None
+        self.watermark_tracker = WatermarkTracker(self.watermarks) if self.watermarks is not None else None
+        self.backfill: BackfillTracker | None = None
+        self.revisit = (
+            RevisitScheduler(min_interval=config.revisit_min_interval, max_interval=config.revisit_max_interval)
+            if config.revisit else None
+        )
+        self.negative_cache = (
+            NegativeCache(not_found_ttl=config.negative_cache_not_found_ttl) if config.negative_cache else None
+        )
+        self.checkpoint: RunCheckpoint | None = None
+        self.api_client = (
+            AvitoApiClient(config.api_base_url, config.api_record_dir) if config.transport == "api" else None
+        )
+        # URL карточек, уже поставленных в очередь со страниц выдачи в этом проходе
+        self._queued_urls: set[str] = set()
+        self._queued_urls_lock = threading.Lock()
+        self.rate_store = RateLimitStore()
+        self._learned_rates = self.rate_store.load()
+        self._rate_limiters: dict[str, AdaptiveRateLimiter] = {}
+        self._rate_limiters_lock = threading.Lock()
+        self.http_cache = HttpCache() if config.http_cache else None
 
     @staticmethod
     def _create_session() -> requests.Session:
@@ -117,10 +212,34 @@ class AvitoParse:
                     logger.error(f"Ошибка при подключении к PostgreSQL: {e}")
                     logger.info("Подключение к БД отключено")
                     return None
+            return SQLiteDBHandler()
         except Exception as e:
             logger.error(f"Ошибка при чтении конфигурации БД: {e}")
             return None
 
+    def _open_seen_index(self) -> BloomSeenIndex | None:
+        """Открывает Bloom-индекс просмотренных id; новый индекс заполняется из viewed.
+
+        Индекс — локальный файл: id, которые сохраняют узлы на других машинах (общая
+        PostgreSQL или frontier), в него не попадут, и он ответил бы «точно не было»
+        для уже сохраненных вакансий. В таких конфигурациях индекс не используется.
+        """
+        if not self.config.seen_index or self.db_handler is None:
+            return None
+        if self.config.database_type.lower() == "postgresql" or self.config.frontier_backend:
+            logger.info("Индекс просмотренных id отключен: БД или очередь URL общие для нескольких узлов")
+            return None
+        try:
+            index = BloomSeenIndex(
+                self.config.seen_index_path, self.config.seen_index_capacity, fill=self.db_handler.iter_ids
+            )
+            if index.created:
+                logger.info(f"Индекс просмотренных id создан, загружено {index.loaded} id из БД")
+            return index
+        except Exception as exc:
+            logger.warning(f"Не удалось открыть индекс просмотренных id, работаем только с БД: {exc}")
+            return None
+
     def get_proxy_obj(self) -> Proxy | None:
         if not self.config.use_proxy:
             if self.config.use_local_ip:
@@ -248,8 +367,78 @@ class AvitoParse:
         return {"http": formatted, "https": formatted}
 
     def _prepare_request_cycle(self) -> None:
-        """Делает запрос менее предсказуемым: пауза, referer, keepalive, ротация UA."""
-        time.sleep(random.uniform(0.3, 0.8))
+        """Делает запрос менее предсказуемым: пауза, referer, ротация UA.
+
+        Keepalive-визиты делает фоновый KeepaliveScheduler в паузах между запросами.
+        """
+        time.sleep(self._next_request_delay())
+        self._rotate_request_fingerprint()
+        self.keepalive.note_request()
+
+    async def _prepare_request_cycle_async(self) -> None:
+        """Асинхронный вариант _prepare_request_cycle, не блокирующий event loop."""
+        await asyncio.sleep(self._next_request_delay())
+        self._rotate_request_fingerprint()
+        self.keepalive.note_request()
+
+    def _identity_key(self) -> str:
+        """Ключ текущей идентичности для лимитера скорости."""
+        return self.current_proxy or "local"
+
+    def _latency_tracker(self, key: str) -> LatencyTracker:
+        tracker = self._latency.get(key)
+        if tracker is None:
+            tracker = self._latency.setdefault(key, LatencyTracker())
+        return tracker
+
+    def _request_timeout(self, key: str) -> float:
+        """Таймаут запроса по p99 времени ответа прокси (не больше прежних 20 с)."""
+        p99 = self._latency_tracker(key).percentile(0.99)
+        if p99 is None:
+            return self.DEFAULT_REQUEST_TIMEOUT
+        return min(
+            self.DEFAULT_REQUEST_TIMEOUT,
+            max(self.MIN_REQUEST_TIMEOUT, p99 * self.TIMEOUT_P99_MULTIPLIER),
+        )
+
+    def _mark_proxy_failure(self) -> None:
+        """Отмечает сбой текущего прокси: он временно не годится для хеджирования."""
+        self._proxy_failures[self._identity_key()] = time.time()
+
+    def _rate_limiter(self, key: str | None = None) -> AdaptiveRateLimiter:
+        """Лимитер скорости прокси key, по умолчанию текущего (создается с выученной ранее скоростью)."""
+        key = key or self._identity_key()
+        with self._rate_limiters_lock:
+            limiter = self._rate_limiters.get(key)
+            if limiter is None:
+                # pause_between_links — самая длинная допустимая пауза между запросами
+                min_rate = 1 / self.config.pause_between_links if self.config.pause_between_links > 0 else 0.05
+                limiter = AdaptiveRateLimiter(
+                    rate=self._learned_rates.get(RateLimitStore.storage_key(key), self.INITIAL_REQUEST_RATE),
+                    min_rate=min_rate,
+                    max_rate=self.config.max_requests_per_second,
+                )
+                self._rate_limiters[key] = limiter
+            return limiter
+
+    def _save_learned_rates(self) -> None:
+        """Сохраняет выученные скорости всех использованных идентичностей."""
+        with self._rate_limiters_lock:
+            rates = {key: limiter.rate for key, limiter in self._rate_limiters.items()}
+        if not rates:
+            return
+        try:
+            self.rate_store.save(rates)
+            self._learned_rates.update({RateLimitStore.storage_key(key): rate for key, rate in rates.items()})
+        except Exception as exc:
+            logger.warning(f"Не удалось сохранить выученные скорости запросов: {exc}")
+
+    def _next_request_delay(self) -> float:
+        """Пауза перед очередным запросом по лимитеру текущего прокси."""
+        return self._rate_limiter().reserve()
+
+    def _rotate_request_fingerprint(self) -> None:
+        """Меняет referer и периодически user-agent."""
         self._request_counter += 1
         if random.random() < 0.5:
             referer = random.choice(self.REFERER_POOL)
@@ -262,32 +451,11 @@ class AvitoParse:
             new_ua = self._select_user_agent()
             self._current_user_agent = new_ua
             self._update_headers_user_agent(new_ua)
-        if (
-            self._request_counter % self.KEEPALIVE_INTERVAL == 0
-            or time.time() - self._last_keepalive_ts > 120
-        ):
-            self._perform_keepalive_visit()
-
-    def _perform_keepalive_visit(self) -> None:
-        """Раз в несколько запросов делаем лёгкий визит на общих страницах."""
-        keep_url = random.choice(self.REFERER_POOL)
-        try:
-            self.session.get(
-                url=self._decorate_url(keep_url),
-                headers=self.headers,
-                proxies=self._build_proxies(),
-                timeout=10,
-                verify=False,
-                http_version=self._proxy_http_version,
-                allow_redirects=True,
-            )
-        except Exception:
-            pass
-        finally:
-            self._last_keepalive_ts = time.time()
 
     def _decorate_url(self, url: str) -> str:
-        """Иногда добавляет к URL псевдо-человеческие параметры."""
+        """Иногда добавляет к URL псевдо-человеческие параметры (кроме запросов к API)."""
+        if self.api_client is not None and self.api_client.owns(url):
+            return url
         if random.random() < 0.35:
             delimiter = "&" if "?" in url else "?"
             param_name = random.choice(["from", "i", "utm_source", "s"])
@@ -324,7 +492,10 @@ class AvitoParse:
         if elapsed <= 0:
             return
         rps = processed / elapsed
-        logger.info(f"Средняя скорость {rps:.2f} req/s (~{rps * 3600:.0f} URL/час)")
+        message = f"Средняя скорость {rps:.2f} req/s (~{rps * 3600:.0f} URL/час)"
+        if self._concurrency > 1:
+            message += f", в полёте {self._in_flight}/{self._concurrency} запросов"
+        logger.info(message)
 
     def _detect_mobile_rotation_endpoint(self) -> str | None:
         """Определяет endpoint для смены IP мобильного прокси."""
@@ -374,16 +545,27 @@ class AvitoParse:
                 for key, value in cookies.items():
                     jar.set(key, value)
                 self.session.cookies.update(jar)
+                if self.async_session is not None:
+                    self.async_session.cookies.update(jar)
                 self.cookies = cookies
             else:
                 self.session.cookies.clear()
+                if self.async_session is not None:
+                    self.async_session.cookies.clear()
                 self.cookies = None
         except Exception as exc:
             logger.warning(f"Не удалось применить cookies к сессии: {exc}")
 
-    def _refresh_identity(self, reason: str = "") -> bool:
-        """Полностью обновляет прокси, user-agent, cookies и перезапускает Selenium."""
+    def _refresh_identity(self, reason: str = "", seen_generation: int | None = None) -> bool:
+        """Полностью обновляет прокси, user-agent, cookies и перезапускает Selenium.
+
+        seen_generation — поколение идентичности, с которым был сделан неудачный запрос.
+        Если с тех пор идентичность уже обновил параллельный запрос, повторно не обновляем.
+        """
         with self._identity_lock:
+            if seen_generation is not None and seen_generation != self._identity_generation:
+                logger.debug(f"Идентичность уже обновлена параллельным запросом ({reason})")
+                return bool(self.cookies)
             logger.info(f"Обновление идентичности{' (' + reason + ')' if reason else ''}")
             self._rotate_proxy(reason)
             self._proxy_http_version = 2
@@ -412,8 +594,24 @@ class AvitoParse:
             self._playwright_humanize(routes=warm_routes, reason=reason)
             time.sleep(self.IDENTITY_BOOT_DELAY)
             self._last_identity_refresh = time.time()
+            self._identity_generation += 1
             return bool(cookies)
 
+    def _refresh_cookies(self, seen_generation: int | None = None) -> None:
+        """Получает свежие cookies после редиректа.
+
+        Как и _refresh_identity, пропускает обновление, если параллельный запрос
+        с тем же поколением идентичности уже запустил Playwright.
+        """
+        with self._identity_lock:
+            if seen_generation is not None and seen_generation != self._identity_generation:
+                logger.debug("Cookies уже обновлены параллельным запросом (302)")
+                return
+            new_cookies = self.get_cookies()
+            if new_cookies:
+                self.save_cookies()
+            self._identity_generation += 1
+
     def _rotate_proxy(self, reason: str = "") -> None:
         """Пытается сменить IP мобильного прокси или переключить пул."""
         rotation_url = self.mobile_rotation_endpoint
@@ -547,7 +745,7 @@ class AvitoParse:
     def load_cookies(self) -> None:
         """Загружает cookies из JSON-файла в requests.Session."""
         try:
-            path = Path("cookies.json")
+            path = self.cookies_path
             if not path.exists():
                 return
             with path.open("r", encoding="utf-8") as f:
@@ -563,110 +761,424 @@ class AvitoParse:
 
     def save_cookies(self) -> None:
         """Сохраняет cookies из requests.Session в JSON-файл."""
-        cookies_dict = self.session.cookies.get_dict()
+        session = self.async_session if self.async_session is not None else self.session
+        cookies_dict = session.cookies.get_dict()
         if cookies_dict == self._last_saved_cookies_snapshot:
             return
-        path = Path("cookies.json")
+        path = self.cookies_path
         tmp_path = Path(f"{path}.tmp")
         with tmp_path.open("w", encoding="utf-8") as f:
             json.dump(cookies_dict, f)
         tmp_path.replace(path)
         self._last_saved_cookies_snapshot = dict(cookies_dict)
 
-    def fetch_data(self, url, retries=3, backoff_factor=1):
+    def _handle_response_status(
+        self,
+        status_code: int,
+        attempt: int,
+        backoff_factor: float,
+        proxy_data: dict | None,
+        generation: int | None = None,
+    ) -> float | None:
+        """Обрабатывает код ответа.
+
+        Возвращает None, если ответ можно отдавать парсеру, иначе паузу в секундах
+        перед следующей попыткой. Для 5xx поднимает RequestsError.
+        """
+        if status_code in (403, 429, 502):
+            self._mark_proxy_failure()
+
+        if status_code == 502 and proxy_data:
+            logger.warning("Получен 502 от прокси, понижаю версию HTTP и обновляю идентичность")
+            self._proxy_http_version = 1
+            self._refresh_identity("proxy 502 status", seen_generation=generation)
+            return 0
+
+        # паузу после 403/429 задает лимитер: он снижает скорость этого прокси,
+        # и следующий запрос сам подождет дольше
+        if status_code == 403:
+            self.bad_request_count += 1
+            self.consecutive_403 += 1
+            self._rate_limiter().on_throttle()
+            logger.warning(
+                f"Получен 403 Forbidden, попытка {attempt} (подряд: {self.consecutive_403})"
+            )
+            if attempt >= 2:
+                self._refresh_identity("HTTP 403", seen_generation=generation)
+            self._save_learned_rates()
+            return 0
+
+        if status_code == 429:
+            self.bad_request_count += 1
+            self.consecutive_429 += 1
+            self._rate_limiter().on_throttle()
+            logger.warning(
+                f"Получен 429 Too Many Requests, попытка {attempt} (подряд: {self.consecutive_429}), "
+                f"скорость снижена до {self._rate_limiter().rate:.2f} req/s"
+            )
+            self.consecutive_403 = 0
+            if self.consecutive_429 > 1:
+                if time.time() - self._last_identity_refresh < 45:
+                    logger.info("Недавно обновляли идентичность, снижаем скорость вместо повторного Playwright")
+                else:
+                    self._refresh_identity("HTTP 429", seen_generation=generation)
+            self._save_learned_rates()
+            return 0
+
+        if status_code in (302,):
+            self.consecutive_429 = 0
+            self.consecutive_403 = 0
+            self._refresh_cookies(seen_generation=generation)
+            return max(3, backoff_factor * attempt)
+
+        if status_code >= 500:
+            raise requests.errors.RequestsError(f"Ошибка сервера: {status_code}")
+
+        return None
+
+    def _classify(self, response) -> PageKind:
+        """Тип страницы по сырым байтам ответа — до любого разбора HTML."""
+        kind = classify_response(response.status_code, response.content, response.headers.get("content-type"))
+        self._page_kinds[kind] += 1
+        return kind
+
+    def _handle_block_page(self, kind: PageKind, attempt: int, generation: int | None = None) -> None:
+        """Капча или «проблема с IP» под кодом 200: идентичность сожжена, обновляем сразу."""
+        self._mark_proxy_failure()
+        self.bad_request_count += 1
+        self._rate_limiter().on_throttle()
+        logger.warning(f"Получена страница блокировки ({kind.value}), попытка {attempt}")
+        self._refresh_identity(f"{kind.value} page", seen_generation=generation)
+        self._save_learned_rates()
+
+    def _negative_outcome(self, kind: PageKind, url: str, response) -> FetchOutcome:
+        """Объявление снято или удалено: разбирать и повторять нечего."""
+        self._bytes_received += len(response.content or b"")
+        logger.info(f"Объявление недоступно ({kind.value}): {url}")
+        return FetchOutcome.CLOSED if kind is PageKind.CLOSED else FetchOutcome.NOT_FOUND
+
+    def _handle_request_error(self, exc: Exception, generation: int | None = None) -> None:
+        """Реагирует на сетевую ошибку запроса (502 от прокси — смена идентичности)."""
+        self._mark_proxy_failure()
+        if "response 502" in str(exc).lower():
+            logger.warning("Получен ответ 502 от прокси, обновляю идентичность")
+            self._proxy_http_version = 1
+            self._refresh_identity("proxy 502", seen_generation=generation)
+
+    def _register_success(self, key: str | None = None) -> None:
+        """Обновляет счетчики и cookies после удачного ответа (key — прокси, который его отдал)."""
+        self._register_response()
+        self._rate_limiter(key).on_success()
+        self.good_request_count += 1
+
+    def _register_response(self) -> None:
+        """Ответ без блокировки: идентичность жива, но темп по нему не разгоняем.
+
+        Для снятых и удаленных объявлений (404 и т. п.) вызывается только это:
+        такие ответы нейтральны для AIMD и не считаются удачными запросами.
+        """
+        self.save_cookies()
+        self.consecutive_429 = 0
+        self.consecutive_403 = 0
+        if self._first_request_ts is None:
+            self._first_request_ts = time.time()
+            startup_delay = self._first_request_ts - self._parse_start_ts
+            logger.info(f"Стартовый цикл до первого ответа занял {startup_delay:.1f} с")
+
+    def _cache_headers(self, url: str) -> dict[str, str]:
+        """Условные заголовки из HTTP-кэша для URL (пусто, если кэш выключен)."""
+        if self.http_cache is None:
+            return {}
+        return self.http_cache.conditional_headers(url)
+
+    def _commit_cache(self, urls: Iterable[str]) -> None:
+        """Записывает в HTTP-кэш страницы, результаты которых сохранены."""
+        if self.http_cache is not None:
+            self.http_cache.commit(self._fetch_target(url)[0] for url in urls)
+
+    def _discard_cache(self, url: str) -> None:
+        """Страница не дала сохраняемого результата: в HTTP-кэш она не попадет."""
+        if self.http_cache is not None:
+            self.http_cache.discard(self._fetch_target(url)[0])
+
+    def _cache_outcome(self, url: str, response):
+        """Отдает текст ответа или FetchOutcome.UNCHANGED, если страница не изменилась."""
+        self._bytes_received += len(response.content or b"")
+        if self.http_cache is None:
+            return response.text
+        if response.status_code == 304:
+            self.http_cache.record_not_modified(url, len(response.content or b""))
+            logger.debug(f"304 Not Modified: {url}")
+            return FetchOutcome.UNCHANGED
+        unchanged = self.http_cache.check(
+            url,
+            response.headers.get("etag"),
+            response.headers.get("last-modified"),
+            response.content,
+        )
+        if unchanged:
+            logger.debug(f"Содержимое не изменилось: {url}")
+            return FetchOutcome.UNCHANGED
+        return response.text
+
+    def fetch_data(self, url, retries=3, backoff_factor=1, extra_headers=None):
+        """Скачивает страницу: текст, FetchOutcome.UNCHANGED для неизменившейся или None."""
+        cache_headers = {**(extra_headers or {}), **self._cache_headers(url)}
         attempt = 1
         while attempt <= retries:
             proxy_data = self._build_proxies()
+            generation = self._identity_generation
             try:
                 self._prepare_request_cycle()
                 request_url = self._decorate_url(url)
                 http_version = self._proxy_http_version if proxy_data else 3
-                response = self.session.get(
-                    url=request_url,
-                    headers=self.headers,
+                proxy_key = self._identity_key()
+                started = time.monotonic()
+                self._in_flight += 1
+                try:
+                    response = self.session.get(
+                        url=request_url,
+                        headers={**self.headers, **cache_headers},
+                        proxies=proxy_data,
+                        cookies=self.cookies,
+                        impersonate="chrome",
+                        timeout=self._request_timeout(proxy_key),
+                        verify=False,
+                        http_version=http_version,
+                        allow_redirects=True,
+                    )
+                finally:
+                    self._in_flight -= 1
+                self._latency_tracker(proxy_key).record(time.monotonic() - started)
+                status_code = response.status_code
+                logger.debug(f"Попытка {attempt}: {status_code}")
+
+                retry_delay = self._handle_response_status(
+                    status_code, attempt, backoff_factor, proxy_data, generation
+                )
+                if retry_delay is not None:
+                    if retry_delay:
+                        time.sleep(retry_delay)
+                    attempt += 1
+                    continue
+
+                kind = self._classify(response)
+                if kind in BLOCK_KINDS:
+                    self._handle_block_page(kind, attempt, generation)
+                    attempt += 1
+                    continue
+
+                if kind in NEGATIVE_KINDS:
+                    self._register_response()
+                    return self._negative_outcome(kind, url, response)
+                self._register_success()
+                return self._cache_outcome(url, response)
+
+            except requests.errors.RequestsError as exc:
+                logger.debug(f"Попытка {attempt} закончилась неуспешно: {exc}")
+                self._handle_request_error(exc, generation)
+                if attempt < retries:
+                    sleep_time = backoff_factor * attempt
+                    logger.debug(f"Повтор через {sleep_time} секунд...")
+                    time.sleep(sleep_time)
+                else:
+                    logger.error(f"Все попытки были неуспешными для URL: {url}")
+                    logger.error(f"Последняя ошибка: {str(exc)}")
+                    return None
+            except Exception as exc:
+                logger.error(f"Неожиданная ошибка при запросе {url}: {str(exc)}")
+                logger.error(f"Трассировка: {traceback.format_exc()}")
+                return None
+
+            attempt += 1
+
+        return None
+
+    def _proxy_semaphore(self, key: str) -> asyncio.Semaphore:
+        """Семафор, ограничивающий число одновременных запросов через один прокси."""
+        semaphore = self._proxy_semaphores.get(key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(max(1, self.config.concurrency_per_proxy))
+            self._proxy_semaphores[key] = semaphore
+        return semaphore
+
+    async def _timed_get_async(
+        self,
+        session: requests.AsyncSession,
+        url: str,
+        proxy: str | None,
+        http_version: int,
+        extra_headers: dict[str, str] | None = None,
+    ):
+        """GET через указанный прокси с учетом семафора и замером времени ответа."""
+        key = proxy or "local"
+        formatted = self._format_proxy(proxy)
+        proxy_data = {"http": formatted, "https": formatted} if formatted else None
+        async with self._proxy_semaphore(key):
+            self._in_flight += 1
+            self._requests_sent += 1
+            started = time.monotonic()
+            try:
+                response = await session.get(
+                    url=url,
+                    headers={**self.headers, **(extra_headers or {})},
                     proxies=proxy_data,
                     cookies=self.cookies,
                     impersonate="chrome",
-                    timeout=20,
+                    timeout=self._request_timeout(key),
                     verify=False,
                     http_version=http_version,
                     allow_redirects=True,
                 )
-                status_code = response.status_code
-                logger.debug(f"Попытка {attempt}: {status_code}")
+            finally:
+                self._in_flight -= 1
+            # время ответа — только у завершившихся запросов: отмененный проигравший хедж
+            # и сетевая ошибка ничего не говорят о скорости прокси
+            self._latency_tracker(key).record(time.monotonic() - started)
+            return response
+
+    def _pick_hedge_proxy(self) -> str | None:
+        """Другой прокси из пула без недавних сбоев."""
+        now = time.time()
+        candidates = [
+            proxy for proxy in self.proxy_pool
+            if proxy != self.current_proxy
+            and now - self._proxy_failures.get(proxy, 0.0) > self.HEDGE_PROXY_COOLDOWN
+        ]
+        return random.choice(candidates) if candidates else None
 
-                if status_code == 502 and proxy_data:
-                    logger.warning("Получен 502 от прокси, понижаю версию HTTP и обновляю идентичность")
-                    self._proxy_http_version = 1
-                    self._refresh_identity("proxy 502 status")
-                    attempt += 1
-                    continue
+    def _hedge_failed(self, proxy: str | None, response) -> bool:
+        """Ответ пришел через прокси хеджа: его 403/429/502 или блокировка — сбой этого прокси.
 
-                if status_code == 403:
-                    self.bad_request_count += 1
-                    self.consecutive_403 += 1
-                    logger.warning(
-                        f"Получен 403 Forbidden, попытка {attempt} (подряд: {self.consecutive_403})"
+        Текущую идентичность из-за чужого прокси не обновляем — запрос просто повторяется.
+        """
+        kind = classify_response(response.status_code, response.content, response.headers.get("content-type"))
+        if response.status_code not in (403, 429, 502) and kind not in BLOCK_KINDS:
+            return False
+        key = proxy or "local"
+        self._proxy_failures[key] = time.time()
+        self._rate_limiter(key).on_throttle()
+        self.bad_request_count += 1
+        logger.debug(f"Хедж через {key} получил {response.status_code} ({kind.value}), повторяем запрос")
+        return True
+
+    def _hedge_budget_allows(self) -> bool:
+        """Хеджей не больше hedge_budget от всех отправленных запросов."""
+        return self._hedges_sent < self.config.hedge_budget * self._requests_sent
+
+    async def _get_with_hedge(
+        self,
+        session: requests.AsyncSession,
+        url: str,
+        http_version: int,
+        extra_headers: dict[str, str] | None = None,
+    ):
+        """Если ответ не пришел за p95, дублирует запрос через другой прокси и берет первый ответ.
+
+        Возвращает (ответ, прокси, который его отдал).
+        """
+        primary_proxy = self.current_proxy
+        primary = asyncio.ensure_future(
+            self._timed_get_async(session, url, primary_proxy, http_version, extra_headers)
+        )
+        hedge_after = self._latency_tracker(self._identity_key()).percentile(0.95)
+        if not self.config.hedge_requests or hedge_after is None:
+            return await primary, primary_proxy
+
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done:
+            return primary.result(), primary_proxy
+        hedge_proxy = self._pick_hedge_proxy()
+        if hedge_proxy is None or not self._hedge_budget_allows():
+            return await primary, primary_proxy
+
+        self._hedges_sent += 1
+        logger.debug(f"Нет ответа за p95 ({hedge_after:.1f} с), дублируем запрос через {hedge_proxy}")
+        hedge = asyncio.ensure_future(
+            self._timed_get_async(session, url, hedge_proxy, http_version, extra_headers)
+        )
+        pending = {primary, hedge}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if task is hedge:
+                        self._hedges_won += 1
+                        return task.result(), hedge_proxy
+                    return task.result(), primary_proxy
+        # оба запроса завершились ошибкой — отдаем ошибку основного
+        raise primary.exception()
+
+    async def fetch_data_async(
+        self,
+        session: requests.AsyncSession,
+        url,
+        retries=3,
+        backoff_factor=1,
+        hedge: bool = True,
+        extra_headers=None,
+    ):
+        """Асинхронный вариант fetch_data с той же обработкой 403/429/302/502.
+
+        hedge — разрешить дублирующий запрос через другой прокси для медленных ответов.
+        """
+        cache_headers = {**(extra_headers or {}), **self._cache_headers(url)}
+        attempt = 1
+        while attempt <= retries:
+            if self._should_stop():
+                return None
+            proxy_data = self._build_proxies()
+            generation = self._identity_generation
+            try:
+                await self._prepare_request_cycle_async()
+                request_url = self._decorate_url(url)
+                http_version = self._proxy_http_version if proxy_data else 3
+                if hedge:
+                    response, served_by = await self._get_with_hedge(
+                        session, request_url, http_version, cache_headers
                     )
-                    if attempt >= 2:
-                        self._refresh_identity("HTTP 403")
-                    sleep_time = max(2, backoff_factor * attempt)
-                    time.sleep(sleep_time)
+                else:
+                    served_by = self.current_proxy
+                    response = await self._timed_get_async(
+                        session, request_url, served_by, http_version, cache_headers
+                    )
+                status_code = response.status_code
+                logger.debug(f"Попытка {attempt}: {status_code}")
+                if served_by != self.current_proxy and self._hedge_failed(served_by, response):
                     attempt += 1
                     continue
 
-                if status_code == 429:
-                    self.bad_request_count += 1
-                    self.consecutive_429 += 1
-                    logger.warning(
-                        f"Получен 429 Too Many Requests, попытка {attempt} (подряд: {self.consecutive_429})"
-                    )
-                    if self.consecutive_429 == 1:
-                        time.sleep(max(2, backoff_factor * attempt))
-                    else:
-                        if time.time() - self._last_identity_refresh < 45:
-                            logger.info("Недавно обновляли идентичность, делаю паузу вместо повторного Playwright")
-                            time.sleep(max(3, backoff_factor * (attempt + 1)))
-                        else:
-                            self._refresh_identity("HTTP 429")
-                    self.consecutive_403 = 0
+                # обновление идентичности блокирующее (Playwright, Selenium) — уводим в поток
+                retry_delay = await asyncio.to_thread(
+                    self._handle_response_status, status_code, attempt, backoff_factor, proxy_data, generation
+                )
+                if retry_delay is not None:
+                    if retry_delay:
+                        await asyncio.sleep(retry_delay)
                     attempt += 1
                     continue
 
-                if status_code in (302,):
-                    self.consecutive_429 = 0
-                    self.consecutive_403 = 0
-                    new_cookies = self.get_cookies()
-                    if new_cookies:
-                        self.save_cookies()
-                    sleep_time = max(3, backoff_factor * attempt)
-                    time.sleep(sleep_time)
+                kind = self._classify(response)
+                if kind in BLOCK_KINDS:
+                    await asyncio.to_thread(self._handle_block_page, kind, attempt, generation)
                     attempt += 1
                     continue
 
-                if status_code >= 500:
-                    raise requests.errors.RequestsError(f"Ошибка сервера: {status_code}")
-
-                self.save_cookies()
-                self.good_request_count += 1
-                self.consecutive_429 = 0
-                self.consecutive_403 = 0
-                if self._first_request_ts is None:
-                    self._first_request_ts = time.time()
-                    startup_delay = self._first_request_ts - self._parse_start_ts
-                    logger.info(f"Стартовый цикл до первого ответа занял {startup_delay:.1f} с")
-                return response.text
+                if kind in NEGATIVE_KINDS:
+                    self._register_response()
+                    return self._negative_outcome(kind, url, response)
+                self._register_success(served_by or "local")
+                return self._cache_outcome(url, response)
 
             except requests.errors.RequestsError as exc:
                 logger.debug(f"Попытка {attempt} закончилась неуспешно: {exc}")
-                if "response 502" in str(exc).lower():
-                    logger.warning("Получен ответ 502 от прокси, обновляю идентичность")
-                    self._proxy_http_version = 1
-                    self._refresh_identity("proxy 502")
+                await asyncio.to_thread(self._handle_request_error, exc, generation)
                 if attempt < retries:
                     sleep_time = backoff_factor * attempt
                     logger.debug(f"Повтор через {sleep_time} секунд...")
-                    time.sleep(sleep_time)
+                    await asyncio.sleep(sleep_time)
                 else:
                     logger.error(f"Все попытки были неуспешными для URL: {url}")
                     logger.error(f"Последняя ошибка: {str(exc)}")
@@ -679,40 +1191,220 @@ class AvitoParse:
             attempt += 1
 
         return None
-    def load_urls_from_file(self, file_path: str) -> list[str]:
-        """Загружает список URL из текстового файла."""
+
+    @staticmethod
+    def iter_url_lines(file_path: str, start: int = 0) -> Iterator[tuple[str, int]]:
+        """(URL, смещение конца его строки в байтах) для непустых строк файла начиная с start."""
+        with open(file_path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                offset += len(line)
+                url = line.decode('utf-8', errors='replace').strip()
+                if url:
+                    yield url, offset
+
+    def iter_urls_file(self, file_path: str, start: int = 0) -> Iterator[tuple[str, int]]:
+        """Построчно читает файл URL (см. iter_url_lines), сообщая об ошибках чтения в лог."""
+        count = 0
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                urls = [line.strip() for line in f if line.strip()]
-            logger.info(f"Загружено {len(urls)} URL из файла {file_path}")
-            return urls
+            for url, line_end in self.iter_url_lines(file_path, start):
+                count += 1
+                yield url, line_end
         except FileNotFoundError:
             logger.error(f"Файл {file_path} не найден")
-            return []
         except Exception as e:
             logger.error(f"Ошибка при чтении файла {file_path}: {e}")
-            return []
+        logger.info(f"Прочитано {count} URL из файла {file_path}")
+
+    def load_urls_from_file(self, file_path: str) -> list[str]:
+        """Загружает список URL из текстового файла."""
+        return [url for url, _ in self.iter_urls_file(file_path)]
 
     def _should_stop(self) -> bool:
         """Проверяет, пришел ли сигнал на остановку работы."""
         return not self.running or self.stop_event.is_set()
 
-    @staticmethod
-    def _normalize_url(url: str) -> str:
-        """Очищает URL от управляющих символов и пробелов."""
-        return url.replace('\r', '').replace('\n', '').strip()
-
-    def _collect_urls(self) -> list[str]:
-        """Собирает и нормализует список URL из конфигурации."""
-        urls_file = getattr(self.config, "urls_file", None)
+    @classmethod
+    def _normalize_url(cls, url: str) -> str:
+        """Очищает URL от управляющих символов, пробелов и параметров из _decorate_url."""
+        return cls._canonical_url(url.replace('\r', '').replace('\n', '').strip())
+
+    @classmethod
+    def _canonical_url(cls, url: str) -> str:
+        """Убирает параметры, которые добавляет _decorate_url.
+
+        У страниц поиска параметр s — это сортировка, поэтому он сохраняется.
+        """
+        parts = urlsplit(url)
+        if not parts.query:
+            return url
+        strip = set(cls.DECORATION_PARAMS)
+        if cls._extract_item_id(url) is None:
+            strip.discard("s")
+        query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key not in strip]
+        return urlunsplit(parts._replace(query=urlencode(query)))
+
+    def _drop_viewed(self, urls: Iterable[str]) -> Iterator[str]:
+        """Отсеивает URL вакансий, id которых уже есть в таблице viewed.
+
+        id проверяются пачками по DEDUP_BATCH_SIZE одним запросом к БД; если включен
+        Bloom-индекс, в запрос попадают только id с положительным ответом фильтра.
+        """
+        if self.db_handler is None:
+            yield from urls
+            return
+        skipped = 0
+        chunk: list[tuple[str, int | None]] = []
+
+        def flush():
+            nonlocal skipped
+            ids = [item_id for _, item_id in chunk if item_id is not None]
+            if self.seen_index is not None:
+                # в БД идем только за id, которые фильтр считает возможно виденными
+                ids = [item_id for item_id in ids if self.seen_index.might_contain(item_id)]
+            try:
+                viewed = self.db_handler.existing_ids(ids) if ids else set()
+            except Exception as exc:
+                logger.warning(f"Не удалось проверить id в БД, пропускаем дедупликацию пачки: {exc}")
+                viewed = set()
+            for url, item_id in chunk:
+                if item_id is not None and item_id in viewed:
+                    skipped += 1
+                    self._skip_url(url)
+                    continue
+                yield url
+            chunk.clear()
+
+        for url in urls:
+            chunk.append((url, self._extract_item_id(url)))
+            if len(chunk) >= self.DEDUP_BATCH_SIZE:
+                yield from flush()
+        if chunk:
+            yield from flush()
+        if skipped:
+            logger.info(f"Пропущено {skipped} уже сохраненных вакансий (таблица viewed)")
+
+    def _drop_negative(self, urls: Iterable[str]) -> Iterator[str]:
+        """Отсеивает URL снятых и удаленных вакансий из негативного кэша (пачками, как _drop_viewed)."""
+        if self.negative_cache is None:
+            yield from urls
+            return
+        skipped = 0
+        urls = iter(urls)
+        while chunk := list(islice(urls, self.DEDUP_BATCH_SIZE)):
+            known = self.negative_cache.known([url for url in chunk if not self._is_listing_url(url)])
+            for url in chunk:
+                if url in known:
+                    skipped += 1
+                    self._skip_url(url)
+                    continue
+                yield url
+        if skipped:
+            logger.info(f"Пропущено {skipped} снятых или удаленных вакансий (негативный кэш)")
+
+    def _skip_url(self, url: str) -> None:
+        """URL отсеян до запроса: для контрольной точки он обработан."""
+        if self.checkpoint is not None:
+            self.checkpoint.finished(url)
+
+    def _unique_urls(self, raw_urls: Iterable[str]) -> Iterator[str]:
+        """Нормализует URL и на лету отсеивает повторы, храня только их отпечатки."""
+        seen = UrlFingerprintSet()
+        for raw_url in raw_urls:
+            if not raw_url or not raw_url.strip():
+                continue
+            url = self._normalize_url(raw_url)
+            if seen.add(url):
+                yield url
+
+    def _collect_urls(self) -> Iterator[str]:
+        """Лениво отдает нормализованные URL из конфигурации без повторов.
+
+        urls_file читается построчно по мере обработки, поэтому первый запрос уходит
+        сразу, а память не зависит от размера файла.
+        """
+        urls_file = self.config.urls_file
+        if urls_file and self.shard is None and self.frontier is None:
+            yield from self._collect_checkpointed_urls(urls_file)
+            return
         if urls_file:
-            raw_urls = self.load_urls_from_file(urls_file)
+            raw_urls = (url for url, _ in self.iter_urls_file(urls_file))
         else:
-            raw_urls = getattr(self.config, "urls", []) or []
-        cleaned_urls = [self._normalize_url(u) for u in raw_urls if u and u.strip()]
-        # сохраняем порядок, удаляя дубликаты
-        unique_urls = list(dict.fromkeys(cleaned_urls))
-        return unique_urls
+            raw_urls = self.config.urls or []
+        urls = self._unique_urls(raw_urls)
+        if self.shard:
+            shard_index, shards = self.shard
+            logger.info(f"Шард {shard_index + 1}/{shards}")
+            urls = (url for url in urls if self._shard_of(url, shards) == shard_index)
+        yield from urls
+
+    def _collect_checkpointed_urls(self, urls_file: str) -> Iterator[str]:
+        """URL из urls_file под контрольной точкой; с resume — от сохраненного смещения.
+
+        Неудачные URL прошлого прохода идут первыми, обработанные за смещением пропускаются.
+        Каждый URL регистрируется в контрольной точке со смещением конца своей строки.
+        """
+        self.checkpoint = RunCheckpoint(str(Path(urls_file).resolve()), CheckpointStore(), resume=self.config.resume)
+        offset, done, retry = self.checkpoint.offset, self.checkpoint.done, self.checkpoint.retry
+        if self.config.resume:
+            logger.info(
+                f"Продолжаем {urls_file} с байта {offset}: повторяем {len(retry)} неудачных URL, "
+                f"пропускаем {len(done)} уже обработанных"
+            )
+        seen = UrlFingerprintSet()
+        lines = chain(((url, 0) for url in retry), self.iter_urls_file(urls_file, offset))
+        for url, line_end in lines:
+            url = self._normalize_url(url)
+            if url in done or not seen.add(url):
+                continue
+            self.checkpoint.track(url, line_end)
+            yield url
+
+    @staticmethod
+    def _shard_of(url: str, shards: int) -> int:
+        """Детерминированно относит URL к шарду (не зависит от порядка в файле)."""
+        return zlib.crc32(url.encode("utf-8")) % shards
+
+    @staticmethod
+    def _extract_item_id(url: str) -> int | None:
+        """Достает числовой id объявления из суффикса _<digits> в пути URL."""
+        match = re.search(r"_(\d+)/?$", urlsplit(url).path)
+        if match:
+            return int(match.group(1))
+        return None
+
+    def _claim_url(self, url: str) -> bool:
+        """Берет URL в работу через общее хранилище id; False — его уже обработал другой шард."""
+        if self.seen_store is None:
+            return True
+        item_id = self._extract_item_id(url)
+        if item_id is None:
+            return True
+        if self.seen_store.claim(item_id):
+            return True
+        logger.debug(f"Вакансия {item_id} уже взята в работу другим процессом, пропускаем")
+        return False
+
+    def _release_url(self, url: str) -> None:
+        """Возвращает id в общее хранилище, если URL так и не удалось обработать."""
+        if self.checkpoint is not None:
+            self.checkpoint.failed(url)
+        if self.seen_store is None:
+            return
+        item_id = self._extract_item_id(url)
+        if item_id is not None:
+            self.seen_store.release(item_id)
+
+    def get_stats(self) -> dict:
+        """Сводка прохода для объединения отчетов нескольких процессов."""
+        return {
+            "processed": self._processed_counter,
+            "good": self.good_request_count,
+            "bad": self.bad_request_count,
+            "started": self._parse_start_ts,
+            "finished": time.time(),
+        }
 
     def _increment_error(self, url: str) -> int:
         """Увеличивает счетчик ошибок для URL и возвращает его значение."""
@@ -724,92 +1416,1167 @@ class AvitoParse:
         """Сбрасывает счетчик ошибок для URL после успешного парсинга."""
         self.error_count.pop(url, None)
 
-    def parse(self) -> None:
-        """Основной цикл парсинга URL."""
+    def _start_run(self) -> Iterable[str]:
+        """Готовит новый проход: cookies, таймеры, поток URL и фоновую прокрутку.
+
+        URL отдаются лениво; пустой список — если обрабатывать нечего.
+        """
         self.load_cookies()
         self._parse_start_ts = time.time()
         self._first_request_ts = None
-        urls = self._collect_urls()
-        if not urls:
-            logger.error("Не найдено URL для парсинга")
-            return
+        self._reset_run_state()
+        urls = self._drop_negative(self._drop_viewed(self._collect_urls()))
+        if self.revisit is not None:
+            urls = self._schedule_revisits(urls)
+        first_url = next(urls, None)
+        if first_url is None:
+            if self.revisit is not None:
+                logger.info("Ни одной выдаче еще рано на повторный визит, перепроверять нечего")
+            else:
+                logger.error("Не найдено URL для парсинга")
+            return []
 
-        logger.info(f"Total URLS: {len(urls)}")
-        logger.info(f"Начинаем парсинг {len(urls)} URL")
+        logger.info("Начинаем парсинг")
+        self._start_browser_lane()
 
         self.start_scroll_page_thread('https://www.avito.ru/all/vakansii')
+        return chain([first_url], urls)
+
+    def _schedule_revisits(self, urls: Iterable[str]) -> Iterator[str]:
+        """Пропускает выдачи, которым еще рано на визит, и добавляет вакансии для проверки на закрытие."""
+        listings = due = 0
+        for url in urls:
+            if self._is_listing_url(url):
+                listings += 1
+                if not self.revisit.due_searches([url]):
+                    self._skip_url(url)
+                    continue
+                due += 1
+            yield url
+        rechecks = self.revisit.due_vacancies(self.config.recheck_per_cycle)
+        logger.info(
+            f"Расписание: выдач к визиту {due} из {listings}, "
+            f"вакансий на проверку закрытия {len(rechecks)}"
+        )
+        yield from rechecks
+
+    def _reset_run_state(self) -> None:
+        """Обнуляет счетчики и множества, живущие в пределах одного прохода."""
+        self._handled_counter = 0
+        self._queued_urls = set()
+        self._processed_counter = 0
+        self._bytes_received = 0
+        self._page_kinds.clear()
+        self.listing_filter.reset_stats()
+        if self.http_cache is not None:
+            self.http_cache.reset_stats()
+
+    def _finish_run(self, batch: list[dict]) -> list[tuple[str, bool]]:
+        """Сохраняет остаток пачки и закрывает ресурсы прохода.
+
+        Возвращает итоги URL браузерной полосы, завершенных после последнего drain().
+        """
+        lane_settled: list[tuple[str, bool]] = []
+        if self.browser_lane is not None:
+            if self.browser_lane.pending():
+                logger.info(f"Ждем браузерную полосу: {self.browser_lane.pending()} URL")
+            lane, self.browser_lane = self.browser_lane, None
+            records, lane_settled = lane.close()
+            batch = batch + records
+            logger.info(lane.summary())
+        if batch:
+            logger.info(f"Сохраняем оставшиеся {len(batch)} записей")
+            self._save_and_clear_results(batch)
+        if self.checkpoint is not None:
+            self.checkpoint.commit()
+            logger.info(f"Контрольная точка {self.checkpoint.source}: байт {self.checkpoint.offset}")
+        if self.watermark_tracker is not None:
+            self._advance_watermarks()
+
+        self.close_selenium_driver()
+        self.keepalive.stop()
+        logger.debug(
+            f"Keepalive: визитов {self.keepalive.visits}, пропущено по бюджету {self.keepalive.skipped_over_budget}"
+        )
+        self._save_learned_rates()
+        if self.http_cache is not None:
+            logger.info(self.http_cache.summary())
+        if self.listing_filter or self.listing_filter.checks_records:
+            logger.info(self.listing_filter.summary())
+        if self._hedges_sent:
+            logger.info(
+                f"Хеджирование: отправлено {self._hedges_sent} дублей "
+                f"({self._hedges_sent / max(1, self._requests_sent):.1%} запросов), "
+                f"выиграли {self._hedges_won}"
+            )
+        logger.info(f"Хорошие запросы: {self.good_request_count}шт, плохие: {self.bad_request_count}шт")
+        if set(self._page_kinds) - {PageKind.OK}:
+            logger.info("Типы ответов: " + ", ".join(f"{kind.value}: {count}" for kind, count in self._page_kinds.items()))
+        self._log_transport_report()
+        return lane_settled
+
+    def _log_transport_report(self) -> None:
+        """Объем и скорость на запись для сравнения транспортов HTML и JSON API."""
+        if not self._processed_counter:
+            return
+        elapsed = max(time.time() - self._parse_start_ts, 1e-6)
+        logger.info(
+            f"Транспорт {self.config.transport}: {self._processed_counter} записей, "
+            f"{self._bytes_received / self._processed_counter / 1024:.1f} КБ/запись, "
+            f"{self._processed_counter / elapsed:.2f} записей/с"
+        )
+
+    def parse(self) -> None:
+        """Основной цикл парсинга URL."""
+        if self.config.backfill:
+            self.parse_backfill()
+            return
+        if self.frontier is not None:
+            self.parse_frontier()
+            return
+        if self.config.async_mode:
+            self.parse_async()
+            return
+
+        urls = self._start_run()
+        if not urls:
+            return
 
         batch: list[dict] = []
-        for index, url in enumerate(urls, start=1):
+        for entry in self._iter_work(urls, own_identity=True):
             if self._should_stop():
                 logger.info("Получен сигнал остановки, завершаем парсинг")
                 break
-            self._maybe_refresh_playwright()
-
-            result = self.fetch_and_parse(url)
-            if result:
+            url = self._work_url(entry)
+            if not self._claim_url(url):
+                self._settle_found(url, True)
+                continue
+
+            result = self._process_entry(entry)
+            if isinstance(result, FetchOutcome):
+                logger.debug(f"Пропускаем {url}: {result.value}")
+            elif result:
                 batch.append(result)
                 self._processed_counter += 1
                 self._log_throughput(self._processed_counter)
+            else:
+                self._release_url(url)
+            self._settle(url, result)
 
+            batch.extend(self._drain_browser_lane())
             if len(batch) >= self.BATCH_SIZE:
                 logger.info(f"Сохраняем пачку из {len(batch)} записей")
                 self._save_and_clear_results(batch)
                 batch = []
 
-            if index % 5 == 0:
-                logger.info(f"Обработано {index}/{len(urls)} URL")
+            self._log_progress()
 
-        if batch:
-            logger.info(f"Сохраняем оставшиеся {len(batch)} записей")
-            self._save_and_clear_results(batch)
+        self._finish_run(batch)
+
+    def upgrade_to_detail(self, urls: Iterable[str]) -> None:
+        """Догружает карточки объявлений, ранее сохраненных только по данным выдачи.
+
+        viewed здесь не проверяется: эти объявления в нем уже есть. Запись с карточки
+        заменяет в таблице records запись из выдачи (см. upsert_records).
+        """
+        self.load_cookies()
+        self._parse_start_ts = time.time()
+        self._first_request_ts = None
+        self._reset_run_state()
+        batch: list[dict] = []
+        for url in self._drop_negative(self._unique_urls(urls)):
+            if self._should_stop():
+                break
+            result = self._process_entry(url)
+            if isinstance(result, dict):
+                batch.append(result)
+                self._processed_counter += 1
+            if len(batch) >= self.BATCH_SIZE:
+                self._save_and_clear_results(batch)
+                batch = []
+            self._log_progress()
+        self._finish_run(batch)
 
+    def _log_progress(self) -> None:
+        self._handled_counter += 1
+        if self._handled_counter % 5 == 0:
+            logger.info(f"Обработано {self._handled_counter} URL")
+
+    @staticmethod
+    def _work_url(entry: str | dict) -> str:
+        """URL элемента очереди: сам URL или external_id готовой записи из выдачи."""
+        return entry['external_id'] if isinstance(entry, dict) else entry
+
+    def _process_entry(self, entry: str | dict):
+        """Запись из выдачи сохраняется как есть, для URL скачивается карточка."""
+        if isinstance(entry, dict):
+            return entry
+        self._maybe_refresh_playwright()
+        return self.fetch_and_parse(entry)
+
+    def _is_listing_url(self, url: str) -> bool:
+        """Страница выдачи (поиска) — все, что не карточка объявления с id."""
+        return self._extract_item_id(url) is None
+
+    def _iter_work(self, urls: Iterable[str], own_identity: bool = False) -> Iterator[str | dict]:
+        """Отдает URL карточек по мере чтения источника вперемешку с найденными на страницах выдачи.
+
+        В режиме без детального парсинга вместо URL из выдачи приходят готовые записи.
+
+        Выдача обходится в фоновом потоке, который получает URL выдач по мере их
+        появления в источнике, поэтому карточки начинают скачиваться раньше, чем
+        закончится пагинация (и чтение файла URL). Если вызывающий поток сам скачивает
+        карточки (own_identity), выдачу обходит отдельная идентичность — см.
+        _listing_stage_parser.
+        """
+        found: queue.Queue[str | dict | None] = queue.Queue()
+        listings: queue.Queue[str | None] | None = None
+        listing_done = False
+        try:
+            for url in urls:
+                if self._is_listing_url(url):
+                    if listings is None:
+                        listings = queue.Queue()
+                        if own_identity:
+                            target = self._listing_stage_parser()._run_listing_stage
+                        else:
+                            target = self._listing_worker
+                        threading.Thread(target=target, args=(iter(listings.get, None), found.put), daemon=True).start()
+                    listings.put(url)
+                    continue
+                yield url
+                while not listing_done and not found.empty():
+                    entry = found.get_nowait()
+                    if entry is None:
+                        # стадия выдачи завершилась раньше времени (ошибка)
+                        listing_done = True
+                    else:
+                        yield entry
+            if listings is None or listing_done:
+                return
+            listings.put(None)
+            while (entry := found.get()) is not None:
+                yield entry
+        finally:
+            if listings is not None:
+                listings.put(None)
+
+    # хранилища и состояние прохода, которые стадия выдачи делит с основным парсером;
+    # лимитеры общие, чтобы суммарная скорость запросов через один прокси не удваивалась
+    LISTING_SHARED_STATE = (
+        "db_handler", "seen_index", "frontier", "http_cache", "negative_cache", "checkpoint", "watermarks",
+        "watermark_tracker", "revisit", "backfill", "api_client", "detail_selector", "listing_filter", "shard", "seen_store",
+        "_queued_urls", "_queued_urls_lock", "rate_store", "_rate_limiters", "_rate_limiters_lock", "_learned_rates",
+    )
+
+    def _listing_stage_parser(self) -> "AvitoParse":
+        """Отдельная идентичность для стадии выдачи, работающей параллельно с этим парсером.
+
+        Заголовки, cookies, сессия, счетчики ответов и обновление идентичности у нее
+        свои, поэтому два потока не меняют их друг у друга из-под рук. Хранилища не
+        открываются заново, а берутся у этого парсера (LISTING_SHARED_STATE).
+        """
+        parser = AvitoParse.__new__(AvitoParse)
+        parser.config = self.config
+        parser.stop_event = self.stop_event
+        parser.running = True
+        parser.cookies_path = Path(f"{self.cookies_path.stem}_listing.json")
+        parser._init_identity()
+        for name in self.LISTING_SHARED_STATE:
+            setattr(parser, name, getattr(self, name))
+        parser._initialize_proxy_pool()
+        parser.load_cookies()
+        return parser
+
+    def _run_listing_stage(self, listings: Iterable[str], emit) -> None:
+        """Поток отдельной идентичности стадии выдачи: обход, затем закрытие ее ресурсов."""
+        try:
+            self._listing_worker(listings, emit)
+        finally:
+            self._close_identity()
+
+    def _close_identity(self) -> None:
+        """Останавливает keepalive, закрывает Selenium и HTTP-сессию этой идентичности."""
+        self.keepalive.stop()
         self.close_selenium_driver()
-        logger.info(f"Хорошие запросы: {self.good_request_count}шт, плохие: {self.bad_request_count}шт")
+        try:
+            self.session.close()
+        except Exception:
+            pass
 
-    def fetch_and_parse(self, url: str):
-        """Парсинг через requests с обработкой ошибок."""
-        if self._should_stop():
+    def _listing_worker(self, listings: Iterable[str], emit) -> None:
+        """Поток стадии выдачи: обходит страницы и отдает карточки в emit, в конце emit(None)."""
+        try:
+            asyncio.run(self._crawl_listings(listings, emit))
+        except Exception as exc:
+            logger.error(f"Ошибка при обходе страниц выдачи: {exc}")
+        finally:
+            emit(None)
+
+    async def _crawl_listings(self, listings: Iterable[str], emit) -> None:
+        """Обходит несколько выдач параллельно поверх отдельной AsyncSession.
+
+        listings может блокировать (очередь другого потока): выдача запускается, как только пришел ее URL.
+        """
+        self._proxy_semaphores = {}
+        listings = iter(listings)
+        async with requests.AsyncSession(max_clients=max(1, self.config.concurrency_per_proxy)) as session:
+            tasks = []
+            while (url := await asyncio.to_thread(next, listings, None)) is not None:
+                tasks.append(asyncio.create_task(self._crawl_search_async(session, url, emit)))
+            await asyncio.gather(*tasks)
+
+    def _listing_items(self, html: str) -> dict[str, Item | None]:
+        """Объявления страницы выдачи по URL карточки.
+
+        Объявления берутся из встроенного JSON-состояния страницы, разметка — запасной путь
+        (тогда данных объявления нет, только URL).
+        """
+        listing = self.api_client.parse_search(html) if self.api_client is not None else extract_items(html)
+        if listing is not None and listing.items:
+            found = {}
+            for item in listing.items:
+                url = item_url(item)
+                if url:
+                    found.setdefault(self._normalize_url(url), item)
+            return found
+        return dict.fromkeys(self._normalize_url(url) for url in extract_item_urls(html))
+
+    @staticmethod
+    def _listing_stamps(found: dict[str, Item | None]) -> list[int]:
+        """sortTimeStamp объявлений страницы без продвигаемых (они стоят вне порядка дат)."""
+        return [item.sortTimeStamp for item in found.values() if item and item.sortTimeStamp and not item.isPromotion]
+
+    def _select_listing_items(self, found: dict[str, Item | None]) -> list[str | dict]:
+        """Новые объявления со страницы выдачи: нет в этом проходе, в viewed и в негативном кэше, проходят фильтры."""
+        with self._queued_urls_lock:
+            urls = [url for url in found if url not in self._queued_urls]
+            self._queued_urls.update(urls)
+        if self.listing_filter:
+            urls = [url for url in urls if found[url] is None or self.listing_filter.reject_reason(found[url]) is None]
+        return [self._listing_entry(url, found[url]) for url in self._drop_negative(self._drop_viewed(urls))]
+
+    def _keyword_detail_selector(self) -> Callable[[Item], bool] | None:
+        """detail_selector из detail_keywords: объявления с ключевым словом в заголовке или описании."""
+        matcher = compile_keywords(tuple(self.config.detail_keywords or ()))
+        if not matcher:
             return None
+        return lambda item: matcher.find(item.title, item.description) is not None
+
+    def _listing_entry(self, url: str, item: Item | None) -> str | dict:
+        """URL для скачивания карточки или готовая запись, если карточка не нужна.
+
+        Без enable_detailed_parsing запись собирается из выдачи; карточка все равно
+        скачивается, если объявление выбрано detail_selector или данных выдачи нет.
+        """
+        if self.config.enable_detailed_parsing or item is None:
+            return url
+        if self.detail_selector is not None and self.detail_selector(item):
+            return url
+        return {**item_to_record(item, url), 'is_detailed_parsed': False}
+
+    async def _crawl_listing_page_async(
+        self, session: requests.AsyncSession, url: str, emit, stamps: list[int] | None = None
+    ):
+        """Скачивает одну страницу выдачи и отдает новые карточки в emit; возвращает HTML.
+
+        В stamps, если передан, дописываются sortTimeStamp объявлений страницы.
+        """
+        html, found = await self._fetch_listing_page_async(session, url)
+        if not isinstance(html, str):
+            return html
+        if stamps is not None:
+            stamps.extend(self._listing_stamps(found))
+        await self._emit_listing_items(found, emit, url)
+        return html
+
+    async def _fetch_listing_page_async(
+        self, session: requests.AsyncSession, url: str
+    ) -> tuple[str | FetchOutcome | None, dict[str, Item | None]]:
+        """Скачивает страницу выдачи: (HTML или исход запроса, объявления страницы)."""
+        fetch_url, headers = self._fetch_target(url)
+        html = await self.fetch_data_async(
+            session, fetch_url, retries=self.config.max_count_of_retry, hedge=False, extra_headers=headers
+        )
+        if not isinstance(html, str):
+            return html, {}
+        found = await asyncio.to_thread(self._listing_items, html)
+        if self.api_client is not None and found:
+            self.api_client.record(fetch_url, html)
+        return html, found
+
+    async def _emit_listing_items(self, found: dict[str, Item | None], emit, page_url: str | None = None) -> None:
+        """Отдает новые карточки страницы в emit.
+
+        Страница page_url попадает в HTTP-кэш, только когда все ее объявления уже
+        сохранены или отсеяны: если она не изменится, пропускать в ней нечего.
+        """
+        entries = await asyncio.to_thread(self._select_listing_items, found)
+        for entry in entries:
+            emit(entry)
+        if page_url is None or self.http_cache is None:
+            return
+        if not entries and await asyncio.to_thread(self._listing_page_settled, found):
+            self._commit_cache([page_url])
+        else:
+            self._discard_cache(page_url)
 
+    def _listing_page_settled(self, found: dict[str, Item | None]) -> bool:
+        """Все объявления страницы выдачи есть в viewed или не проходят фильтры."""
+        if self.db_handler is None or not found:
+            return False
+        urls = [
+            url for url, item in found.items()
+            if item is None or not self.listing_filter or self.listing_filter.reject_reason(item) is None
+        ]
+        ids = {self._extract_item_id(url) for url in urls}
+        if None in ids:
+            return False
         try:
-            html_code = self.fetch_data(url=url, retries=self.config.max_count_of_retry)
+            return len(self.db_handler.existing_ids(list(ids))) == len(ids)
         except Exception as exc:
-            attempts = self._increment_error(url)
+            logger.debug(f"Не удалось проверить объявления страницы выдачи в БД: {exc}")
+            return False
+
+    async def _crawl_search_async(self, session: requests.AsyncSession, url: str, emit) -> None:
+        """Обход одной поисковой выдачи из конфига.
+
+        Выдача из urls_file отмечается в контрольной точке, когда обход закончен
+        и все найденные в нем карточки получили итог (см. RunCheckpoint).
+        """
+        if self.checkpoint is None:
+            await self._visit_search_async(session, url, emit)
+            return
+
+        def tracked(entry: str | dict) -> None:
+            self.checkpoint.found(url, self._work_url(entry))
+            emit(entry)
+
+        ok = await self._visit_search_async(session, url, tracked)
+        self.checkpoint.walked(url, ok and not self._should_stop())
+
+    async def _visit_search_async(self, session: requests.AsyncSession, url: str, emit) -> bool:
+        """Один визит выдачи; False, если часть выдачи получить не удалось.
+
+        С revisit число новых объявлений выдачи уходит в расписание повторных визитов.
+        """
+        if self.backfill is not None:
+            return await self._crawl_backfill_async(session, url, emit)
+        if self.revisit is None:
+            return await self._crawl_search_once(session, url, emit)
+        found = 0
+
+        def counted(entry: str | dict) -> None:
+            nonlocal found
+            found += 1
+            emit(entry)
+
+        if not await self._crawl_search_once(session, url, counted):
+            return False
+        if not self._should_stop():
+            interval = await asyncio.to_thread(self.revisit.record_search, url, found)
+            logger.info(f"Выдача {url}: новых объявлений {found}, следующий визит через {interval / 60:.0f} мин")
+        return True
+
+    async def _crawl_search_once(self, session: requests.AsyncSession, url: str, emit) -> bool:
+        """Полный обход выдачи, с incremental — от водяного знака; False, если выдачу получить не удалось.
+
+        Водяной знак сдвигается не здесь, а после сохранения карточек обхода (см. WatermarkTracker).
+        """
+        if self.watermarks is None:
+            return await self._crawl_listing_async(session, url, emit)
+        watermark = await asyncio.to_thread(self.watermarks.get, url)
+        key = self.watermark_tracker.begin(url)
+
+        def tracked(entry: str | dict) -> None:
+            self.watermark_tracker.found(key, self._work_url(entry))
+            emit(entry)
+
+        if watermark is None:
+            # первый проход — полный обход, заодно узнаем самое свежее объявление
+            stamps: list[int] = []
+            ok = await self._crawl_listing_async(session, url, tracked, stamps)
+            newest = max(stamps, default=None)
+        else:
+            newest = await self._crawl_incremental_async(session, url, watermark, tracked)
+            ok = newest is not None
+        if not ok:
+            logger.warning(f"Выдача {url}: часть страниц не получена, водяной знак не сдвигаем")
+        elif newest and not self._should_stop():
+            self.watermark_tracker.walked(key, newest)
+        return ok
+
+    def _advance_watermarks(self) -> None:
+        """Сдвигает водяные знаки выдач, все карточки которых уже сохранены."""
+        for search_url, newest in self.watermark_tracker.take_ready():
+            self.watermarks.advance(search_url, newest)
+            logger.debug(f"Выдача {search_url}: водяной знак сдвинут до {newest}")
+
+    async def _crawl_incremental_async(
+        self, session: requests.AsyncSession, url: str, watermark: int, emit
+    ) -> int | None:
+        """Идет по выдаче, отсортированной по дате, пока не встретит объявления не новее watermark.
+
+        Возвращает новый водяной знак или None, если страницу получить не удалось.
+        """
+        sorted_url = date_sorted_url(url)
+        newest = watermark
+        pages = max(1, self.config.count)
+        for page in range(1, pages + 1):
+            stamps: list[int] = []
+            html = await self._crawl_listing_page_async(session, page_url(sorted_url, page), emit, stamps)
+            if html is None:
+                logger.warning(f"Выдача {url}: не удалось получить стр. {page}, водяной знак не сдвигаем")
+                return None
+            if not isinstance(html, str) or not stamps:
+                break
+            newest = max(newest, max(stamps))
+            if min(stamps) <= watermark:
+                logger.info(f"Выдача {url}: новые объявления закончились на стр. {page}")
+                break
+        else:
+            logger.warning(f"Выдача {url}: за {pages} стр. не дошли до водяного знака, часть новых объявлений пропущена")
+        return newest
+
+    async def _crawl_backfill_async(self, session: requests.AsyncSession, url: str, emit) -> bool:
+        """Обходит незавершенные окна догрузки одной выдачи за один проход по ее страницам.
+
+        Фильтра по дате у Авито нет, поэтому окна ищутся в выдаче, отсортированной по
+        дате: двоичным поиском находим первую страницу, где начинаются объявления старше
+        конца самого позднего окна, и идем вперед, раскладывая объявления по окнам
+        (WindowWalk), пока не встретим объявления старше начала самого раннего. Окно,
+        до начала которого обход не дошел (ошибка, остановка, лимит страниц), остается
+        незавершенным и повторяется при следующем запуске. Возвращает True, если
+        незавершенных окон выдачи не осталось.
+        """
+        finished = await asyncio.to_thread(self.backfill.store.finished, url)
+        walk = WindowWalk([window for window in self.backfill.windows if window not in finished])
+        logger.info(
+            f"Выдача {url}: окон догрузки {len(self.backfill.windows)}, "
+            f"уже завершено {len(self.backfill.windows) - len(walk.windows)}"
+        )
+        if not walk.windows:
+            return True
+        sorted_url = date_sorted_url(url)
+        # страницы, скачанные при поиске, не запрашиваем второй раз
+        loaded: dict[int, dict[str, Item | None] | None] = {}
+        total_pages = 1
+
+        async def load(pages: Iterable[int]) -> None:
+            nonlocal total_pages
+            missing = [page for page in pages if page not in loaded]
+            responses = await asyncio.gather(*(
+                self._fetch_listing_page_async(session, page_url(sorted_url, page)) for page in missing
+            ))
+            for page, (html, found) in zip(missing, responses):
+                # сортированные по дате страницы в HTTP-кэш не попадают: окнам нужны даты объявлений
+                self._discard_cache(page_url(sorted_url, page))
+                if not isinstance(html, str):
+                    # UNCHANGED из HTTP-кэша тоже не подходит: без объявлений не узнать даты
+                    logger.warning(f"Выдача {url}: не удалось получить стр. {page} для окон догрузки")
+                    loaded[page] = None
+                    continue
+                if page == 1:
+                    total_pages = (
+                        self.api_client.total_pages(html) if self.api_client is not None
+                        else extract_total_pages(html)
+                    )
+                loaded[page] = found
+
+        def oldest(found: dict[str, Item | None]) -> int | None:
+            """Самая ранняя дата страницы; None — дат нет (разметка без JSON, одни продвигаемые)."""
+            return min(self._listing_stamps(found), default=None)
+
+        def walked(windows: list[tuple[int, int]]) -> None:
+            for window in windows:
+                self.backfill.walked((url, *window))
+
+        await load([1])
+        first = loaded[1]
+        if first is None:
+            return False
+        if first and not self._listing_stamps(first):
+            logger.warning(f"Выдача {url}: в выдаче нет дат объявлений, догрузка по окнам невозможна")
+            return False
+        pages = min(max(1, self.config.count), total_pages)
+
+        low, high = 1, pages
+        while low < high:
+            middle = (low + high) // 2
+            await load([middle])
+            if loaded[middle] is None:
+                return False
+            middle_oldest = oldest(loaded[middle])
+            if middle_oldest is None:
+                logger.warning(f"Выдача {url}: на стр. {middle} нет дат объявлений, окна догрузки остаются открытыми")
+                return False
+            if middle_oldest < walk.newest_end:
+                high = middle
+            else:
+                low = middle + 1
+        for page in [page for page in loaded if page < low]:
+            del loaded[page]
+
+        for chunk_start in range(low, pages + 1, self._concurrency):
+            chunk = range(chunk_start, min(pages, chunk_start + self._concurrency - 1) + 1)
+            if self._should_stop():
+                return False
+            await load(chunk)
+            for page in chunk:
+                found = loaded.pop(page)
+                if found is None:
+                    return False
+                await self._emit_window_items(url, walk, found, emit)
+                page_oldest = oldest(found)
+                if page_oldest is None:
+                    # без дат не понять, какие окна пройдены: оставляем их открытыми
+                    logger.warning(f"Выдача {url}: на стр. {page} нет дат объявлений, окна догрузки остаются открытыми")
+                    return False
+                walked(walk.reached(page_oldest))
+                if not walk.remaining():
+                    return True
+        if pages == total_pages and total_pages < self.config.max_listing_pages:
+            # выдача кончилась: объявлений старше последней страницы в ней нет
+            walked(walk.reached(-1))
+            return True
+        logger.warning(
+            f"Выдача {url}: {len(walk.remaining())} окон не уместились в {pages} стр., "
+            f"они останутся незавершенными"
+        )
+        return False
+
+    async def _emit_window_items(
+        self, url: str, walk: WindowWalk, found: dict[str, Item | None], emit
+    ) -> None:
+        """Отдает объявления страницы, попавшие в непройденные окна, и учитывает их в окнах.
+
+        Объявления без даты отдаются без окна: завершение окон они не задерживают.
+        """
+        keys: dict[str, tuple | None] = {}
+        for link, item in found.items():
+            if item is None or not item.sortTimeStamp:
+                keys[link] = None
+            elif (window := walk.window_of(item.sortTimeStamp)) is not None:
+                keys[link] = (url, *window)
+
+        def emit_found(entry: str | dict) -> None:
+            key = keys.get(self._work_url(entry))
+            if key is not None:
+                self.backfill.found(key, self._work_url(entry))
+            emit(entry)
+
+        await self._emit_listing_items({link: found[link] for link in keys}, emit_found)
+
+    async def _crawl_listing_async(
+        self, session: requests.AsyncSession, url: str, emit, stamps: list[int] | None = None
+    ) -> bool:
+        """Стадия выдачи: страница 1, по ней число страниц, затем страницы 2..count параллельно.
+
+        Если включен split_queries и выдача упирается в лимит пагинации Авито, она
+        делится на срезы (регион, диапазон цен), которые обходятся параллельно тем же
+        способом. Срезы не пересекаются, а повторы карточек отсекает _select_listing_items.
+        Возвращает False, если не удалось получить хотя бы одну страницу.
+        """
+        first_page = await self._crawl_listing_page_async(session, url, emit, stamps)
+        if first_page is None:
+            logger.warning(f"Не удалось получить первую страницу выдачи {url}")
+            return False
+        pages = max(1, self.config.count)
+        if isinstance(first_page, str):
+            total_pages = (
+                self.api_client.total_pages(first_page) if self.api_client is not None
+                else extract_total_pages(first_page)
+            )
+            if self.config.split_queries and total_pages >= self.config.max_listing_pages:
+                slices = self._split_listing(url)
+                if slices:
+                    logger.info(f"Выдача {url}: не меньше {total_pages} стр., делим на {len(slices)} срезов")
+                    parts = [self._crawl_listing_async(session, part, emit, stamps) for part in slices]
+                    if drops_unpriced(url, slices):
+                        # вакансии без зарплаты в ценовые срезы не попадают: берем их из доступных
+                        # страниц исходной выдачи, повторы карточек отсечет _select_listing_items
+                        logger.warning(
+                            f"Выдача {url}: вакансии без зарплаты не попадают в срезы по цене, "
+                            f"из них доступны только первые {min(pages, total_pages)} стр. исходной выдачи"
+                        )
+                        parts += [
+                            self._crawl_listing_page_async(session, page_url(url, page), emit, stamps)
+                            for page in range(2, min(pages, total_pages) + 1)
+                        ]
+                    return self._pages_fetched(await asyncio.gather(*parts))
+                logger.warning(f"Выдачу {url} больше не разделить, доступны только первые {total_pages} стр.")
+            pages = min(pages, total_pages)
+        logger.info(f"Выдача {url}: обходим {pages} стр.")
+        if pages > 1:
+            return self._pages_fetched(await asyncio.gather(*(
+                self._crawl_listing_page_async(session, page_url(url, page), emit, stamps)
+                for page in range(2, pages + 1)
+            )))
+        return True
+
+    @staticmethod
+    def _pages_fetched(results: list) -> bool:
+        """Итоги страниц и срезов выдачи: None у страницы и False у среза — неудача."""
+        return not any(result is None or result is False for result in results)
+
+    def _split_listing(self, url: str) -> list[str]:
+        """Непересекающиеся срезы выдачи по региону, затем по диапазону цен из конфига."""
+        return split_query(
+            url,
+            regions=self.config.split_regions or AVITO_REGIONS,
+            min_price=self.config.min_price,
+            max_price=self.config.max_price,
+        )
+
+    def _expand_listing(self, url: str) -> list[str | dict]:
+        """Синхронно обходит выдачу и возвращает найденные URL карточек (или записи)."""
+        found: list[str | dict] = []
+        self._listing_worker([url], lambda item: found.append(item) if item else None)
+        return found
+
+    def parse_frontier(self) -> None:
+        """Цикл парсинга из общей очереди URL, которую делят несколько узлов.
+
+        Локальные URL только добавляются в очередь (повторы ожидающих URL игнорируются),
+        поэтому все узлы можно запускать с одним и тем же конфигом без ручного деления
+        файлов. Уже сохраненные вакансии в очередь не попадают: их отсеивает viewed,
+        а снятые и удаленные — негативный кэш. URL подтверждается после сохранения
+        пачки, в которую попал его результат; URL, отданный браузерной полосе, — после
+        того, как полоса его обработала, а если браузер не справился, он возвращается
+        в очередь через nack. Страница выдачи раскрывается в URL карточек, которые
+        тоже уходят в общую очередь.
+        """
+        self.load_cookies()
+        self._parse_start_ts = time.time()
+        self._first_request_ts = None
+        self._reset_run_state()
+        added = self.frontier.push(self._drop_negative(self._drop_viewed(self._collect_urls())))
+        logger.info(f"Добавлено в общую очередь {added} новых URL, в работе {self.frontier.pending_count()}")
+        self._start_browser_lane()
+
+        self.start_scroll_page_thread('https://www.avito.ru/all/vakansii')
+
+        batch: list[dict] = []
+        unacked: list[str] = []
+        while not self._should_stop():
+            leased = self.frontier.lease(self.BATCH_SIZE, self.config.frontier_lease_seconds)
+            if not leased:
+                if self.frontier.pending_count() == 0:
+                    break
+                # остальное в аренде у других узлов: ждем подтверждения или истечения аренды
+                time.sleep(self.FRONTIER_IDLE_SLEEP)
+                continue
+
+            for position, url in enumerate(leased):
+                if self._should_stop():
+                    logger.info("Получен сигнал остановки, возвращаем URL в очередь")
+                    self.frontier.release(leased[position:])
+                    break
+                if self._is_listing_url(url):
+                    found = self._expand_listing(url)
+                    cards = [entry for entry in found if isinstance(entry, str)]
+                    added = self.frontier.push(self._drop_negative(self._drop_viewed(cards)))
+                    # карточки надежно лежат в общей очереди: для водяного знака выдачи они обработаны
+                    for card in cards:
+                        self._settle_found(card, True)
+                    records = [entry for entry in found if isinstance(entry, dict)]
+                    logger.info(f"Выдача {url}: добавлено в общую очередь {added} карточек, записей {len(records)}")
+                    batch.extend(records)
+                    unacked.append(url)
+                    continue
+                if not self._claim_url(url):
+                    self.frontier.ack([url])
+                    continue
+                self._maybe_refresh_playwright()
+
+                result = self.fetch_and_parse(url)
+                if result is FetchOutcome.DEFERRED:
+                    # подтвердится, когда браузерная полоса вернет итог этого URL
+                    pass
+                elif isinstance(result, FetchOutcome):
+                    logger.debug(f"Пропускаем {url}: {result.value}")
+                    self.frontier.ack([url])
+                elif result:
+                    batch.append(result)
+                    unacked.append(url)
+                    self._processed_counter += 1
+                    self._log_throughput(self._processed_counter)
+                else:
+                    self._release_url(url)
+                    self.frontier.nack(url, self.config.max_count_of_retry)
+
+                lane_settled: list[tuple[str, bool]] = []
+                batch.extend(self._drain_browser_lane(lane_settled))
+                unacked.extend(self._settle_lane_urls(lane_settled))
+                if len(batch) >= self.BATCH_SIZE:
+                    logger.info(f"Сохраняем пачку из {len(batch)} записей")
+                    self._save_and_clear_results(batch)
+                    self.frontier.ack(unacked)
+                    batch, unacked = [], []
+
+                self._log_progress()
+
+        unacked.extend(self._settle_lane_urls(self._finish_run(batch)))
+        self.frontier.ack(unacked)
+
+    def _settle_lane_urls(self, settled: list[tuple[str, bool]]) -> list[str]:
+        """Возвращает в общую очередь URL, с которыми не справился браузер; остальные — к подтверждению."""
+        processed = []
+        for url, ok in settled:
+            if ok:
+                processed.append(url)
+            else:
+                self.frontier.nack(url, self.config.max_count_of_retry)
+        return processed
+
+    def parse_async(self) -> None:
+        """Асинхронный цикл парсинга: несколько запросов в полёте на каждый прокси."""
+        urls = self._start_run()
+        if not urls:
+            return
+        batch: list[dict] = []
+        try:
+            asyncio.run(self._crawl_async(urls, batch))
+        finally:
+            self._finish_run(batch)
+
+    async def _crawl_async(self, urls: Iterable[str], batch: list[dict]) -> None:
+        """Раздает URL воркерам, работающим поверх одной AsyncSession.
+
+        Страницы выдачи обходятся задачами-производителями в том же event loop:
+        найденные карточки сразу попадают в очередь воркеров.
+        """
+        work_queue: asyncio.Queue[str | dict | None] = asyncio.Queue()
+        # все запросы идут через текущий прокси (cookies привязаны к его идентичности),
+        # остальные прокси пула — резерв для ротации и хеджей
+        self._concurrency = max(1, self.config.concurrency_per_proxy)
+        self._proxy_semaphores = {}
+        save_lock = asyncio.Lock()
+        logger.info(f"Асинхронный режим: до {self._concurrency} запросов одновременно")
+
+        async with requests.AsyncSession(max_clients=self._concurrency) as session:
+            self.async_session = session
+            self._apply_cookies_to_session(self.cookies)
+            try:
+                workers = [
+                    asyncio.create_task(self._async_worker(session, work_queue, batch, save_lock))
+                    for _ in range(self._concurrency)
+                ]
+                await self._feed_async(session, urls, work_queue)
+                for _ in workers:
+                    work_queue.put_nowait(None)
+                await asyncio.gather(*workers)
+            finally:
+                self.async_session = None
+                self._concurrency = 1
+
+    async def _feed_async(self, session: requests.AsyncSession, urls: Iterable[str], work_queue: asyncio.Queue) -> None:
+        """Читает источник URL порциями в потоке и раздает его по мере обработки.
+
+        Карточки уходят в очередь воркеров, пока в ней меньше FEED_AHEAD URL на воркер,
+        для выдач запускаются задачи-производители. Возвращается, когда источник
+        прочитан и все выдачи обойдены.
+        """
+        urls = iter(urls)
+        listings = []
+        while chunk := await asyncio.to_thread(list, islice(urls, self.FEED_CHUNK)):
+            for url in chunk:
+                if self._is_listing_url(url):
+                    listings.append(asyncio.create_task(self._crawl_search_async(session, url, work_queue.put_nowait)))
+                    continue
+                while work_queue.qsize() >= self._concurrency * self.FEED_AHEAD and not self._should_stop():
+                    await asyncio.sleep(self.FEED_POLL)
+                if self._should_stop():
+                    break
+                work_queue.put_nowait(url)
+            if self._should_stop():
+                break
+        await asyncio.gather(*listings)
+
+    def parse_backfill(self) -> None:
+        """Догрузка за период start_date..end_date окнами по дню или часу.
+
+        Окна обходятся асинхронным движком; завершенные окна записываются в backfill.db,
+        и повторный запуск обходит только незавершенные.
+        """
+        if not self.config.start_date or not self.config.end_date:
+            logger.error("Для догрузки нужны start_date и end_date")
+            return
+        windows = backfill_windows(self.config.start_date, self.config.end_date, self.config.backfill_granularity)
+        self.backfill = BackfillTracker(BackfillStore(), windows)
+        logger.info(
+            f"Догрузка {self.config.start_date}..{self.config.end_date}: "
+            f"{len(windows)} окон по {self.config.backfill_granularity}"
+        )
+        urls = self._start_run()
+        if not urls:
+            return
+        batch: list[dict] = []
+        try:
+            asyncio.run(self._crawl_async(urls, batch))
+        finally:
+            self._finish_run(batch)
+            self.backfill.store.mark_finished(self.backfill.take_ready())
+            logger.info(self.backfill.summary())
+
+    def _settle_found(self, url: str, ok: bool) -> None:
+        """Итог карточки без запроса (взята другим процессом, ушла в общую очередь)."""
+        if self.backfill is not None:
+            self.backfill.settle(url, ok)
+        if self.watermark_tracker is not None:
+            self.watermark_tracker.settle(url, ok)
+        if self.checkpoint is not None:
+            if ok:
+                self.checkpoint.finished(url)
+            else:
+                self.checkpoint.failed(url)
+
+    def _settle(self, url: str, result) -> None:
+        """Итог URL для окон догрузки, водяных знаков и контрольной точки.
+
+        Записи учитываются только при сохранении пачки (см. _save_and_clear_results),
+        а запись, отложенная в браузерную полосу, может до сохранения не дойти.
+        """
+        if isinstance(result, dict):
+            return
+        ok = isinstance(result, FetchOutcome) and result is not FetchOutcome.DEFERRED
+        if self.backfill is not None:
+            self.backfill.settle(url, ok)
+        if self.watermark_tracker is not None:
+            self.watermark_tracker.settle(url, ok)
+        if self.checkpoint is not None and ok:
+            self.checkpoint.finished(url)
+
+    async def _async_worker(
+        self,
+        session: requests.AsyncSession,
+        work_queue: asyncio.Queue,
+        batch: list[dict],
+        save_lock: asyncio.Lock,
+    ) -> None:
+        """Берет URL из очереди до сигнала завершения (None) или остановки."""
+        while True:
+            if self._should_stop():
+                logger.info("Получен сигнал остановки, завершаем парсинг")
+                return
+            entry = await work_queue.get()
+            if entry is None:
+                return
+            url = self._work_url(entry)
+            if not await asyncio.to_thread(self._claim_url, url):
+                self._settle_found(url, True)
+                continue
+            if isinstance(entry, dict):
+                result = entry
+            else:
+                await asyncio.to_thread(self._maybe_refresh_playwright)
+                result = await self.fetch_and_parse_async(session, url)
+            if isinstance(result, FetchOutcome):
+                logger.debug(f"Пропускаем {url}: {result.value}")
+            elif result:
+                batch.append(result)
+                self._processed_counter += 1
+                self._log_throughput(self._processed_counter)
+            else:
+                await asyncio.to_thread(self._release_url, url)
+            self._settle(url, result)
+
+            batch.extend(self._drain_browser_lane())
+            if len(batch) >= self.BATCH_SIZE:
+                chunk = batch[:]
+                batch.clear()
+                async with save_lock:
+                    logger.info(f"Сохраняем пачку из {len(chunk)} записей")
+                    await asyncio.to_thread(self._save_and_clear_results, chunk)
+
+            self._log_progress()
+
+    def _handle_fetch_failure(self, url: str, exc: Exception | None = None):
+        """Считает неудачу по URL и после третьей открывает его через Selenium."""
+        attempts = self._increment_error(url)
+        if exc is not None:
             logger.error(f"Ошибка при парсинге через requests URL {url}: {exc}")
-            logger.error(f"Трассировка ошибки: {traceback.format_exc()}")
+            logger.error(f"Трассировка ошибки: {''.join(traceback.format_exception(exc))}")
             if attempts >= 3:
                 logger.info(f"Ошибка повторяется {attempts} раза для {url}, открываем через Selenium")
-                return self.parse_with_selenium(url)
+                return self._browser_fallback(url)
             return None
 
-        if not html_code:
-            attempts = self._increment_error(url)
-            logger.warning(f"Не удалось получить HTML для URL {url}, попытка {attempts}")
-            if attempts >= 3:
-                logger.info(f"Повторная ошибка для {url}, открываем через Selenium")
-                return self.parse_with_selenium(url)
+        logger.warning(f"Не удалось получить HTML для URL {url}, попытка {attempts}")
+        if attempts >= 3:
+            logger.info(f"Повторная ошибка для {url}, открываем через Selenium")
+            return self._browser_fallback(url)
+        return None
+
+    def _fetch_target(self, url: str) -> tuple[str, dict[str, str] | None]:
+        """URL запроса и дополнительные заголовки для страницы Авито с учетом транспорта."""
+        if self.api_client is None:
+            return url, None
+        if self._is_listing_url(url):
+            return self.api_client.search_url(url), API_HEADERS
+        return self.api_client.item_url(self._extract_item_id(url)), API_HEADERS
+
+    def _parse_page_result(self, text: str, url: str):
+        """Разбирает ответ выбранного транспорта: HTML-страницу или JSON API.
+
+        Если записи не получилось (ошибка, отсеяна, ушла в браузер), страница не
+        попадает в HTTP-кэш; запись попадет в него после сохранения пачки.
+        """
+        result = self._parse_transport_result(text, url)
+        if not isinstance(result, dict):
+            self._discard_cache(url)
+        return result
+
+    def _parse_transport_result(self, text: str, url: str):
+        if self.api_client is None:
+            return self._parse_html_result(text, url)
+        item = self.api_client.parse_item(text)
+        if item is None:
+            logger.warning(f"Не удалось разобрать ответ API для URL: {url}")
             return None
+        self.api_client.record(self._fetch_target(url)[0], text)
+        return self._accept_record({**item_to_record(item, url), 'is_detailed_parsed': True}, url)
+
+    def _start_browser_lane(self) -> None:
+        """Запускает браузерную полосу на время прохода (browser_workers = 0 — без нее)."""
+        if self.config.browser_workers > 0 and self.browser_lane is None:
+            self.browser_lane = BrowserLane(self, self.config.browser_workers, self.config.browser_queue_size)
+
+    def _browser_fallback(self, url: str):
+        """Отдает URL браузеру: в полосу, если она запущена, иначе сразу в этом потоке.
+
+        Снятые и удаленные вакансии в браузер не отдаются.
+        """
+        reason = self.negative_cache.reason(url) if self.negative_cache is not None else None
+        if reason is not None:
+            logger.info(f"Вакансия {url} в негативном кэше ({reason}), браузер не открываем")
+            return FetchOutcome(reason)
+        if self.browser_lane is None:
+            return self.parse_with_selenium(url)
+        if self.browser_lane.submit(url):
+            return FetchOutcome.DEFERRED
+        logger.warning(f"Очередь браузера заполнена, {url} переносится на следующий проход")
+        return None
 
+    def _drain_browser_lane(self, settled: list[tuple[str, bool]] | None = None) -> list[dict]:
+        """Записи, полученные браузерной полосой с прошлого вызова (итоги URL — в settled)."""
+        if self.browser_lane is None:
+            return []
+        results, lane_settled = self.browser_lane.drain()
+        if settled is not None:
+            settled.extend(lane_settled)
+        for _ in results:
+            self._processed_counter += 1
+            self._log_throughput(self._processed_counter)
+        return results
+
+    def _parse_html_result(self, html_code: str, url: str):
+        """Разбирает HTML вакансии и сбрасывает счетчик ошибок при успехе."""
         result = self._parse_detailed_job_info(html_code, url)
-        if result:
-            logger.info(f"Успешно спарсили URL: {url}")
+        if isinstance(result, FetchOutcome):
             self._reset_error(url)
+            self._record_outcome(url, result)
             return result
+        if result and not (result.get('vacancy_name') and result.get('description') and result.get('publish_dt')):
+            self._fill_from_page_state(result, html_code, url)
+        if result:
+            return self._accept_record(result, url)
 
         logger.warning(f"Не удалось распарсить URL: {url}")
         return None
 
-    def _apply_cookies_to_driver(self, cookies: dict | None) -> None:
-        """Добавляет куки в Selenium-драйвер."""
+    def _accept_record(self, result: dict, url: str):
+        """Проверяет запись с карточки фильтрами ключевых слов и сбрасывает счетчик ошибок."""
+        self._reset_error(url)
+        if self.listing_filter.checks_records:
+            reason = self.listing_filter.record_reject_reason(result)
+            if reason:
+                logger.info(f"Вакансия {url} отсеяна фильтром {reason}")
+                self._mark_viewed([url])
+                self._record_outcome(url, FetchOutcome.FILTERED)
+                return FetchOutcome.FILTERED
+        logger.info(f"Успешно спарсили URL: {url}")
+        return result
+
+    @classmethod
+    def _fill_from_page_state(cls, result: dict, html_code: str, url: str) -> None:
+        """Дополняет поля, не найденные XPath, данными из JSON-состояния карточки."""
+        item = extract_item(html_code, cls._extract_item_id(url))
+        if item is None:
+            return
+        for key, value in item_to_record(item, url).items():
+            if value and not result.get(key):
+                result[key] = value
+
+    def fetch_and_parse(self, url: str):
+        """Парсинг через requests с обработкой ошибок."""
+        if self._should_stop():
+            return None
+
+        fetch_url, headers = self._fetch_target(url)
+        try:
+            html_code = self.fetch_data(url=fetch_url, retries=self.config.max_count_of_retry, extra_headers=headers)
+        except Exception as exc:
+            return self._handle_fetch_failure(url, exc)
+
+        if isinstance(html_code, FetchOutcome):
+            self._reset_error(url)
+            self._record_outcome(url, html_code)
+            return html_code
+        if not html_code:
+            return self._handle_fetch_failure(url)
+
+        return self._parse_page_result(html_code, url)
+
+    async def fetch_and_parse_async(self, session: requests.AsyncSession, url: str):
+        """Асинхронный вариант fetch_and_parse; Selenium и разбор HTML выполняются в потоках."""
+        if self._should_stop():
+            return None
+
+        fetch_url, headers = self._fetch_target(url)
+        try:
+            html_code = await self.fetch_data_async(
+                session, url=fetch_url, retries=self.config.max_count_of_retry, extra_headers=headers
+            )
+        except Exception as exc:
+            return await asyncio.to_thread(self._handle_fetch_failure, url, exc)
+
+        if isinstance(html_code, FetchOutcome):
+            self._reset_error(url)
+            self._record_outcome(url, html_code)
+            return html_code
+        if not html_code:
+            return await asyncio.to_thread(self._handle_fetch_failure, url)
+
+        return await asyncio.to_thread(self._parse_page_result, html_code, url)
+
+    def _record_outcome(self, url: str, outcome: FetchOutcome) -> None:
+        """Снятая или удаленная вакансия попадает в негативный кэш и больше не перепроверяется.
+
+        Неизменившаяся или отсеянная вакансия активна: следующая перепроверка откладывается.
+        """
+        if outcome in (FetchOutcome.UNCHANGED, FetchOutcome.FILTERED):
+            if self.revisit is not None:
+                self.revisit.record_checked(url)
+            return
+        if outcome not in (FetchOutcome.CLOSED, FetchOutcome.NOT_FOUND):
+            return
+        if self.negative_cache is not None:
+            self.negative_cache.add(url, outcome.value)
+        if self.revisit is not None:
+            self.revisit.record_closed(url)
+
+    def _apply_cookies_to_driver(self, cookies: dict | None, driver=None) -> None:
+        """Добавляет куки в Selenium-драйвер (по умолчанию — в общий драйвер парсера)."""
         if not cookies or not isinstance(cookies, dict):
             return
         with self._selenium_lock:
-            if not self.selenium_driver:
+            driver = driver or self.selenium_driver
+            if not driver:
                 return
             for key, value in cookies.items():
                 try:
-                    self.selenium_driver.add_cookie({
+                    driver.add_cookie({
                         'name': key,
                         'value': value,
                         'domain': '.avito.ru',
@@ -819,7 +2586,7 @@ class AvitoParse:
                     logger.warning(f"Не удалось установить куки {key}: {exc}")
 
     def parse_with_selenium(self, url: str, cookies: dict | None = None):
-        """Парсинг через Selenium как запасной вариант."""
+        """Парсинг через Selenium как запасной вариант (общий драйвер парсера)."""
         if self._should_stop():
             return None
 
@@ -829,70 +2596,79 @@ class AvitoParse:
             driver = self.selenium_driver
             if not driver:
                 return None
+            return self._browse_and_parse(driver, url, cookies)
 
-            try:
-                now_ts = time.time()
-                if not self._last_selenium_route or now_ts - self._last_selenium_route > self.SELENIUM_ROUTE_INTERVAL:
-                    self._selenium_prepare_route(driver)
-                    self._last_selenium_route = time.time()
+    def _browse_and_parse(self, driver, url: str, cookies: dict | None = None):
+        """Открывает URL в браузере с имитацией пользователя и разбирает итоговый HTML."""
+        try:
+            now_ts = time.time()
+            if not self._last_selenium_route or now_ts - self._last_selenium_route > self.SELENIUM_ROUTE_INTERVAL:
+                self._selenium_prepare_route(driver)
+                self._last_selenium_route = time.time()
 
+            driver.get(url)
+            self._apply_cookies_to_driver(cookies, driver)
+            if cookies:
                 driver.get(url)
-                self._apply_cookies_to_driver(cookies)
-                if cookies:
-                    driver.get(url)
-
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
 
-                total_height = driver.execute_script("return document.body.scrollHeight")
-                scroll_iterations = random.randint(*self.SELENIUM_SCROLL_ITER_RANGE)
-                scroll_pause_time = random.uniform(*self.SELENIUM_SCROLL_PAUSE_RANGE)
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.TAG_NAME, "body"))
+            )
 
-                for _ in range(scroll_iterations):
-                    if self._should_stop():
-                        break
-                    driver.execute_script(f"window.scrollBy(0, {total_height * 0.05});")
-                    time.sleep(scroll_pause_time)
+            total_height = driver.execute_script("return document.body.scrollHeight")
+            scroll_iterations = random.randint(*self.SELENIUM_SCROLL_ITER_RANGE)
+            scroll_pause_time = random.uniform(*self.SELENIUM_SCROLL_PAUSE_RANGE)
 
-                for _ in range(scroll_iterations):
-                    if self._should_stop():
-                        break
-                    driver.execute_script(f"window.scrollBy(0, -{total_height * 0.1});")
-                    time.sleep(scroll_pause_time)
+            for _ in range(scroll_iterations):
+                if self._should_stop():
+                    break
+                driver.execute_script(f"window.scrollBy(0, {total_height * 0.05});")
+                time.sleep(scroll_pause_time)
 
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            for _ in range(scroll_iterations):
+                if self._should_stop():
+                    break
+                driver.execute_script(f"window.scrollBy(0, -{total_height * 0.1});")
                 time.sleep(scroll_pause_time)
-                self._simulate_human_interaction(driver)
-                self._selenium_explore_tabs(driver)
-                html_content = driver.page_source
-                self._selenium_try_related(driver, url)
-                if html_content:
-                    return self._parse_detailed_job_info(html_content, url)
-                return None
-            except Exception as exc:
-                logger.error(f"Ошибка при парсинге через Selenium URL {url}: {exc}")
-                logger.error(f"Трассировка: {traceback.format_exc()}")
+
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            time.sleep(scroll_pause_time)
+            self._simulate_human_interaction(driver)
+            self._selenium_explore_tabs(driver)
+            html_content = driver.page_source
+            self._selenium_try_related(driver, url)
+            if not html_content:
                 return None
+            return self._parse_html_result(html_content, url)
+        except Exception as exc:
+            logger.error(f"Ошибка при парсинге через Selenium URL {url}: {exc}")
+            logger.error(f"Трассировка: {traceback.format_exc()}")
+            return None
 
     def init_selenium_driver(self):
         """Инициализация WebDriver для Selenium"""
         with self._selenium_lock:
             if self.selenium_driver is None:
-                chrome_options = Options()
-                chrome_options.add_argument("--log-level=3")
-                chrome_options.add_argument("--no-sandbox")
-                chrome_options.add_argument("--disable-dev-shm-usage")
-                chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-                chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-                chrome_options.add_experimental_option('useAutomationExtension', False)
-                try:
-                    self.selenium_driver = webdriver.Chrome(options=chrome_options)
-                    self.selenium_driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-                    logger.info("Selenium WebDriver инициализирован")
-                except Exception as e:
-                    logger.error(f"Ошибка инициализации Selenium WebDriver: {e}")
-                    self.selenium_driver = None
+                self.selenium_driver = self._create_selenium_driver()
+
+    @staticmethod
+    def _create_selenium_driver():
+        """Новый Chrome WebDriver без признаков автоматизации (None при ошибке)."""
+        chrome_options = Options()
+        chrome_options.add_argument("--log-level=3")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        chrome_options.add_experimental_option('useAutomationExtension', False)
+        try:
+            driver = webdriver.Chrome(options=chrome_options)
+            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            logger.info("Selenium WebDriver инициализирован")
+            return driver
+        except Exception as e:
+            logger.error(f"Ошибка инициализации Selenium WebDriver: {e}")
+            return None
 
     def close_selenium_driver(self):
         """Закрытие WebDriver"""
@@ -1242,7 +3018,7 @@ class AvitoParse:
         self._selenium_prepare_route(driver)
 
     def _parse_detailed_job_info(self, html_content: str, url: str):
-        """Извлекает данные о вакансии из HTML-страницы."""
+        """Извлекает данные о вакансии из HTML-страницы; для снятой вакансии — FetchOutcome.CLOSED."""
         try:
             soup = BeautifulSoup(html_content, 'lxml')
             response = etree.HTML(str(soup))
@@ -1343,10 +3119,11 @@ class AvitoParse:
                     'employer_id': None,
                     'driver_license_types': None,
                     'pay_period': pay_period_result if pay_period else None,
+                    'is_detailed_parsed': True,
                 }
                 return data
             else: 
-                return None
+                return FetchOutcome.CLOSED
         except Exception as e:
             logger.error(f"Ошибка при парсинге URL {url}: {e}")
             return None
@@ -1371,17 +3148,47 @@ class AvitoParse:
             with open('parsed_results.json', 'w', encoding='utf-8') as f:
                 json.dump(valid_results, f, ensure_ascii=False, indent=2, default=str)
             logger.info(f"Сохранены {len(valid_results)} результатов в parsed_results.json")
+            if self.revisit is not None:
+                self.revisit.track_vacancies(valid_results)
             # Сохраняем в БД
             if self.db_handler:
                 logger.info(f"Пытаюсь сохранить {len(valid_results)} записей в БД")
-                self.db_handler.add_record_from_page(valid_results)
+                # записи upsert: карточка, догруженная позже (upgrade_to_detail), заменяет запись из выдачи
+                self.db_handler.upsert_records([
+                    (item_id, result) for result in valid_results
+                    if (item_id := self._extract_item_id(result['external_id'])) is not None
+                ])
+                self._mark_viewed(result['external_id'] for result in valid_results)
                 logger.info(f"Сохранены {len(valid_results)} результатов в БД")
             else:
                 logger.warning("БД не подключена, сохранение пропущено")
+            self._commit_cache(result['external_id'] for result in valid_results)
+            if self.checkpoint is not None:
+                for result in valid_results:
+                    self.checkpoint.finished(result['external_id'])
+                self.checkpoint.commit()
+            if self.watermark_tracker is not None:
+                for result in valid_results:
+                    self.watermark_tracker.settle(result['external_id'], True)
+                self._advance_watermarks()
+            if self.backfill is not None:
+                # окна догрузки отмечаются завершенными только после записи их карточек
+                for result in valid_results:
+                    self.backfill.settle(result['external_id'], True)
+                self.backfill.store.mark_finished(self.backfill.take_ready())
         except Exception as e:
             logger.error(f"Ошибка при сохранении результатов: {e}")
             logger.error(f"Трассировка: {traceback.format_exc()}")
 
+    def _mark_viewed(self, urls: Iterable[str]) -> None:
+        """Записывает id объявлений в viewed (и Bloom-фильтр), чтобы не скачивать их снова."""
+        ids = [item_id for item_id in map(self._extract_item_id, urls) if item_id is not None]
+        if not ids or not self.db_handler:
+            return
+        self.db_handler.add_ids(ids)
+        if self.seen_index is not None:
+            self.seen_index.add_many(ids)
+
     def change_ip(self, max_attempts: int = 3) -> bool:
         """Пробует сменить IP согласно настройкам конфигурации."""
         return self._refresh_identity("manual request")
@@ -0,0 +1,100 @@
+import math
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# первый сегмент пути поисковой выдачи по всей стране
+COUNTRY_WIDE_SEGMENTS = ("all", "rossiya")
+
+# регионы Авито для деления общероссийской выдачи (сегмент пути вместо "all")
+AVITO_REGIONS = (
+    "moskva", "moskovskaya_oblast", "sankt-peterburg", "leningradskaya_oblast",
+    "adygeya", "altayskiy_kray", "amurskaya_oblast", "arhangelskaya_oblast",
+    "astrahanskaya_oblast", "bashkortostan", "belgorodskaya_oblast", "bryanskaya_oblast",
+    "buryatiya", "vladimirskaya_oblast", "volgogradskaya_oblast", "vologodskaya_oblast",
+    "voronezhskaya_oblast", "dagestan", "evreyskaya_ao", "zabaykalskiy_kray",
+    "ivanovskaya_oblast", "ingushetiya", "irkutskaya_oblast", "kabardino-balkariya",
+    "kaliningradskaya_oblast", "kalmykiya", "kaluzhskaya_oblast", "kamchatskiy_kray",
+    "karachaevo-cherkesiya", "kareliya", "kemerovskaya_oblast", "kirovskaya_oblast",
+    "komi", "kostromskaya_oblast", "krasnodarskiy_kray", "krasnoyarskiy_kray",
+    "respublika_krym", "kurganskaya_oblast", "kurskaya_oblast", "lipetskaya_oblast",
+    "magadanskaya_oblast", "mariy_el", "mordoviya", "murmanskaya_oblast",
+    "nenetskiy_ao", "nizhegorodskaya_oblast", "novgorodskaya_oblast", "novosibirskaya_oblast",
+    "omskaya_oblast", "orenburgskaya_oblast", "orlovskaya_oblast", "penzenskaya_oblast",
+    "permskiy_kray", "primorskiy_kray", "pskovskaya_oblast", "respublika_altay",
+    "rostovskaya_oblast", "ryazanskaya_oblast", "samarskaya_oblast", "saratovskaya_oblast",
+    "saha_yakutiya", "sahalinskaya_oblast", "sverdlovskaya_oblast", "sevastopol",
+    "severnaya_osetiya", "smolenskaya_oblast", "stavropolskiy_kray", "tambovskaya_oblast",
+    "tatarstan", "tverskaya_oblast", "tomskaya_oblast", "tulskaya_oblast",
+    "tyva", "tyumenskaya_oblast", "udmurtiya", "ulyanovskaya_oblast",
+    "habarovskiy_kray", "hakasiya", "hanty-mansiyskiy_ao", "chelyabinskaya_oblast",
+    "chechenskaya_respublika", "chuvashiya", "chukotskiy_ao", "yamalo-nenetskiy_ao",
+    "yaroslavskaya_oblast",
+)
+
+# уже такой ценовой диапазон не делим: выдача, упершаяся в лимит, остается как есть
+MIN_PRICE_BAND = 1000
+
+
+def _with_params(url: str, **params) -> str:
+    """URL с замененными параметрами запроса (страница p сбрасывается)."""
+    parts = urlsplit(url)
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in params and key != "p"
+    ]
+    query += [(key, str(value)) for key, value in params.items()]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def split_by_region(url: str, regions=AVITO_REGIONS) -> list[str]:
+    """Делит общероссийскую выдачу на региональные; для региональной — пустой список."""
+    parts = urlsplit(url)
+    segments = parts.path.strip("/").split("/")
+    if not segments or segments[0] not in COUNTRY_WIDE_SEGMENTS:
+        return []
+    return [
+        _with_params(urlunsplit(parts._replace(path="/" + "/".join([region, *segments[1:]]))))
+        for region in regions
+    ]
+
+
+def split_by_price(url: str, min_price: int, max_price: int) -> list[str]:
+    """Делит ценовой диапазон выдачи (pmin/pmax) пополам; слишком узкий — не делится.
+
+    Верхний срез без pmax (если его не было в выдаче) открыт сверху. Вакансии без
+    зарплаты не попадают ни в один ценовой срез — см. drops_unpriced.
+    """
+    query = dict(parse_qsl(urlsplit(url).query))
+    low = int(query.get("pmin", min_price))
+    high = int(query.get("pmax", max_price))
+    if high - low <= MIN_PRICE_BAND:
+        return []
+    # середина в геометрическом смысле: цены распределены скорее логарифмически,
+    # поэтому пустые верхние диапазоны отсекаются за несколько шагов
+    middle = int(math.sqrt(max(low, 1) * high))
+    middle = min(max(middle, low + MIN_PRICE_BAND // 2), high - 1)
+    top = {"pmin": middle + 1}
+    if "pmax" in query:
+        top["pmax"] = high
+    return [
+        _with_params(url, pmin=low, pmax=middle),
+        _with_params(url, **top),
+    ]
+
+
+def drops_unpriced(url: str, slices: list[str]) -> bool:
+    """True, если срезы впервые вводят фильтр цены: объявления без цены в них пропадут.
+
+    Отдельного фильтра «без зарплаты» у выдачи нет, такие вакансии доступны только
+    в исходной выдаче в пределах лимита пагинации.
+    """
+    def priced(link: str) -> bool:
+        query = dict(parse_qsl(urlsplit(link).query))
+        return "pmin" in query or "pmax" in query
+
+    return not priced(url) and any(priced(link) for link in slices)
+
+
+def split_query(url: str, regions=AVITO_REGIONS, min_price: int = 0, max_price: int = 999_999_999) -> list[str]:
+    """Срезы выдачи, не пересекающиеся между собой: сначала по региону, затем по цене."""
+    return split_by_region(url, regions) or split_by_price(url, min_price, max_price)
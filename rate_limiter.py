@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# общая для всех RateLimitStore процесса: идентичности пула сохраняют скорости параллельно
+_SAVE_LOCK = threading.Lock()
+
+
+class AdaptiveRateLimiter:
+    """Token bucket для одной идентичности (прокси или локальный IP) с AIMD-подстройкой.
+
+    Пока ответы чистые, скорость растет на additive_step запросов/с за каждый ответ;
+    на 429/403 скорость умножается на decrease_factor. Так лимитер сам находит
+    максимальную скорость, которую выдерживает конкретный IP.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        min_rate: float,
+        max_rate: float,
+        additive_step: float = 0.05,
+        decrease_factor: float = 0.5,
+        burst: float = 1.0,
+        jitter: float = 0.2,
+    ):
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, min_rate)
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+        self.additive_step = additive_step
+        self.decrease_factor = decrease_factor
+        self.burst = burst
+        self.jitter = jitter
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Резервирует слот под запрос и возвращает, сколько секунд до него ждать."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # небольшой разброс, чтобы интервалы между запросами не были идеально ровными
+            self._tokens -= random.uniform(1 - self.jitter, 1 + self.jitter)
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def on_success(self) -> None:
+        """Аддитивно увеличивает скорость после чистого ответа."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.additive_step)
+
+    def on_throttle(self) -> None:
+        """Мультипликативно снижает скорость и опустошает bucket после 429/403."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._tokens = min(self._tokens, 0.0)
+
+
+class RateLimitStore:
+    """Сохраняет выученные скорости между запусками (JSON: идентичность -> запросов/с).
+
+    Прокси записываются в файл хешем: строка прокси содержит логин и пароль.
+    """
+
+    LOCAL_KEY = "local"
+    PROXY_KEY_PREFIX = "proxy:"
+
+    def __init__(self, path: str = "rate_limits.json"):
+        self.path = Path(path)
+
+    @classmethod
+    def storage_key(cls, identity: str) -> str:
+        """Ключ идентичности в файле: без учетных данных прокси."""
+        if identity == cls.LOCAL_KEY:
+            return identity
+        return cls.PROXY_KEY_PREFIX + hashlib.sha256(identity.encode("utf-8")).hexdigest()[:16]
+
+    @classmethod
+    def _is_storage_key(cls, key: str) -> bool:
+        return key == cls.LOCAL_KEY or key.startswith(cls.PROXY_KEY_PREFIX)
+
+    def load(self) -> dict[str, float]:
+        """Скорости по ключам storage_key."""
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return {
+            str(key): float(value) for key, value in data.items()
+            if isinstance(value, (int, float)) and self._is_storage_key(str(key))
+        }
+
+    def save(self, rates: dict[str, float]) -> None:
+        """Дописывает скорости к сохраненным (другие идентичности и процессы не затираются).
+
+        Все экземпляры в процессе пишут под общей блокировкой, а временный файл у каждой
+        записи свой, поэтому параллельные сохранения не портят друг другу файл.
+        """
+        with _SAVE_LOCK:
+            data = self.load()
+            data.update({self.storage_key(key): round(value, 4) for key, value in rates.items()})
+            fd, tmp_name = tempfile.mkstemp(prefix=f"{self.path.name}.", suffix=".tmp", dir=self.path.parent)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_name, self.path)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
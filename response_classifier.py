@@ -0,0 +1,67 @@
+import re
+from enum import Enum
+
+
+class PageKind(Enum):
+    """Что на самом деле пришло в ответе с кодом 200 (или 404/410)."""
+    OK = "ok"
+    SOFT_BLOCK = "soft_block"  # «Доступ ограничен: проблема с IP»
+    CAPTCHA = "captcha"
+    CLOSED = "closed"  # объявление снято с публикации
+    NOT_FOUND = "not_found"
+
+
+# страницы блокировки маленькие, а обычные страницы Авито весят сотни КБ:
+# маркеры блокировки ищем только в небольших ответах, чтобы не ловить их в скриптах
+BLOCK_PAGE_MAX_BYTES = 256 * 1024
+
+# маркеры ищутся только в разметке: в значениях class/id/name/data-marker и в
+# заголовках страницы. Текст объявления (описание вакансии, JSON состояния страницы,
+# ответы API) может содержать те же слова и блокировкой не считается.
+_ATTRIBUTE_RE = re.compile(rb'\s(?:class|id|name|data-marker)\s*=\s*["\']([^"\'>]*)')
+_HEADING_RE = re.compile(rb"<(title|h1|h2)\b[^>]*>(.*?)</\1\s*>", re.IGNORECASE | re.DOTALL)
+
+_CAPTCHA_ATTRIBUTES = (b"firewall-captcha", b"h-captcha", b"geetest", b"smartcaptcha")
+_CAPTCHA_FIELD = b"captcha"  # name="captcha" у поля ввода
+_SOFT_BLOCK_ATTRIBUTES = (b"firewall-container", b"js-firewall")
+_SOFT_BLOCK_HEADINGS = ("Доступ ограничен".encode("utf-8"), "проблема с IP".encode("utf-8"))
+_CLOSED_RE = re.compile(rb'\sdata-marker\s*=\s*["\']item-view/closed-warning["\']')
+_NOT_FOUND_HEADINGS = ("Такой страницы не существует".encode("utf-8"),)
+
+BLOCK_KINDS = (PageKind.SOFT_BLOCK, PageKind.CAPTCHA)
+NEGATIVE_KINDS = (PageKind.CLOSED, PageKind.NOT_FOUND)
+
+
+def _contains_any(values: list[bytes], markers) -> bool:
+    return any(marker in value for value in values for marker in markers)
+
+
+def _is_html(content: bytes, content_type: str | None) -> bool:
+    """HTML по Content-Type, а без него — по первому символу тела (JSON начинается с { или [)."""
+    if content_type:
+        return "html" in content_type.lower()
+    return content.lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"<")
+
+
+def classify_response(status_code: int, content: bytes | None, content_type: str | None = None) -> PageKind:
+    """Классифицирует ответ по коду и структуре HTML-разметки, без полного разбора.
+
+    Не-HTML ответы (JSON API) классифицируются только по коду.
+    """
+    if status_code in (404, 410):
+        return PageKind.NOT_FOUND
+    content = content or b""
+    if not _is_html(content, content_type):
+        return PageKind.OK
+    if len(content) <= BLOCK_PAGE_MAX_BYTES:
+        attributes = _ATTRIBUTE_RE.findall(content)
+        headings = [text for _, text in _HEADING_RE.findall(content)]
+        if _contains_any(attributes, _CAPTCHA_ATTRIBUTES) or _CAPTCHA_FIELD in attributes:
+            return PageKind.CAPTCHA
+        if _contains_any(attributes, _SOFT_BLOCK_ATTRIBUTES) or _contains_any(headings, _SOFT_BLOCK_HEADINGS):
+            return PageKind.SOFT_BLOCK
+        if _contains_any(headings, _NOT_FOUND_HEADINGS):
+            return PageKind.NOT_FOUND
+    if _CLOSED_RE.search(content):
+        return PageKind.CLOSED
+    return PageKind.OK
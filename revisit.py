@@ -0,0 +1,176 @@
+import sqlite3
+import threading
+import time
+
+from listing_parser import ITEMS_PER_PAGE
+
+# повторный визит выдачи планируется к моменту, когда в ней накопится около
+# половины страницы новых объявлений: одна-две страницы забирают их все
+TARGET_NEW_ITEMS = ITEMS_PER_PAGE // 2
+RATE_SMOOTHING = 0.3  # вес последнего наблюдения в скользящей средней скорости
+RECHECK_BASE_INTERVAL = 6 * 60 * 60  # первая проверка вакансии на закрытие через столько секунд
+
+
+class RevisitScheduler:
+    """Расписание повторных визитов (sqlite).
+
+    Для поисковых выдач хранится скорость появления новых объявлений (в час);
+    следующий визит назначается так, чтобы за интервал набралось TARGET_NEW_ITEMS.
+    Сохраненные вакансии перепроверяются на закрытие: интервал удваивается после
+    каждой проверки, в которой вакансия оказалась активной, а из просроченных
+    первыми идут те, что дольше не проверялись и старше (они чаще закрываются).
+    """
+
+    def __init__(self, db_name: str = "revisit.db", min_interval: int = 300, max_interval: int = 24 * 60 * 60):
+        self.db_name = db_name
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._lock = threading.Lock()
+        self._create_tables()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_name, timeout=30)
+
+    def _create_tables(self):
+        """Создает таблицы searches и vacancies, если они не существуют."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS searches (
+                    search_url TEXT PRIMARY KEY,
+                    rate REAL NOT NULL,
+                    interval REAL NOT NULL,
+                    last_visit REAL NOT NULL,
+                    next_visit REAL NOT NULL
+                )
+                """
+            )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS vacancies (
+                    url TEXT PRIMARY KEY,
+                    published REAL NOT NULL,
+                    last_check REAL NOT NULL,
+                    next_check REAL NOT NULL,
+                    checks INTEGER NOT NULL DEFAULT 0,
+                    closed_at REAL
+                )
+                """
+            )
+            cursor.execute("CREATE INDEX IF NOT EXISTS vacancies_next_check ON vacancies (next_check)")
+            conn.commit()
+
+    def _clamp(self, interval: float) -> float:
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def due_searches(self, search_urls: list[str], now: float | None = None) -> list[str]:
+        """Выдачи, визит которых наступил; новые (без истории) — всегда."""
+        now = now or time.time()
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT search_url, next_visit FROM searches")
+            next_visit = dict(cursor.fetchall())
+        return [url for url in search_urls if next_visit.get(url, 0) <= now]
+
+    def record_search(self, search_url: str, new_items: int, now: float | None = None) -> float:
+        """Учитывает визит выдачи с new_items новыми объявлениями; возвращает интервал до следующего."""
+        now = now or time.time()
+        with self._lock, self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT rate, interval, last_visit FROM searches WHERE search_url = ?", (search_url,))
+            row = cursor.fetchone()
+            if row is None:
+                # первый визит ничего не говорит о скорости: все объявления выдачи для нас новые
+                rate, interval = 0.0, self.min_interval
+            else:
+                prev_rate, prev_interval, last_visit = row
+                hours = max(now - last_visit, 60) / 3600
+                rate = RATE_SMOOTHING * (new_items / hours) + (1 - RATE_SMOOTHING) * prev_rate
+                if rate > 0:
+                    interval = self._clamp(TARGET_NEW_ITEMS / rate * 3600)
+                else:
+                    interval = self._clamp(prev_interval * 2)
+            cursor.execute(
+                """
+                INSERT INTO searches (search_url, rate, interval, last_visit, next_visit) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(search_url) DO UPDATE SET
+                    rate = excluded.rate,
+                    interval = excluded.interval,
+                    last_visit = excluded.last_visit,
+                    next_visit = excluded.next_visit
+                """,
+                (search_url, rate, interval, now, now + interval),
+            )
+            conn.commit()
+        return interval
+
+    def track_vacancies(self, records: list[dict], now: float | None = None) -> None:
+        """Учитывает сохраненные вакансии: новые ставятся в расписание, перепроверенные — активны."""
+        now = now or time.time()
+        rows = [
+            (record['external_id'], float(record.get('publish_dt') or now), now, now + RECHECK_BASE_INTERVAL)
+            for record in records if record.get('external_id')
+        ]
+        if not rows:
+            return
+        with self._lock, self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                """
+                INSERT INTO vacancies (url, published, last_check, next_check) VALUES (?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    checks = checks + 1,
+                    last_check = excluded.last_check,
+                    next_check = excluded.last_check + MIN(?, ? * (1 << MIN(checks + 1, 16))),
+                    closed_at = NULL
+                """,
+                [row + (self.max_interval, RECHECK_BASE_INTERVAL) for row in rows],
+            )
+            conn.commit()
+
+    def record_checked(self, url: str, now: float | None = None) -> None:
+        """Перепроверка без новой записи (не изменилась, отсеяна фильтром): вакансия активна."""
+        now = now or time.time()
+        with self._lock, self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                UPDATE vacancies SET
+                    checks = checks + 1,
+                    last_check = ?,
+                    next_check = ? + MIN(?, ? * (1 << MIN(checks + 1, 16)))
+                WHERE url = ? AND closed_at IS NULL
+                """,
+                (now, now, self.max_interval, RECHECK_BASE_INTERVAL, url),
+            )
+            conn.commit()
+
+    def record_closed(self, url: str, now: float | None = None) -> None:
+        """Вакансия снята или удалена: больше не перепроверяется."""
+        now = now or time.time()
+        with self._lock, self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE vacancies SET closed_at = ?, last_check = ? WHERE url = ? AND closed_at IS NULL",
+                (now, now, url),
+            )
+            conn.commit()
+
+    def due_vacancies(self, limit: int, now: float | None = None) -> list[str]:
+        """До limit активных вакансий с наступившей проверкой, самые вероятно закрытые первыми."""
+        if limit <= 0:
+            return []
+        now = now or time.time()
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT url FROM vacancies
+                WHERE closed_at IS NULL AND next_check <= ?
+                ORDER BY (? - last_check) * (? - published) DESC
+                LIMIT ?
+                """,
+                (now, now, now, limit),
+            )
+            return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,142 @@
+import math
+import mmap
+import os
+import struct
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+MASK64 = (1 << 64) - 1
+
+
+def _mix64(value: int) -> int:
+    """Перемешивание splitmix64: равномерные хэши из последовательных id."""
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+class BloomSeenIndex:
+    """Bloom-фильтр id вакансий в mmap-файле перед таблицей viewed.
+
+    Отрицательный ответ точный — такого id точно нет, в БД не ходим. Положительный
+    ответ проверяется в БД, поэтому переполнение фильтра повышает только число
+    лишних запросов, но не приводит к потере вакансий. Файл переживает перезапуск и
+    может одновременно использоваться несколькими процессами на одной машине: запись
+    бит выполняется под файловой блокировкой, чтение идет без блокировок.
+
+    Новый фильтр заполняется id из fill во временном файле и появляется под именем
+    path только целиком: прерванное заполнение не оставляет неполного фильтра,
+    а другие процессы не откроют его на середине.
+    """
+
+    MAGIC = b"AVBLOOM2"
+    HEADER = struct.Struct("<8sQI")  # magic, число бит, число хэш-функций
+
+    def __init__(
+        self,
+        path: str = "seen_ids.bloom",
+        capacity: int = 10_000_000,
+        error_rate: float = 0.001,
+        fill=None,
+    ):
+        """fill — функция, отдающая пачки id для заполнения нового фильтра (например, из viewed)."""
+        self.path = path
+        self.created = False
+        self.loaded = 0
+        if not os.path.exists(path):
+            self.num_bits = int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+            self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+            self._build(fill or (lambda: ()))
+        self._file = open(path, "r+b")
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        magic, self.num_bits, self.num_hashes = self.HEADER.unpack_from(self._mmap, 0)
+        if magic != self.MAGIC:
+            self.close()
+            raise ValueError(f"{path} не является файлом индекса просмотренных id")
+
+    def _build(self, fill) -> None:
+        """Заполняет фильтр во временном файле и атомарно ставит его на место path.
+
+        Если другой процесс успел построить фильтр раньше, берем его файл, а свой
+        выбрасываем: подмена файла под уже открывшими его процессами потеряла бы их записи.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.path) + ".", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "r+b") as f:
+                f.write(self.HEADER.pack(self.MAGIC, self.num_bits, self.num_hashes))
+                f.truncate(self.HEADER.size + (self.num_bits + 7) // 8)
+                f.flush()
+                with mmap.mmap(f.fileno(), 0) as data:
+                    for ids in fill():
+                        self._set_bits(data, ids)
+                        self.loaded += len(ids)
+                    data.flush()
+            try:
+                os.link(tmp_path, self.path)
+                self.created = True
+            except FileExistsError:
+                pass
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @contextmanager
+    def _locked(self):
+        """Межпроцессная блокировка файла на время записи."""
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _positions(self, item_id: int):
+        h1 = _mix64(item_id)
+        h2 = _mix64(h1 ^ item_id) | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def might_contain(self, item_id: int) -> bool:
+        """False — id точно не встречался; True — возможно встречался, нужна проверка в БД."""
+        offset = self.HEADER.size
+        data = self._mmap
+        for bit in self._positions(item_id):
+            if not data[offset + (bit >> 3)] & (1 << (bit & 7)):
+                return False
+        return True
+
+    def add_many(self, ids) -> None:
+        """Добавляет id в фильтр одной блокировкой на всю пачку."""
+        with self._locked():
+            self._set_bits(self._mmap, ids)
+
+    def _set_bits(self, data, ids) -> None:
+        offset = self.HEADER.size
+        for item_id in ids:
+            for bit in self._positions(item_id):
+                index = offset + (bit >> 3)
+                data[index] = data[index] | (1 << (bit & 7))
+
+    def flush(self) -> None:
+        self._mmap.flush()
+
+    def close(self) -> None:
+        self._mmap.flush()
+        self._mmap.close()
+        self._file.close()
@@ -0,0 +1,77 @@
+import multiprocessing
+import uuid
+from dataclasses import replace
+
+from loguru import logger
+
+from db_service import SeenIdStore
+from dto import AvitoConfig
+
+
+def _run_shard(config: AvitoConfig, shard_index: int, shards: int, seen_db: str, run_id: str) -> dict:
+    """Точка входа дочернего процесса: парсит свой шард своей идентичностью."""
+    # импорт внутри процесса: при spawn модуль parser_cls грузится заново в каждом дочернем процессе
+    from parser_cls import AvitoParse
+
+    parser = AvitoParse(config, cookies_path=f"cookies_shard_{shard_index}.json")
+    parser.shard = (shard_index, shards)
+    parser.seen_store = SeenIdStore(seen_db, run_id)
+    parser.parse()
+    return parser.get_stats()
+
+
+class ShardedCrawler:
+    """Запускает N процессов, каждый со своим шардом URL и своей идентичностью.
+
+    Процессы делят одно хранилище id (SeenIdStore), поэтому одна и та же вакансия
+    не скачивается двумя шардами. Отметки привязаны к id запуска и не переживают его.
+    """
+
+    SEEN_DB = "seen_ids.db"
+
+    def __init__(self, config: AvitoConfig, processes: int):
+        self.config = config
+        self.processes = max(1, processes)
+
+    def _shard_config(self, shard_index: int) -> AvitoConfig:
+        """Конфиг дочернего процесса: свой прокси из пула, если он есть."""
+        pool = [proxy for proxy in ([self.config.proxy_string] + list(self.config.proxy_pool)) if proxy]
+        pool = list(dict.fromkeys(pool))
+        if not self.config.use_proxy or not pool:
+            return self.config
+        return replace(
+            self.config,
+            proxy_string=pool[shard_index % len(pool)],
+            proxy_pool=[],
+        )
+
+    def parse(self) -> None:
+        """Запускает процессы и сводит их статистику в один отчет о скорости."""
+        logger.info(f"Многопроцессный режим: {self.processes} процессов")
+        run_id = uuid.uuid4().hex
+        SeenIdStore(self.SEEN_DB, run_id).prune()
+        args = [
+            (self._shard_config(index), index, self.processes, self.SEEN_DB, run_id)
+            for index in range(self.processes)
+        ]
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(processes=self.processes) as pool:
+            stats = pool.starmap(_run_shard, args)
+        self._log_report(stats)
+
+    @staticmethod
+    def _log_report(stats: list[dict]) -> None:
+        processed = sum(item["processed"] for item in stats)
+        good = sum(item["good"] for item in stats)
+        bad = sum(item["bad"] for item in stats)
+        elapsed = max(item["finished"] for item in stats) - min(item["started"] for item in stats)
+        for index, item in enumerate(stats):
+            logger.info(
+                f"Процесс #{index + 1}: обработано {item['processed']}, "
+                f"хорошие {item['good']}, плохие {item['bad']}"
+            )
+        rps = processed / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            f"Итого по {len(stats)} процессам: {processed} URL, хорошие {good}, плохие {bad}, "
+            f"{rps:.2f} req/s (~{rps * 3600:.0f} URL/час)"
+        )
@@ -0,0 +1,81 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("loguru")
+pytest.importorskip("pydantic")
+pytest.importorskip("lxml")
+
+from api_client import AvitoApiClient  # noqa: E402
+from api_stub_server import make_handler  # noqa: E402
+
+LISTING_URL = "https://www.avito.ru/moskva/vakansii?q=%D0%B2%D0%BE%D0%B4%D0%B8%D1%82%D0%B5%D0%BB%D1%8C&p=2"
+ITEM = {
+    "id": 4512345678,
+    "urlPath": "/moskva/vakansii/voditel_kategorii_c_4512345678",
+    "title": "Водитель категории C",
+    "description": "Развозка по городу",
+    "sortTimeStamp": 1717000000000,
+}
+SEARCH_RESPONSE = {"catalog": {"items": [ITEM, {"type": "banner"}], "totalCount": 120}}
+ITEM_RESPONSE = {"item": ITEM}
+
+
+@pytest.fixture
+def stub(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(tmp_path))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield AvitoApiClient(base_url, record_dir=str(tmp_path))
+    server.shutdown()
+    server.server_close()
+
+
+def get(url: str) -> str:
+    with urllib.request.urlopen(url, timeout=5) as response:
+        assert response.headers["Content-Type"].startswith("application/json")
+        return response.read().decode("utf-8")
+
+
+def test_replays_recorded_search_and_item(stub):
+    search_url = stub.search_url(LISTING_URL)
+    item_url = stub.item_url(ITEM["id"])
+    stub.record(search_url, json.dumps(SEARCH_RESPONSE, ensure_ascii=False))
+    stub.record(item_url, json.dumps(ITEM_RESPONSE, ensure_ascii=False))
+
+    # порядок параметров в запросе не влияет на ключ записи
+    base, query = search_url.split("?", 1)
+    reordered = base + "?" + "&".join(reversed(query.split("&")))
+    listing = stub.parse_search(get(reordered))
+    assert [item.id for item in listing.items] == [ITEM["id"]]
+    assert stub.total_pages(get(search_url)) == 3
+
+    item = stub.parse_item(get(item_url))
+    assert item.title == ITEM["title"]
+
+
+def test_missing_recording_is_404(stub):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        get(stub.item_url(1))
+    assert error.value.code == 404
+
+
+@pytest.mark.parametrize(
+    "body",
+    ["[]", "not json", '{"catalog": []}', '{"catalog": "blocked"}', '{"catalog": {"items": {}}}', '{"totalCount": "n/a"}'],
+)
+def test_unexpected_search_response_is_empty(body):
+    client = AvitoApiClient()
+    assert client.parse_search(body).items == []
+    assert client.total_pages(body) == 1
+
+
+def test_unexpected_item_response_is_none():
+    client = AvitoApiClient()
+    assert client.parse_item('{"item": "removed"}') is None
+    assert client.parse_item('{"item": {"title": "без id"}}') is None
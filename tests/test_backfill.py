@@ -0,0 +1,84 @@
+from datetime import datetime
+
+import pytest
+
+from backfill import BackfillStore, BackfillTracker, WindowWalk, backfill_windows
+
+DAY = 24 * 60 * 60
+
+
+def ms(seconds: int) -> int:
+    return seconds * 1000
+
+
+def test_day_windows_cover_period_inclusively():
+    windows = backfill_windows("2024-01-01", "2024-01-03")
+    assert len(windows) == 3
+    assert windows[0][0] == int(datetime(2024, 1, 1).timestamp())
+    assert windows[-1][1] == int(datetime(2024, 1, 4).timestamp())
+    assert all(end == start for (_, end), (start, _) in zip(windows, windows[1:]))
+
+
+def test_hour_windows():
+    assert len(backfill_windows("2024-01-01", "2024-01-01", "hour")) == 24
+
+
+def test_unknown_granularity():
+    with pytest.raises(ValueError):
+        backfill_windows("2024-01-01", "2024-01-01", "week")
+
+
+def test_walk_assigns_items_to_open_windows():
+    walk = WindowWalk([(DAY, 2 * DAY), (0, DAY), (3 * DAY, 4 * DAY)])
+    assert walk.newest_end == ms(4 * DAY)
+    assert walk.window_of(ms(DAY) + 5) == (DAY, 2 * DAY)
+    assert walk.window_of(ms(0)) == (0, DAY)
+    # между окнами (уже завершенное окно) и вне периода
+    assert walk.window_of(ms(2 * DAY) + 5) is None
+    assert walk.window_of(ms(5 * DAY)) is None
+    assert walk.window_of(-1) is None
+
+
+def test_walk_closes_windows_from_newest_to_oldest():
+    walk = WindowWalk([(0, DAY), (DAY, 2 * DAY), (2 * DAY, 3 * DAY)])
+    assert walk.reached(ms(2 * DAY) + 10) == []
+    assert walk.reached(ms(2 * DAY) - 10) == [(2 * DAY, 3 * DAY)]
+    # пройденному окну объявления больше не достаются
+    assert walk.window_of(ms(2 * DAY) + 10) is None
+    assert walk.reached(ms(DAY) - 10) == [(DAY, 2 * DAY)]
+    assert walk.remaining() == [(0, DAY)]
+    assert walk.reached(-1) == [(0, DAY)]
+    assert walk.remaining() == []
+
+
+def test_tracker_waits_for_walk_and_cards(tmp_path):
+    tracker = BackfillTracker(BackfillStore(str(tmp_path / "backfill.db")), [(0, DAY)])
+    key = ("search", 0, DAY)
+    tracker.found(key, "card")
+    assert tracker.take_ready() == []
+    tracker.walked(key)
+    assert tracker.take_ready() == []
+    tracker.settle("card", True)
+    assert tracker.take_ready() == [key]
+    assert tracker.take_ready() == []
+
+
+def test_tracker_keeps_window_with_failed_card(tmp_path):
+    tracker = BackfillTracker(BackfillStore(str(tmp_path / "backfill.db")), [(0, DAY)])
+    key = ("search", 0, DAY)
+    tracker.found(key, "card")
+    tracker.walked(key)
+    tracker.settle("card", False)
+    assert tracker.take_ready() == []
+
+
+def test_unwalked_window_is_not_finished(tmp_path):
+    tracker = BackfillTracker(BackfillStore(str(tmp_path / "backfill.db")), [(0, DAY)])
+    assert tracker.take_ready() == []
+
+
+def test_store_remembers_finished_windows(tmp_path):
+    store = BackfillStore(str(tmp_path / "backfill.db"))
+    store.mark_finished([("search", 0, DAY), ("search", 0, DAY)])
+    assert store.finished("search") == {(0, DAY)}
+    assert store.finished("other") == set()
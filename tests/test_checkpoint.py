@@ -0,0 +1,102 @@
+from checkpoint import CheckpointStore, RunCheckpoint
+
+SOURCE = "urls.txt"
+
+
+def run(tmp_path, resume: bool = False) -> RunCheckpoint:
+    return RunCheckpoint(SOURCE, CheckpointStore(str(tmp_path / "checkpoint.db")), resume=resume)
+
+
+def test_offset_advances_over_settled_prefix_only(tmp_path):
+    checkpoint = run(tmp_path)
+    for url, line_end in (("a", 10), ("b", 20), ("c", 30)):
+        checkpoint.track(url, line_end)
+    checkpoint.finished("b")
+    checkpoint.commit()
+    assert checkpoint.offset == 0
+    checkpoint.finished("a")
+    checkpoint.commit()
+    assert checkpoint.offset == 20
+
+    resumed = run(tmp_path, resume=True)
+    assert resumed.offset == 20
+    assert resumed.done == set()
+    assert resumed.retry == []
+
+
+def test_done_urls_past_offset_survive_resume(tmp_path):
+    checkpoint = run(tmp_path)
+    checkpoint.track("a", 10)
+    checkpoint.track("b", 20)
+    checkpoint.finished("b")
+    checkpoint.commit()
+    resumed = run(tmp_path, resume=True)
+    assert (resumed.offset, resumed.done) == (0, {"b"})
+
+
+def test_failed_urls_are_retried(tmp_path):
+    checkpoint = run(tmp_path)
+    checkpoint.track("a", 10)
+    checkpoint.failed("a")
+    checkpoint.commit()
+    assert checkpoint.offset == 10
+    resumed = run(tmp_path, resume=True)
+    assert resumed.retry == ["a"]
+
+
+def test_fresh_run_resets_state(tmp_path):
+    checkpoint = run(tmp_path)
+    checkpoint.track("a", 10)
+    checkpoint.failed("a")
+    checkpoint.commit()
+    fresh = run(tmp_path)
+    assert (fresh.offset, fresh.retry) == (0, [])
+
+
+def test_listing_waits_for_its_cards(tmp_path):
+    checkpoint = run(tmp_path)
+    checkpoint.track("listing", 10)
+    checkpoint.found("listing", "card-1")
+    checkpoint.found("listing", "card-2")
+    checkpoint.walked("listing", True)
+    checkpoint.finished("card-1")
+    checkpoint.commit()
+    assert checkpoint.offset == 0
+    checkpoint.finished("card-2")
+    checkpoint.commit()
+    assert checkpoint.offset == 10
+    assert run(tmp_path, resume=True).retry == []
+
+
+def test_listing_waits_for_walk(tmp_path):
+    checkpoint = run(tmp_path)
+    checkpoint.track("listing", 10)
+    checkpoint.found("listing", "card")
+    checkpoint.finished("card")
+    checkpoint.commit()
+    assert checkpoint.offset == 0
+    checkpoint.walked("listing", True)
+    checkpoint.commit()
+    assert checkpoint.offset == 10
+
+
+def test_failed_card_or_page_retries_listing(tmp_path):
+    checkpoint = run(tmp_path)
+    checkpoint.track("listing-a", 10)
+    checkpoint.track("listing-b", 20)
+    checkpoint.found("listing-a", "card")
+    checkpoint.walked("listing-a", True)
+    checkpoint.failed("card")
+    checkpoint.walked("listing-b", False)
+    checkpoint.commit()
+    assert checkpoint.offset == 20
+    assert sorted(run(tmp_path, resume=True).retry) == ["listing-a", "listing-b"]
+
+
+def test_untracked_urls_are_ignored(tmp_path):
+    checkpoint = run(tmp_path)
+    checkpoint.finished("unknown")
+    checkpoint.found("unknown-listing", "card")
+    checkpoint.finished("card")
+    checkpoint.commit()
+    assert checkpoint.offset == 0
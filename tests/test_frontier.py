@@ -0,0 +1,187 @@
+import sqlite3
+import time
+
+import pytest
+
+from frontier import FrontierBackend, RedisFrontier, SQLiteFrontier
+
+
+@pytest.fixture
+def frontier(tmp_path):
+    return SQLiteFrontier(str(tmp_path / "frontier.db"), node_id="node-a")
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        FrontierBackend()
+
+
+def test_push_skips_pending_and_leased_duplicates(frontier):
+    assert frontier.push(["u1", "u2", "u1"]) == 2
+    assert frontier.lease(1, 60) == ["u1"]
+    assert frontier.push(["u1", "u2", "u3"]) == 1
+    assert frontier.pending_count() == 3
+
+
+def test_acked_url_is_queued_again(frontier):
+    frontier.push(["search"])
+    assert frontier.lease(1, 60) == ["search"]
+    frontier.ack(["search"])
+    assert frontier.pending_count() == 0
+    assert frontier.push(["search"]) == 1
+    assert frontier.lease(1, 60) == ["search"]
+
+
+def test_failed_url_is_queued_again_with_fresh_attempts(frontier):
+    frontier.push(["u1"])
+    frontier.lease(1, 60)
+    frontier.nack("u1", max_attempts=1)
+    assert frontier.pending_count() == 0
+    assert frontier.push(["u1"]) == 1
+    assert frontier.lease(1, 60) == ["u1"]
+    frontier.nack("u1", max_attempts=2)
+    assert frontier.lease(1, 60) == ["u1"]
+
+
+def test_nack_returns_url_until_max_attempts(frontier):
+    frontier.push(["u1"])
+    for _ in range(2):
+        assert frontier.lease(1, 60) == ["u1"]
+        frontier.nack("u1", max_attempts=3)
+    assert frontier.lease(1, 60) == ["u1"]
+    frontier.nack("u1", max_attempts=3)
+    assert frontier.lease(1, 60) == []
+    assert frontier.pending_count() == 0
+
+
+def test_expired_lease_goes_to_another_node(tmp_path):
+    db = str(tmp_path / "frontier.db")
+    first = SQLiteFrontier(db, node_id="node-a")
+    second = SQLiteFrontier(db, node_id="node-b")
+    first.push(["u1"])
+    assert first.lease(1, 0) == ["u1"]
+    time.sleep(0.01)
+    assert second.lease(1, 60) == ["u1"]
+    assert first.lease(1, 60) == []
+
+
+def test_stale_node_cannot_release_or_nack_another_nodes_lease(tmp_path):
+    db = str(tmp_path / "frontier.db")
+    first = SQLiteFrontier(db, node_id="node-a")
+    second = SQLiteFrontier(db, node_id="node-b")
+    first.push(["u1"])
+    first.lease(1, 0)
+    time.sleep(0.01)
+    assert second.lease(1, 60) == ["u1"]
+    first.release(["u1"])
+    first.nack("u1", max_attempts=1)
+    assert second.lease(1, 60) == []
+    assert first.lease(1, 60) == []
+    assert second.pending_count() == 1
+
+
+def test_release_does_not_count_attempt(frontier):
+    frontier.push(["u1", "u2"])
+    leased = frontier.lease(2, 60)
+    frontier.release(leased)
+    assert frontier.lease(2, 60) == ["u1", "u2"]
+    frontier.nack("u1", max_attempts=1)
+    assert frontier.pending_count() == 1
+
+
+def test_push_accepts_generator(frontier):
+    assert frontier.push(f"u{i}" for i in range(2500)) == 2500
+    assert frontier.pending_count() == 2500
+
+
+def test_push_does_not_lock_while_reading_source(tmp_path):
+    path = str(tmp_path / "frontier.db")
+    frontier = SQLiteFrontier(path, node_id="node-a")
+    other = SQLiteFrontier(path, node_id="node-b")
+    other._connect = lambda: sqlite3.connect(path, timeout=0, isolation_level=None)
+    leased: list[str] = []
+
+    def source():
+        yield from (f"u{i}" for i in range(SQLiteFrontier.PUSH_CHUNK))
+        # первая порция уже записана, блокировка отпущена: другой узел может брать URL
+        leased.extend(other.lease(1, 60))
+        yield "last"
+
+    assert frontier.push(source()) == SQLiteFrontier.PUSH_CHUNK + 1
+    assert leased == ["u0"]
+
+
+@pytest.fixture
+def redis_server():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # EVAL в fakeredis
+    return fakeredis.FakeServer()
+
+
+def redis_node(server, node_id: str = "node-a") -> RedisFrontier:
+    import fakeredis
+
+    client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    return RedisFrontier(prefix="test:frontier", client=client, node_id=node_id)
+
+
+@pytest.fixture
+def redis_frontier(redis_server):
+    return redis_node(redis_server)
+
+
+def test_redis_acked_url_is_queued_again(redis_frontier):
+    assert redis_frontier.push(["u1", "u1"]) == 1
+    assert redis_frontier.lease(1, 60) == ["u1"]
+    assert redis_frontier.push(["u1"]) == 0
+    redis_frontier.ack(["u1"])
+    assert redis_frontier.push(["u1"]) == 1
+
+
+def test_redis_nack_moves_to_failed_after_max_attempts(redis_frontier):
+    redis_frontier.push(["u1"])
+    redis_frontier.lease(1, 60)
+    redis_frontier.nack("u1", max_attempts=2)
+    assert redis_frontier.lease(1, 60) == ["u1"]
+    redis_frontier.nack("u1", max_attempts=2)
+    assert redis_frontier.pending_count() == 0
+    # повторный nack того же URL не ставит его в очередь второй раз
+    redis_frontier.nack("u1", max_attempts=2)
+    assert redis_frontier.pending_count() == 0
+    assert redis_frontier.push(["u1"]) == 1
+
+
+def test_redis_release_returns_url_without_attempt(redis_frontier):
+    redis_frontier.push(["u1", "u2"])
+    redis_frontier.release(redis_frontier.lease(2, 60))
+    assert redis_frontier.pending_count() == 2
+    assert sorted(redis_frontier.lease(2, 60)) == ["u1", "u2"]
+    redis_frontier.nack("u1", max_attempts=1)
+    assert redis_frontier.pending_count() == 1
+
+
+def test_redis_release_after_expiry_does_not_duplicate(redis_server):
+    first = redis_node(redis_server, "node-a")
+    first.push(["u1", "u2"])
+    assert first.lease(1, -1) == ["u1"]
+    # следующая выдача возвращает просроченную аренду в очередь
+    assert first.lease(1, 60) == ["u2"]
+    first.release(["u1"])
+    assert first.client.lrange(first.pending_key, 0, -1) == ["u1"]
+    assert first.lease(5, 60) == ["u1"]
+    assert first.lease(5, 60) == []
+
+
+def test_redis_stale_node_keeps_off_another_nodes_lease(redis_server):
+    first = redis_node(redis_server, "node-a")
+    second = redis_node(redis_server, "node-b")
+    first.push(["u1"])
+    assert first.lease(1, -1) == ["u1"]
+    assert second.lease(1, 60) == ["u1"]
+    first.release(["u1"])
+    first.nack("u1", max_attempts=1)
+    assert second.client.zrange(second.leased_key, 0, -1) == ["u1"]
+    assert first.client.llen(first.pending_key) == 0
+    assert first.lease(1, 60) == []
+    second.ack(["u1"])
+    assert second.pending_count() == 0
@@ -0,0 +1,70 @@
+import pytest
+
+from http_cache import HttpCache
+
+URL = "https://www.avito.ru/moskva/vakansii/voditel_123"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HttpCache(str(tmp_path / "http_cache.db"))
+
+
+def test_nothing_is_written_before_commit(cache):
+    assert cache.check(URL, '"v1"', None, b"page") is False
+    assert cache.conditional_headers(URL) == {}
+    assert cache.check(URL, '"v1"', None, b"page") is False
+
+
+def test_committed_page_is_unchanged_next_time(cache):
+    cache.check(URL, '"v1"', "Mon, 01 Jan 2024 00:00:00 GMT", b"page")
+    cache.commit([URL])
+    assert cache.conditional_headers(URL) == {
+        "if-none-match": '"v1"',
+        "if-modified-since": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+    assert cache.check(URL, '"v1"', None, b"page") is True
+    assert cache.check(URL, '"v2"', None, b"new page") is False
+
+
+def test_discarded_page_is_not_cached(cache):
+    cache.check(URL, '"v1"', None, b"page")
+    cache.discard(URL)
+    cache.commit([URL])
+    assert cache.conditional_headers(URL) == {}
+    assert cache.check(URL, None, None, b"page") is False
+
+
+def test_failed_update_keeps_previous_entry(cache):
+    cache.check(URL, '"v1"', None, b"old")
+    cache.commit([URL])
+    cache.check(URL, '"v2"', None, b"new")
+    cache.discard(URL)
+    assert cache.conditional_headers(URL) == {"if-none-match": '"v1"'}
+    assert cache.check(URL, None, None, b"new") is False
+
+
+def test_commit_writes_only_pending_urls(cache):
+    other = URL + "4"
+    cache.check(URL, None, None, b"a")
+    cache.check(other, None, None, b"b")
+    cache.commit([URL, "https://www.avito.ru/unknown"])
+    assert cache.check(URL, None, None, b"a") is True
+    assert cache.check(other, None, None, b"b") is False
+
+
+def test_not_modified_counts_saved_bytes(cache):
+    cache.check(URL, '"v1"', None, b"x" * 1000)
+    cache.commit([URL])
+    cache.reset_stats()
+    cache.record_not_modified(URL, received_bytes=100)
+    assert cache.stats["not_modified"] == 1
+    assert cache.stats["bytes_saved"] == 900
+    assert "304: 1" in cache.summary()
+
+
+def test_reset_stats_drops_pending(cache):
+    cache.check(URL, None, None, b"a")
+    cache.reset_stats()
+    cache.commit([URL])
+    assert cache.check(URL, None, None, b"a") is False
@@ -0,0 +1,56 @@
+import pytest
+
+from keyword_matcher import KeywordMatcher, compile_keywords, normalize_text
+
+
+def test_normalize_text_folds_case_and_yo():
+    assert normalize_text("ЁЛКА Ёж") == "елка еж"
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Требуется ВОДИТЕЛЬ категории C", "водитель"),
+        ("Курьер на личном авто", "курьер"),
+        ("Менеджер по продажам", None),
+        ("", None),
+    ],
+)
+def test_find_returns_first_matching_keyword(text, expected):
+    matcher = KeywordMatcher(["водитель", "курьер"])
+    assert matcher.find(text) == expected
+
+
+def test_yo_and_e_are_equivalent_both_ways():
+    assert KeywordMatcher(["ёлка"]).find("Продаю елку") is None
+    assert KeywordMatcher(["ёлк"]).find("Продаю елку") == "ёлк"
+    assert KeywordMatcher(["елк"]).find("ЁЛКИ") == "елк"
+
+
+def test_overlapping_keywords_found_through_suffix_links():
+    matcher = KeywordMatcher(["he", "she", "hers", "his"])
+    assert matcher.find("ushers") in {"she", "he"}
+    assert KeywordMatcher(["abcd", "bc"]).find("xabcx") == "bc"
+    assert KeywordMatcher(["aab"]).find("aaab") == "aab"
+
+
+def test_keyword_inside_longer_keyword_prefix():
+    matcher = KeywordMatcher(["продавец-консультант", "консультант"])
+    assert matcher.find("Ищем консультанта") == "консультант"
+
+
+def test_searches_every_text_and_skips_empty():
+    matcher = KeywordMatcher(["вахт"])
+    assert matcher.find(None, "", "Работа вахтой") == "вахт"
+    assert matcher.find("title", None) is None
+
+
+def test_blank_keywords_are_ignored():
+    matcher = KeywordMatcher(["", "   "])
+    assert not matcher
+    assert matcher.find("любой текст") is None
+
+
+def test_compile_keywords_is_shared_per_list():
+    assert compile_keywords(("a", "b")) is compile_keywords(("a", "b"))
+    assert bool(compile_keywords(("a",)))
@@ -0,0 +1,32 @@
+from negative_cache import NegativeCache
+
+TTL = 100
+
+
+def cache(tmp_path) -> NegativeCache:
+    return NegativeCache(str(tmp_path / "negative_cache.db"), not_found_ttl=TTL)
+
+
+def test_closed_entries_never_expire(tmp_path):
+    negative = cache(tmp_path)
+    negative.add("closed", "closed")
+    later = 10 ** 12
+    assert negative.known(["closed", "other"], now=later) == {"closed"}
+    assert negative.reason("closed", now=later) == "closed"
+
+
+def test_not_found_entries_expire(tmp_path):
+    negative = cache(tmp_path)
+    negative.add("gone", "not_found")
+    assert negative.known(["gone"]) == {"gone"}
+    assert negative.reason("gone") == "not_found"
+    expired = 10 ** 12
+    assert negative.known(["gone"], now=expired) == set()
+    assert negative.reason("gone", now=expired) is None
+
+
+def test_repeated_not_found_restarts_ttl(tmp_path):
+    negative = cache(tmp_path)
+    negative.add("gone", "not_found")
+    negative.add("gone", "not_found")
+    assert negative.known(["gone"]) == {"gone"}
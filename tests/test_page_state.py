@@ -0,0 +1,128 @@
+import html
+import json
+from urllib.parse import quote
+
+import pytest
+
+pytest.importorskip("loguru")
+pytest.importorskip("pydantic")
+pytest.importorskip("lxml")  # page_state берет AVITO_BASE_URL из listing_parser
+
+from page_state import extract_item, extract_items, item_to_record, validate_items  # noqa: E402
+
+PRICE = {
+    "enabled": True,
+    "fullString": "80\xa0000 ₽ за месяц",
+    "hasValue": True,
+    "postfix": "за\xa0месяц",
+    "string": "80\xa0000 ₽",
+    "stringWithoutDiscount": None,
+    "title": {"short": "Зарплата"},
+    "titleDative": "зарплате",
+    "value": 80000,
+    "wasLowered": False,
+    "exponent": "",
+}
+ITEM = {
+    "id": 4512345678,
+    "urlPath": "/moskva/vakansii/voditel_kategorii_c_4512345678?context=abc",
+    "title": "Водитель категории C",
+    "description": "Развозка по городу",
+    "sortTimeStamp": 1717000000000,
+    "priceDetailed": PRICE,
+    "addressDetailed": {"locationName": "Москва, Таганская"},
+    "coords": {"lat": 55.74, "lng": 37.65},
+    "sellerId": "seller42",
+}
+PROMOTED = {
+    "id": 4512345679,
+    "urlPath": "/moskva/vakansii/kurer_4512345679",
+    "title": "Курьер",
+    "sortTimeStamp": 1717000500000,
+    "isPromotion": True,
+}
+MALFORMED = {"id": 4512345680, "urlPath": "/moskva/vakansii/broken_4512345680", "location": "Москва"}
+BANNER = {"type": "banner", "bannerId": "top"}
+SIMILAR = {"id": 4512345690, "urlPath": "/moskva/vakansii/gruzchik_4512345690", "title": "Грузчик"}
+
+
+def mfe_page(state: dict) -> str:
+    """Страница с состоянием в <script type="mime/invalid" data-mfe-state="true">, как отдает Avito."""
+    return (
+        "<html><head><title>Вакансии</title></head><body>"
+        '<div data-marker="catalog-serp"></div>'
+        f'<script type="mime/invalid" data-mfe-state="true">{html.escape(json.dumps(state))}</script>'
+        "</body></html>"
+    )
+
+
+def initial_data_page(state: dict) -> str:
+    """Страница старого формата: window.__initialData__ с url-encoded JSON."""
+    return f'<html><body><script>window.__initialData__ = "{quote(json.dumps(state))}";</script></body></html>'
+
+
+LISTING_PAGE = mfe_page({"data": {"catalog": {"items": [BANNER, ITEM, MALFORMED, PROMOTED], "totalCount": 3}}})
+
+
+def test_listing_page_items_are_extracted():
+    response = extract_items(LISTING_PAGE)
+    assert response is not None
+    assert [item.id for item in response.items] == [ITEM["id"], PROMOTED["id"]]
+
+
+def test_page_without_state_returns_none():
+    page = "<html><body><div data-marker='item'>Водитель</div></body></html>"
+    assert extract_items(page) is None
+    assert extract_item(page) is None
+
+
+def test_broken_state_json_is_skipped():
+    page = '<script type="mime/invalid" data-mfe-state="true">{not json</script>' + LISTING_PAGE
+    assert [item.id for item in extract_items(page).items] == [ITEM["id"], PROMOTED["id"]]
+
+
+def test_validate_items_drops_only_malformed_and_non_items():
+    items = validate_items([BANNER, ITEM, MALFORMED, PROMOTED])
+    assert [item.id for item in items] == [ITEM["id"], PROMOTED["id"]]
+
+
+def test_promoted_item_is_kept_and_marked():
+    promoted = extract_items(LISTING_PAGE).items[1]
+    assert promoted.isPromotion
+    assert item_to_record(promoted)["external_id"] == "https://www.avito.ru/moskva/vakansii/kurer_4512345679"
+
+
+def test_extract_item_picks_item_by_id():
+    # похожие объявления лежат в состоянии карточки раньше основного
+    page = mfe_page({"similar": {"items": [SIMILAR]}, "item": ITEM})
+    assert extract_item(page, ITEM["id"]).id == ITEM["id"]
+    assert extract_item(page, str(ITEM["id"])).id == ITEM["id"]
+    assert extract_item(page).id == SIMILAR["id"]
+    assert extract_item(page, 1) is None
+
+
+def test_extract_item_from_initial_data():
+    page = initial_data_page({"buyerItem": {"item": ITEM}})
+    assert extract_item(page, ITEM["id"]).title == ITEM["title"]
+
+
+def test_item_to_record_maps_fields():
+    record = item_to_record(extract_item(mfe_page({"item": ITEM}), ITEM["id"]))
+    assert record["external_id"] == "https://www.avito.ru/moskva/vakansii/voditel_kategorii_c_4512345678"
+    assert record["publish_dt"] == 1717000000
+    assert record["vacancy_name"] == ITEM["title"]
+    assert record["source_id"] == str(ITEM["id"])
+    assert record["salary_min"] == record["salary_max"] == "80000"
+    assert record["pay_period"] == "за месяц"
+    assert record["location_source"] == "Москва, Таганская"
+    assert record["location_coordinates"] == "55.74;37.65"
+    assert record["employer_id"] == "seller42"
+
+
+def test_item_to_record_without_timestamp_and_explicit_url():
+    item = validate_items([{"id": 1, "urlPath": "/moskva/vakansii/x_1", "title": "X"}])[0]
+    record = item_to_record(item, url="https://www.avito.ru/moskva/vakansii/x_1")
+    assert record["publish_dt"] == 0
+    assert record["external_id"] == "https://www.avito.ru/moskva/vakansii/x_1"
+    assert record["salary_min"] is None
+    assert record["pay_period"] is None
@@ -0,0 +1,53 @@
+from urllib.parse import parse_qsl, urlsplit
+
+from query_planner import MIN_PRICE_BAND, drops_unpriced, split_by_price, split_by_region, split_query
+
+SEARCH = "https://www.avito.ru/all/vakansii?q=%D0%B2%D0%BE%D0%B4%D0%B8%D1%82%D0%B5%D0%BB%D1%8C&p=3"
+
+
+def params(url: str) -> dict[str, str]:
+    return dict(parse_qsl(urlsplit(url).query))
+
+
+def test_country_wide_search_splits_by_region():
+    slices = split_by_region(SEARCH, regions=("moskva", "tatarstan"))
+    assert [urlsplit(url).path for url in slices] == ["/moskva/vakansii", "/tatarstan/vakansii"]
+    assert all("p" not in params(url) for url in slices)
+    assert all(params(url)["q"] == "водитель" for url in slices)
+
+
+def test_regional_search_is_not_split_by_region():
+    assert split_by_region("https://www.avito.ru/moskva/vakansii?q=x") == []
+
+
+def test_price_slices_cover_range_without_overlap():
+    low, high = split_by_price("https://www.avito.ru/moskva/vakansii?pmin=10000&pmax=200000", 0, 999_999_999)
+    assert params(low)["pmin"] == "10000"
+    assert int(params(high)["pmin"]) == int(params(low)["pmax"]) + 1
+    assert params(high)["pmax"] == "200000"
+
+
+def test_top_slice_is_open_ended_when_search_has_no_pmax():
+    low, high = split_by_price("https://www.avito.ru/moskva/vakansii", 0, 999_999_999)
+    assert params(low)["pmin"] == "0"
+    assert "pmax" not in params(high)
+    # открытый сверху срез делится дальше по max_price из конфига
+    again = split_by_price(high, 0, 999_999_999)
+    assert len(again) == 2 and "pmax" not in params(again[1])
+
+
+def test_narrow_price_band_is_not_split():
+    assert split_by_price(f"https://www.avito.ru/moskva/vakansii?pmin=1000&pmax={1000 + MIN_PRICE_BAND}", 0, 10) == []
+
+
+def test_first_price_split_drops_unpriced_listings():
+    url = "https://www.avito.ru/moskva/vakansii"
+    slices = split_query(url, regions=())
+    assert drops_unpriced(url, slices)
+    assert not drops_unpriced(slices[0], split_by_price(slices[0], 0, 999_999_999))
+    assert not drops_unpriced(SEARCH, split_by_region(SEARCH, regions=("moskva",)))
+
+
+def test_split_query_prefers_region():
+    slices = split_query(SEARCH, regions=("moskva",))
+    assert len(slices) == 1 and "pmin" not in params(slices[0])
@@ -0,0 +1,54 @@
+import json
+
+from response_classifier import BLOCK_PAGE_MAX_BYTES, PageKind, classify_response
+
+HTML = "text/html; charset=utf-8"
+
+
+def page(body: str, title: str = "Вакансия") -> bytes:
+    return f"<!DOCTYPE html><html><head><title>{title}</title></head><body>{body}</body></html>".encode("utf-8")
+
+
+def test_not_found_status_wins():
+    assert classify_response(404, b"", HTML) is PageKind.NOT_FOUND
+    assert classify_response(410, None) is PageKind.NOT_FOUND
+
+
+def test_captcha_markup():
+    content = page('<div class="firewall-captcha"><form><input name="captcha"></form></div>')
+    assert classify_response(200, content, HTML) is PageKind.CAPTCHA
+    assert classify_response(200, page('<input type="text" name="captcha">'), HTML) is PageKind.CAPTCHA
+
+
+def test_soft_block_by_title_or_container():
+    assert classify_response(200, page("", title="Доступ ограничен: проблема с IP"), HTML) is PageKind.SOFT_BLOCK
+    assert classify_response(200, page('<div id="firewall-container"></div>'), HTML) is PageKind.SOFT_BLOCK
+
+
+def test_not_found_heading():
+    assert classify_response(200, page("<h1>Такой страницы не существует</h1>"), HTML) is PageKind.NOT_FOUND
+
+
+def test_closed_marker_on_large_pages():
+    filler = "<p>" + "x" * BLOCK_PAGE_MAX_BYTES + "</p>"
+    content = page(filler + '<a data-marker="item-view/closed-warning">Снято</a>')
+    assert classify_response(200, content, HTML) is PageKind.CLOSED
+
+
+def test_markers_in_description_text_are_ignored():
+    description = "<p>Доступ ограничен только для сотрудников. Такой страницы не существует в справочнике. geetest</p>"
+    assert classify_response(200, page(description), HTML) is PageKind.OK
+
+
+def test_markers_in_embedded_state_are_ignored():
+    state = json.dumps({"description": '<div class="h-captcha">Доступ ограничен</div>'})
+    content = page(f'<script type="application/json">{state}</script>')
+    assert classify_response(200, content, HTML) is PageKind.OK
+
+
+def test_json_responses_are_not_scanned():
+    body = json.dumps({"title": "Доступ ограничен", "html": '<div class="firewall-captcha"></div>'}).encode()
+    assert classify_response(200, body, "application/json") is PageKind.OK
+    # без Content-Type JSON узнается по первому символу тела
+    assert classify_response(200, body) is PageKind.OK
+    assert classify_response(200, b'<div class="js-firewall"></div>') is PageKind.SOFT_BLOCK
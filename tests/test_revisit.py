@@ -0,0 +1,28 @@
+import pytest
+
+pytest.importorskip("lxml")  # revisit берет ITEMS_PER_PAGE из listing_parser
+
+from revisit import RECHECK_BASE_INTERVAL, RevisitScheduler  # noqa: E402
+
+
+def scheduler(tmp_path) -> RevisitScheduler:
+    return RevisitScheduler(str(tmp_path / "revisit.db"), max_interval=30 * 24 * 60 * 60)
+
+
+def test_unchanged_recheck_pushes_next_check_back(tmp_path):
+    revisit = scheduler(tmp_path)
+    revisit.track_vacancies([{'external_id': "a", 'publish_dt': 0}], now=1000)
+    due = 1000 + RECHECK_BASE_INTERVAL
+    assert revisit.due_vacancies(10, now=due) == ["a"]
+    revisit.record_checked("a", now=due)
+    assert revisit.due_vacancies(10, now=due + RECHECK_BASE_INTERVAL) == []
+    assert revisit.due_vacancies(10, now=due + 2 * RECHECK_BASE_INTERVAL) == ["a"]
+
+
+def test_recheck_of_unknown_or_closed_vacancy_is_ignored(tmp_path):
+    revisit = scheduler(tmp_path)
+    revisit.record_checked("missing", now=1000)
+    revisit.track_vacancies([{'external_id': "a", 'publish_dt': 0}], now=1000)
+    revisit.record_closed("a", now=2000)
+    revisit.record_checked("a", now=3000)
+    assert revisit.due_vacancies(10, now=10 ** 9) == []
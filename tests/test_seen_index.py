@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from seen_index import BloomSeenIndex
+
+
+def batches(ids, size=3):
+    ids = list(ids)
+    return lambda: (ids[i:i + size] for i in range(0, len(ids), size))
+
+
+def test_new_index_is_filled_before_it_appears(tmp_path):
+    path = str(tmp_path / "seen.bloom")
+    index = BloomSeenIndex(path, capacity=1000, fill=batches(range(1, 11)))
+    assert index.created
+    assert index.loaded == 10
+    assert all(index.might_contain(item_id) for item_id in range(1, 11))
+    assert os.listdir(tmp_path) == ["seen.bloom"]
+    index.close()
+
+
+def test_no_false_negatives_after_add(tmp_path):
+    index = BloomSeenIndex(str(tmp_path / "seen.bloom"), capacity=1000)
+    ids = range(4_000_000_000, 4_000_000_500)
+    index.add_many(ids)
+    assert all(index.might_contain(item_id) for item_id in ids)
+    misses = sum(index.might_contain(item_id) for item_id in range(1, 1001))
+    assert misses < 50
+    index.close()
+
+
+def test_reopened_index_keeps_bits_and_skips_fill(tmp_path):
+    path = str(tmp_path / "seen.bloom")
+    BloomSeenIndex(path, capacity=1000).close()
+    writer = BloomSeenIndex(path, capacity=1000)
+    writer.add_many([42])
+    writer.close()
+
+    def fill():
+        raise AssertionError("существующий индекс не перезаполняется")
+
+    reader = BloomSeenIndex(path, capacity=1000, fill=fill)
+    assert not reader.created
+    assert reader.might_contain(42)
+    reader.close()
+
+
+def test_interrupted_fill_leaves_no_index(tmp_path):
+    path = str(tmp_path / "seen.bloom")
+
+    def broken_fill():
+        yield [1, 2, 3]
+        raise RuntimeError("БД недоступна")
+
+    with pytest.raises(RuntimeError):
+        BloomSeenIndex(path, capacity=1000, fill=broken_fill)
+    assert os.listdir(tmp_path) == []
+
+    index = BloomSeenIndex(path, capacity=1000, fill=batches([1, 2, 3, 4]))
+    assert index.created
+    assert index.might_contain(4)
+    index.close()
+
+
+def test_foreign_file_is_rejected(tmp_path):
+    path = tmp_path / "seen.bloom"
+    path.write_bytes(b"NOTBLOOM" + bytes(64))
+    with pytest.raises(ValueError):
+        BloomSeenIndex(str(path), capacity=1000)
@@ -0,0 +1,31 @@
+from url_set import UrlFingerprintSet, url_fingerprint
+
+
+def test_add_reports_duplicates():
+    urls = UrlFingerprintSet()
+    assert urls.add("https://www.avito.ru/moskva/vakansii/a_1")
+    assert not urls.add("https://www.avito.ru/moskva/vakansii/a_1")
+    assert urls.add("https://www.avito.ru/moskva/vakansii/a_2")
+    assert len(urls) == 2
+
+
+def test_grows_past_initial_capacity():
+    urls = UrlFingerprintSet(capacity=4)
+    assert all(urls.add(f"u{i}") for i in range(10_000))
+    assert not any(urls.add(f"u{i}") for i in range(10_000))
+    assert len(urls) == 10_000
+    assert urls._count * 2 <= len(urls._slots)
+
+
+def test_fingerprint_is_never_the_empty_slot():
+    assert url_fingerprint("") != 0
+    assert url_fingerprint("x") == url_fingerprint("x")
+
+
+def test_colliding_slots_are_probed():
+    urls = UrlFingerprintSet(capacity=1)
+    mask = urls._mask
+    # отпечатки с одинаковыми младшими битами попадают в одну ячейку
+    first, second = mask + 1 + 1, 2 * (mask + 1) + 1
+    assert urls._insert(first) and urls._insert(second)
+    assert not urls._insert(first) and not urls._insert(second)
@@ -0,0 +1,46 @@
+from watermarks import WatermarkStore, WatermarkTracker
+
+
+def tracker(tmp_path) -> WatermarkTracker:
+    return WatermarkTracker(WatermarkStore(str(tmp_path / "watermarks.db")))
+
+
+def test_ready_only_after_walk_and_all_cards_settled(tmp_path):
+    marks = tracker(tmp_path)
+    key = marks.begin("search")
+    marks.found(key, "a")
+    marks.found(key, "b")
+    marks.settle("a", True)
+    assert marks.take_ready() == []
+    marks.walked(key, 100)
+    assert marks.take_ready() == []
+    marks.settle("b", True)
+    assert marks.take_ready() == [("search", 100)]
+    assert marks.take_ready() == []
+
+
+def test_failed_card_keeps_watermark(tmp_path):
+    marks = tracker(tmp_path)
+    key = marks.begin("search")
+    marks.found(key, "a")
+    marks.walked(key, 100)
+    marks.settle("a", False)
+    assert marks.take_ready() == []
+
+
+def test_cycles_of_one_search_are_separate(tmp_path):
+    marks = tracker(tmp_path)
+    first, second = marks.begin("search"), marks.begin("search")
+    marks.found(first, "a")
+    marks.walked(first, 100)
+    marks.walked(second, 200)
+    assert marks.take_ready() == [("search", 200)]
+    marks.settle("a", True)
+    assert marks.take_ready() == [("search", 100)]
+
+
+def test_store_never_moves_back(tmp_path):
+    store = WatermarkStore(str(tmp_path / "watermarks.db"))
+    store.advance("search", 200)
+    store.advance("search", 100)
+    assert store.get("search") == 200
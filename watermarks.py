@@ -0,0 +1,116 @@
+import itertools
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+
+class WatermarkStore:
+    """Водяные знаки поисковых выдач: самый свежий sortTimeStamp (мс), виденный в выдаче (sqlite).
+
+    Следующий проход обходит выдачу, отсортированную по дате, только до объявлений
+    не новее водяного знака.
+    """
+
+    def __init__(self, db_name: str = "watermarks.db"):
+        self.db_name = db_name
+        self._lock = threading.Lock()
+        self._create_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_name, timeout=30)
+
+    def _create_table(self):
+        """Создает таблицу watermarks, если она не существует."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS watermarks (
+                    search_url TEXT PRIMARY KEY,
+                    watermark INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.commit()
+
+    def get(self, search_url: str) -> int | None:
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT watermark FROM watermarks WHERE search_url = ?", (search_url,))
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def advance(self, search_url: str, watermark: int) -> None:
+        """Сдвигает водяной знак вперед (назад он не двигается)."""
+        with self._lock, self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO watermarks (search_url, watermark, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(search_url) DO UPDATE SET
+                    watermark = MAX(watermark, excluded.watermark),
+                    updated_at = excluded.updated_at
+                """,
+                (search_url, watermark, time.time()),
+            )
+            conn.commit()
+
+
+class WatermarkTracker:
+    """Учет водяных знаков в пределах прохода.
+
+    Водяной знак выдачи сдвигается, только когда ее обход прошел без неудачных
+    страниц, а все найденные в нем карточки сохранены или дали итог без записи
+    (сняты, отсеяны). Если карточку получить не удалось, водяной знак остается на
+    месте, и следующий проход снова дойдет до нее. take_ready() отдает готовые
+    обходы один раз; сдвигать по ним водяной знак нужно после сохранения пачки.
+    """
+
+    def __init__(self, store: WatermarkStore):
+        self.store = store
+        self._cycles = itertools.count()
+        self._pending: Counter = Counter()
+        self._cycle_of: dict[str, tuple] = {}
+        self._walked: dict[tuple, int] = {}
+        self._incomplete: set[tuple] = set()
+        self._lock = threading.Lock()
+
+    def begin(self, search_url: str) -> tuple[str, int]:
+        """Ключ нового обхода выдачи: одна выдача может обходиться несколько раз за проход."""
+        with self._lock:
+            return search_url, next(self._cycles)
+
+    def found(self, key: tuple, url: str) -> None:
+        """Карточка url найдена обходом key."""
+        with self._lock:
+            self._pending[key] += 1
+            self._cycle_of[url] = key
+
+    def walked(self, key: tuple, newest: int) -> None:
+        """Все страницы обхода получены; newest — самое свежее объявление в нем."""
+        with self._lock:
+            self._walked[key] = newest
+
+    def settle(self, url: str, ok: bool) -> None:
+        """Карточка обработана; ok=False — не получена, водяной знак не сдвигаем."""
+        with self._lock:
+            key = self._cycle_of.pop(url, None)
+            if key is None:
+                return
+            self._pending[key] -= 1
+            if not ok:
+                self._incomplete.add(key)
+
+    def take_ready(self) -> list[tuple[str, int]]:
+        """(выдача, водяной знак) завершенных обходов."""
+        with self._lock:
+            ready = [
+                key for key in self._walked
+                if key not in self._incomplete and self._pending[key] <= 0
+            ]
+            result = [(key[0], self._walked.pop(key)) for key in ready]
+            for key in ready:
+                del self._pending[key]
+        return result
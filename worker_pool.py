@@ -0,0 +1,218 @@
+import queue
+import threading
+import time
+from dataclasses import replace
+
+from loguru import logger
+
+from dto import AvitoConfig, FetchOutcome
+from parser_cls import AvitoParse
+
+_REQUEUED = object()  # итог _process: URL вернулся в общую очередь, итога пока нет
+
+
+class IdentityWorkerPool:
+    """Пул потоков: по одной идентичности (сессия, UA, cookies, счетчики) на каждый прокси.
+
+    Все потоки берут URL из общей очереди. Если идентичность заблокирована, URL
+    возвращается в очередь и его подхватывает другой поток, пока первый обновляется.
+    """
+
+    QUEUE_POLL_TIMEOUT = 0.5
+    FEED_AHEAD = 4  # очередь не длиннее стольких URL на идентичность
+
+    def __init__(self, config: AvitoConfig, stop_event: threading.Event | None = None):
+        self.config = config
+        self.stop_event = stop_event or threading.Event()
+        # координатор не делает запросов: собирает URL, сохраняет пачки, считает скорость
+        self.coordinator = AvitoParse(config, self.stop_event)
+        self.workers = self._build_workers()
+        for worker in self.workers:
+            # один HTTP-кэш на пул, чтобы статистика попаданий была общей
+            worker.http_cache = self.coordinator.http_cache
+
+        # URL карточек или готовые записи из выдачи (режим без детального парсинга)
+        self.queue: queue.Queue[str | dict] = queue.Queue()
+        self._done = threading.Event()
+        # поднят, когда поток подачи прочитал источник и стадия выдачи закончила добавлять карточки
+        self._feed_done = threading.Event()
+        self._batch: list[dict] = []
+        self._batch_lock = threading.Lock()
+        self._attempts: dict[str, int] = {}
+        self._attempts_lock = threading.Lock()
+
+    def _build_workers(self) -> list[AvitoParse]:
+        """Создает по одному AvitoParse на каждый прокси из пула."""
+        proxies = self.coordinator.proxy_pool
+        if not proxies:
+            logger.info("Пул прокси пуст — пул потоков работает с одной локальной идентичностью")
+            return [AvitoParse(self.config, self.stop_event, cookies_path="cookies_0.json")]
+
+        workers = []
+        for index, proxy in enumerate(proxies):
+            worker_config = replace(
+                self.config,
+                proxy_string=proxy,
+                proxy_change_url=None,
+                proxy_pool=[],
+                use_proxy=True,
+            )
+            workers.append(
+                AvitoParse(worker_config, self.stop_event, cookies_path=f"cookies_{index}.json")
+            )
+        logger.info(f"Пул потоков: {len(workers)} идентичностей")
+        return workers
+
+    def _should_stop(self) -> bool:
+        return self.stop_event.is_set()
+
+    @staticmethod
+    def _is_blocked(worker: AvitoParse) -> bool:
+        """Идентичность считается заблокированной после серии 403/429."""
+        return (
+            worker.consecutive_403 >= 2
+            or worker.consecutive_429 >= worker.MAX_CONSECUTIVE_429
+        )
+
+    def _register_attempt(self, url: str) -> int:
+        with self._attempts_lock:
+            attempts = self._attempts.get(url, 0) + 1
+            self._attempts[url] = attempts
+            return attempts
+
+    def _process(self, worker: AvitoParse, url: str):
+        """Один заход по URL; при неудаче URL уходит обратно в общую очередь."""
+        worker._maybe_refresh_playwright()
+        fetch_url, headers = worker._fetch_target(url)
+        html_code = worker.fetch_data(url=fetch_url, retries=1, extra_headers=headers)
+        if isinstance(html_code, FetchOutcome):
+            worker._record_outcome(url, html_code)
+            return html_code
+        if html_code:
+            return worker._parse_page_result(html_code, url)
+
+        attempts = self._register_attempt(url)
+        if attempts < self.config.max_count_of_retry:
+            logger.debug(f"URL {url} возвращен в очередь (попытка {attempts})")
+            self.queue.put(url)
+            if self._is_blocked(worker):
+                worker._refresh_identity("блокировка в пуле потоков")
+            return _REQUEUED
+
+        logger.info(f"Все идентичности не смогли получить {url}, открываем через Selenium")
+        return worker._browser_fallback(url)
+
+    def _feed(self, urls) -> None:
+        """Поток подачи: URL источника и карточки из выдачи уходят в общую очередь по мере ее разбора."""
+        try:
+            for entry in self.coordinator._iter_work(urls):
+                while self.queue.qsize() >= len(self.workers) * self.FEED_AHEAD and not self._should_stop():
+                    time.sleep(self.coordinator.FEED_POLL)
+                if self._should_stop():
+                    return
+                self.queue.put(entry)
+        except Exception as exc:
+            logger.error(f"Ошибка при подаче URL в очередь: {exc}")
+        finally:
+            self._feed_done.set()
+
+    def _track_in_flight(self, delta: int) -> None:
+        with self._batch_lock:
+            self.coordinator._in_flight += delta
+
+    def _add_result(self, result: dict) -> None:
+        with self._batch_lock:
+            self._batch.append(result)
+            self.coordinator._processed_counter += 1
+            self.coordinator._log_throughput(self.coordinator._processed_counter)
+            if len(self._batch) < self.coordinator.BATCH_SIZE:
+                return
+            chunk = self._batch
+            self._batch = []
+            logger.info(f"Сохраняем пачку из {len(chunk)} записей")
+            self.coordinator._save_and_clear_results(chunk)
+
+    def _worker_loop(self, worker: AvitoParse) -> None:
+        worker.load_cookies()
+        try:
+            while not self._should_stop():
+                try:
+                    entry = self.queue.get(timeout=self.QUEUE_POLL_TIMEOUT)
+                except queue.Empty:
+                    if self._done.is_set():
+                        return
+                    continue
+                url = worker._work_url(entry)
+                self._track_in_flight(1)
+                try:
+                    result = entry if isinstance(entry, dict) else self._process(worker, url)
+                    if result is _REQUEUED:
+                        pass
+                    elif isinstance(result, FetchOutcome):
+                        logger.debug(f"Пропускаем {url}: {result.value}")
+                        self.coordinator._settle(url, result)
+                    elif result:
+                        self._add_result(result)
+                    else:
+                        # итоги URL (контрольная точка, общее хранилище id) ведет координатор
+                        self.coordinator._release_url(url)
+                        self.coordinator._settle(url, result)
+                    with self._batch_lock:
+                        self.coordinator._log_progress()
+                except Exception as exc:
+                    logger.error(f"Ошибка в потоке идентичности при обработке {url}: {exc}")
+                    self.coordinator._release_url(url)
+                    self.coordinator._settle(url, None)
+                finally:
+                    self._track_in_flight(-1)
+                    self.queue.task_done()
+        finally:
+            worker.close_selenium_driver()
+
+    def parse(self) -> None:
+        """Раздает URL всем идентичностям и ждет, пока очередь опустеет."""
+        urls = self.coordinator._start_run()
+        if not urls:
+            return
+        for worker in self.workers:
+            # одна браузерная полоса на пул: ее записи сохраняет координатор
+            worker.browser_lane = self.coordinator.browser_lane
+        self._done.clear()
+        self._feed_done.clear()
+        # выдачу обходит координатор, найденные карточки сразу уходят в общую очередь
+        threading.Thread(target=self._feed, args=(urls,), daemon=True, name="feed").start()
+
+        self.coordinator._concurrency = len(self.workers)
+        threads = [
+            threading.Thread(target=self._worker_loop, args=(worker,), daemon=True, name=f"identity-{i}")
+            for i, worker in enumerate(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        while (self.queue.unfinished_tasks or not self._feed_done.is_set()) and not self._should_stop():
+            time.sleep(self.QUEUE_POLL_TIMEOUT)
+            for result in self.coordinator.browser_lane.drain()[0] if self.coordinator.browser_lane else []:
+                self._add_result(result)
+        self._done.set()
+        for thread in threads:
+            thread.join()
+
+        self.coordinator._concurrency = 1
+        good = sum(worker.good_request_count for worker in self.workers)
+        bad = sum(worker.bad_request_count for worker in self.workers)
+        for index, worker in enumerate(self.workers):
+            logger.info(
+                f"Идентичность #{index + 1} ({worker.current_proxy or 'локальный IP'}): "
+                f"хорошие {worker.good_request_count}, плохие {worker.bad_request_count}"
+            )
+        self.coordinator.good_request_count = good
+        self.coordinator.bad_request_count = bad
+        self.coordinator._bytes_received += sum(worker._bytes_received for worker in self.workers)
+        for worker in self.workers:
+            self.coordinator._page_kinds.update(worker._page_kinds)
+        for worker in self.workers:
+            worker.browser_lane = None
+            worker.keepalive.stop()
+        self.coordinator._finish_run(self._batch)
+        self._batch = []